@@ -4,6 +4,19 @@
 
 -- Connect to the ssis database before running the following commands
 
+-- Enum types for student year level and gender (labels match
+-- StudentModel.YEAR_LEVELS / GENDERS; see migrate_student_enums.py)
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM pg_type WHERE typname = 'year_level') THEN
+        CREATE TYPE year_level AS ENUM ('1st Year', '2nd Year', '3rd Year', '4th Year', '5th Year');
+    END IF;
+    IF NOT EXISTS (SELECT 1 FROM pg_type WHERE typname = 'gender_type') THEN
+        CREATE TYPE gender_type AS ENUM ('Male', 'Female');
+    END IF;
+END
+$$;
+
 -- Create tables
 CREATE TABLE IF NOT EXISTS college (
     code VARCHAR(10) PRIMARY KEY,
@@ -22,12 +35,23 @@ CREATE TABLE IF NOT EXISTS student (
     firstname VARCHAR(20) NOT NULL,
     lastname VARCHAR(20) NOT NULL,
     program_code VARCHAR(10) NOT NULL,
-    year VARCHAR(20) NOT NULL,
-    gender VARCHAR(10) NOT NULL,
+    year year_level NOT NULL,
+    gender gender_type NOT NULL,
     profile_pic_url VARCHAR(255),
     FOREIGN KEY (program_code) REFERENCES program(code) ON DELETE CASCADE
 );
 
+-- Composite indexes for the program/year/gender filters
+CREATE INDEX IF NOT EXISTS idx_student_program_year_gender ON student (program_code, year, gender);
+CREATE INDEX IF NOT EXISTS idx_student_year_gender ON student (year, gender);
+
+-- Direct browser uploads attached to a student, so each is used once (see migrate_direct_upload_claims.sql)
+CREATE TABLE IF NOT EXISTS direct_upload_claim (
+    public_id VARCHAR(255) PRIMARY KEY,
+    claimed_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+CREATE INDEX IF NOT EXISTS idx_direct_upload_claim_claimed_at ON direct_upload_claim (claimed_at);
+
 -- Insert sample data for colleges
 INSERT INTO college (code, name) VALUES 
 ('CCS', 'College of Computer Studies'),
@@ -0,0 +1,129 @@
+"""
+SSIS Benchmark Harness
+
+Drives concurrent load against a running SSIS server and reports throughput and
+latency per concurrency level. Point it at the WSGI server (python app.py /
+gunicorn) and the ASGI server (uvicorn asgi:app) to compare how many concurrent
+requests a single process sustains on the same paths.
+
+Usage:
+    python benchmark.py --url http://localhost:5000 --url http://localhost:8000 \
+        --scenario students --concurrency 1,8,32,128 --duration 10
+
+    python benchmark.py --url http://localhost:8000 --scenario upload --student-id 2024-0001
+"""
+import argparse
+import asyncio
+import statistics
+import struct
+import time
+import zlib
+
+import httpx
+
+def tiny_png():
+    """A valid 1x1 PNG so upload runs measure request handling, not payload size"""
+    def chunk(kind, data):
+        body = kind + data
+        return struct.pack(">I", len(data)) + body + struct.pack(">I", zlib.crc32(body) & 0xffffffff)
+    header = struct.pack(">IIBBBBB", 1, 1, 8, 2, 0, 0, 0)
+    pixels = zlib.compress(b"\x00\xff\xff\xff")
+    return b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header) + chunk(b"IDAT", pixels) + chunk(b"IEND", b"")
+
+def build_request(args):
+    """Return a coroutine factory issuing one request for the chosen scenario"""
+    if args.scenario == "students":
+        path = f"/api/students?page_size={args.page_size}&page=1"
+        return lambda client: client.get(path)
+
+    if args.scenario == "upload":
+        if not args.student_id:
+            raise SystemExit("--student-id is required for the upload scenario")
+        path = f"/api/students/{args.student_id}/profile_pic"
+        payload = tiny_png()
+        return lambda client: client.post(path, files={"file": ("bench.png", payload, "image/png")})
+
+    path = args.path
+    return lambda client: client.get(path)
+
+async def run_level(base_url, make_request, concurrency, duration):
+    latencies = []
+    errors = 0
+    deadline = time.perf_counter() + duration
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        async def worker():
+            nonlocal errors
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                try:
+                    response = await make_request(client)
+                    if response.status_code >= 400:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+                latencies.append(time.perf_counter() - start)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    count = len(latencies)
+    return {
+        'concurrency': concurrency,
+        'requests': count,
+        'errors': errors,
+        'rps': count / elapsed if elapsed else 0.0,
+        'p50_ms': statistics.median(latencies) * 1000 if count else 0.0,
+        'p95_ms': latencies[int(count * 0.95) - 1] * 1000 if count else 0.0,
+    }
+
+def print_report(base_url, rows):
+    print(f"\n{'='*80}")
+    print(f"📊 {base_url}")
+    print(f"{'='*80}")
+    print(f"{'conc':>6} {'requests':>10} {'errors':>8} {'req/s':>10} {'p50 ms':>10} {'p95 ms':>10}")
+    for row in rows:
+        print(f"{row['concurrency']:>6} {row['requests']:>10} {row['errors']:>8} "
+              f"{row['rps']:>10.1f} {row['p50_ms']:>10.1f} {row['p95_ms']:>10.1f}")
+
+def print_comparison(results):
+    """Compare every server against the first one given"""
+    baseline_url, baseline_rows = results[0]
+    for base_url, rows in results[1:]:
+        print(f"\n📈 {base_url} vs {baseline_url}")
+        for base, row in zip(baseline_rows, rows):
+            ratio = row['rps'] / base['rps'] if base['rps'] else float('inf')
+            print(f"  concurrency {row['concurrency']:>4}: {ratio:5.2f}x throughput")
+
+async def main():
+    parser = argparse.ArgumentParser(description="Concurrent load benchmark for SSIS")
+    parser.add_argument("--url", action="append", required=True,
+                        help="Base URL of a running server (repeat to compare servers)")
+    parser.add_argument("--scenario", choices=["students", "upload", "path"], default="students")
+    parser.add_argument("--path", default="/api/students", help="Path for the 'path' scenario")
+    parser.add_argument("--page-size", type=int, default=25)
+    parser.add_argument("--student-id", help="Student whose picture the upload scenario replaces")
+    parser.add_argument("--concurrency", default="1,8,32,128",
+                        help="Comma-separated concurrency levels")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per level")
+    args = parser.parse_args()
+
+    make_request = build_request(args)
+    levels = [int(level) for level in args.concurrency.split(",")]
+
+    results = []
+    for base_url in args.url:
+        rows = []
+        for concurrency in levels:
+            rows.append(await run_level(base_url, make_request, concurrency, args.duration))
+        print_report(base_url, rows)
+        results.append((base_url, rows))
+
+    if len(results) > 1:
+        print_comparison(results)
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,162 @@
+"""
+SSIS Partition Benchmark: one heap vs. partitioned by enrollment year
+
+Builds two scratch copies of the student table in a `bench` schema from the
+seeded students - a single heap, as student was before
+migrate_student_partitions.sql, and one RANGE-partitioned on id by enrollment
+year, as it is after - scaled to --per-year students for every year in
+--years, with the same primary key and (program_code, id) index. Then it times
+the year-bounded reads on both and what it costs to retire the oldest year
+(DELETE vs. DETACH + DROP, each rolled back), and drops the schema again.
+
+Usage:
+    python benchmark_partitions.py
+    python benchmark_partitions.py --years 2000-2025 --per-year 9999 --runs 500
+    python benchmark_partitions.py --keep      # leave the bench schema for EXPLAIN
+"""
+import argparse
+import statistics
+import time
+
+from config import Config
+from website.database import DatabaseManager
+from website.models.studentModels import StudentModel
+
+HEAP = "bench.student_heap"
+PARTITIONED = "bench.student_partitioned"
+
+COLUMNS = """
+    id VARCHAR(10) NOT NULL,
+    firstname VARCHAR(20) NOT NULL,
+    lastname VARCHAR(20) NOT NULL,
+    program_code VARCHAR(10) NOT NULL,
+    year year_level NOT NULL,
+    gender gender_type NOT NULL,
+    profile_pic_url VARCHAR(255)
+"""
+
+def build_tables(first_year, last_year, per_year):
+    with DatabaseManager.get_cursor() as (cur, conn):
+        cur.execute("DROP SCHEMA IF EXISTS bench CASCADE")
+        cur.execute("CREATE SCHEMA bench")
+        cur.execute(f"CREATE TABLE {HEAP} ({COLUMNS})")
+        cur.execute(f"CREATE TABLE {PARTITIONED} ({COLUMNS}) PARTITION BY RANGE (id)")
+        for enrollment_year in range(first_year, last_year + 1):
+            lower, upper = StudentModel.enrollment_year_bounds(enrollment_year)
+            cur.execute(f"CREATE TABLE bench.student_y{enrollment_year} PARTITION OF {PARTITIONED} "
+                        f"FOR VALUES FROM (%s) TO (%s)", (lower, upper))
+
+        # Every year gets per_year IDs; names, programs, levels and genders cycle through the seed data
+        for table in (HEAP, PARTITIONED):
+            cur.execute(f"""
+                WITH seed AS (
+                    SELECT firstname, lastname, program_code, year, gender,
+                           row_number() OVER (ORDER BY id) - 1 AS n
+                    FROM student
+                )
+                INSERT INTO {table} (id, firstname, lastname, program_code, year, gender)
+                SELECT enrollment_year || '-' || lpad(number::text, 4, '0'),
+                       seed.firstname, seed.lastname, seed.program_code, seed.year, seed.gender
+                FROM generate_series(%s, %s) AS enrollment_year
+                CROSS JOIN generate_series(1, %s) AS number
+                JOIN seed ON seed.n = (enrollment_year * 10000 + number) %% (SELECT COUNT(*) FROM seed)
+            """, (first_year, last_year, per_year))
+            cur.execute(f"ALTER TABLE {table} ADD PRIMARY KEY (id)")
+            cur.execute(f"CREATE INDEX ON {table} (program_code, id)")
+            cur.execute(f"ANALYZE {table}")
+        cur.execute(f"SELECT COUNT(*) AS count FROM {HEAP}")
+        return cur.fetchone()['count']
+
+def time_query(table, sql, params, runs):
+    with DatabaseManager.get_cursor() as (cur, conn):
+        cur.execute(sql.format(table=table), params)  # warm the cache
+        samples = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            cur.execute(sql.format(table=table), params)
+            cur.fetchall()
+            samples.append((time.perf_counter() - start) * 1000)
+        cur.execute("EXPLAIN (FORMAT JSON) " + sql.format(table=table), params)
+        plan = cur.fetchone()['QUERY PLAN'][0]['Plan']
+    samples.sort()
+    return statistics.fmean(samples), samples[min(len(samples) - 1, int(len(samples) * 0.99))], scanned_relations(plan)
+
+def scanned_relations(plan):
+    """Number of distinct tables a plan reads (partitions count one each)"""
+    names = set()
+    stack = [plan]
+    while stack:
+        node = stack.pop()
+        if 'Relation Name' in node:
+            names.add(node['Relation Name'])
+        stack.extend(node.get('Plans', []))
+    return len(names)
+
+def time_retire(first_year):
+    """Remove the oldest year from each table and roll back: (heap ms, partitioned ms)"""
+    lower, upper = StudentModel.enrollment_year_bounds(first_year)
+    results = []
+    for statements in (
+        [(f"DELETE FROM {HEAP} WHERE id >= %s AND id < %s", (lower, upper))],
+        [(f"ALTER TABLE {PARTITIONED} DETACH PARTITION bench.student_y{first_year}", None),
+         (f"DROP TABLE bench.student_y{first_year}", None)],
+    ):
+        with DatabaseManager.get_cursor() as (cur, conn):
+            start = time.perf_counter()
+            for sql, params in statements:
+                cur.execute(sql, params)
+            results.append((time.perf_counter() - start) * 1000)
+            conn.rollback()
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Partitioned vs. unpartitioned student table")
+    parser.add_argument("--years", default="2000-2025", help="Enrollment years to generate, FIRST-LAST")
+    parser.add_argument("--per-year", type=int, default=9999, help="Students per year (IDs are NNNN, so at most 9999)")
+    parser.add_argument("--runs", type=int, default=200, help="Calls per query and table")
+    parser.add_argument("--keep", action="store_true", help="Keep the bench schema afterwards")
+    args = parser.parse_args()
+    first_year, last_year = (int(part) for part in args.years.split("-"))
+    per_year = max(1, min(args.per_year, 9999))
+
+    Config.ROSTER_SNAPSHOT_ENABLED = False
+    print(f"\n🧪 Building bench tables: {last_year - first_year + 1} years x {per_year} students...")
+    total = build_tables(first_year, last_year, per_year)
+    if not total:
+        print("❌ No students found; seed the database first")
+        return
+
+    current = StudentModel.enrollment_year_bounds(last_year)
+    recent = (StudentModel.enrollment_year_bounds(last_year - 3)[0], current[1])
+    with DatabaseManager.get_cursor() as (cur, conn):
+        cur.execute(f"SELECT program_code FROM {HEAP} GROUP BY program_code ORDER BY COUNT(*) DESC LIMIT 1")
+        program_code = cur.fetchone()['program_code']
+
+    queries = [
+        ("next ID of the newest year", "SELECT id FROM {table} WHERE id >= %s AND id < %s ORDER BY id DESC LIMIT 1", current),
+        ("count one cohort", "SELECT COUNT(*) FROM {table} WHERE id >= %s AND id < %s", current),
+        ("cohort breakdown by program/gender",
+         "SELECT program_code, gender, COUNT(*) FROM {table} WHERE id >= %s AND id < %s GROUP BY 1, 2", current),
+        (f"{program_code} in the last 4 cohorts",
+         "SELECT COUNT(*) FROM {table} WHERE program_code = %s AND id >= %s AND id < %s", (program_code,) + recent),
+    ]
+
+    print("\n" + "="*80)
+    print(f"PARTITION BENCHMARK ({total:,} students, {args.runs} calls per row)")
+    print("="*80)
+    print(f"{'query':<38} {'table':<12} {'mean ms':>9} {'p99 ms':>9} {'tables read':>12}")
+    for label, sql, params in queries:
+        for name, table in (("heap", HEAP), ("partitioned", PARTITIONED)):
+            mean, p99, relations = time_query(table, sql, params, args.runs)
+            print(f"{label:<38} {name:<12} {mean:>9.3f} {p99:>9.3f} {relations:>12}")
+    heap_ms, partitioned_ms = time_retire(first_year)
+    print(f"{f'retire {first_year} (rolled back)':<38} {'heap':<12} {heap_ms:>9.3f} {'':>9} {'DELETE':>12}")
+    print(f"{'':<38} {'partitioned':<12} {partitioned_ms:>9.3f} {'':>9} {'DETACH+DROP':>12}")
+    print("="*80)
+
+    if not args.keep:
+        with DatabaseManager.get_cursor() as (cur, conn):
+            cur.execute("DROP SCHEMA bench CASCADE")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+SSIS Query Benchmark: prepared vs. plain execution
+
+Runs the hot StudentModel reads in-process against the configured database,
+first with PREPARED_STATEMENTS_ENABLED off (query text sent, parsed and planned
+on every call) and then on (PREPARE once per pooled connection, EXECUTE after),
+and prints the per-call latency of each. Point lookups such as view_student
+show the saved parse/plan time most clearly.
+
+Usage:
+    python benchmark_queries.py --runs 2000
+    python benchmark_queries.py --runs 500 --query search
+"""
+import argparse
+import statistics
+import time
+
+from config import Config
+from website.database import DatabaseManager
+from website.models.studentModels import StudentModel
+
+def build_queries(sample):
+    return {
+        "details": ("get_student_with_details (view_student)", lambda: StudentModel.get_student_with_details(sample['id'])),
+        "program": ("get_students_by_program", lambda: StudentModel.get_students_by_program(sample['program_code'])),
+        "college": ("get_students_by_college", lambda: StudentModel.get_students_by_college(sample['college_code'])),
+        "search": ("search_students", lambda: StudentModel.search_students(sample['lastname'][:3])),
+        "all": ("get_all_students", StudentModel.get_all_students),
+    }
+
+def time_calls(call, runs):
+    call()  # warm the pool (and, when enabled, prepare on that connection)
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        call()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return {
+        'mean': statistics.fmean(samples),
+        'p50': samples[len(samples) // 2],
+        'p99': samples[min(len(samples) - 1, int(len(samples) * 0.99))],
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Prepared statement benchmark for SSIS")
+    parser.add_argument("--runs", type=int, default=1000, help="Calls per query and mode")
+    parser.add_argument("--query", action="append", choices=["details", "program", "college", "search", "all"],
+                        help="Query to run (repeatable; default: all of them)")
+    args = parser.parse_args()
+
+    # One connection keeps the comparison about planning, not pool behaviour
+    Config.DB_POOL_MIN_SIZE = Config.DB_POOL_MAX_SIZE = 1
+    Config.ROSTER_SNAPSHOT_ENABLED = False
+
+    students = StudentModel.get_all_students()
+    if not students:
+        print("❌ No students found; seed the database first")
+        return
+    queries = build_queries(students[0])
+
+    print("\n" + "="*80)
+    print(f"PREPARED STATEMENT BENCHMARK ({args.runs} calls per row)")
+    print("="*80)
+    print(f"{'query':<42} {'mode':<9} {'mean ms':>9} {'p50 ms':>9} {'p99 ms':>9}")
+    for key in args.query or list(queries):
+        label, call = queries[key]
+        results = {}
+        for mode, enabled in (("plain", False), ("prepared", True)):
+            Config.PREPARED_STATEMENTS_ENABLED = enabled
+            DatabaseManager.close_pool()
+            results[mode] = time_calls(call, args.runs)
+            stats = results[mode]
+            print(f"{label:<42} {mode:<9} {stats['mean']:>9.3f} {stats['p50']:>9.3f} {stats['p99']:>9.3f}")
+        saved = results['plain']['mean'] - results['prepared']['mean']
+        print(f"{'':<42} {'saved':<9} {saved:>9.3f} ({saved / results['plain']['mean'] * 100:.0f}%)")
+    print("="*80)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""
+SSIS Static Asset Build
+
+Writes a fingerprinted copy of every file in website/static to
+website/static/dist: JS and CSS are minified, each file is renamed to
+<name>.<content hash>.<ext>, and text assets also get precompressed .gz and
+.br siblings. dist/manifest.json maps original names to hashed ones; the app
+(website/assets.py) uses it to rewrite url_for('static', ...) and serves the
+hashed files with a one-year immutable Cache-Control.
+
+Run it after changing anything in website/static (and as part of a deploy):
+    python build_assets.py
+    python build_assets.py --no-minify     # keep sources readable
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import posixpath
+import re
+import shutil
+
+from website.assets import DIST_DIR, MANIFEST, COMPRESSIBLE
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "website", "static")
+
+# Never published, fingerprinted or not
+SKIP = re.compile(r"(\.backup|\.bak|~|\.map)$")
+
+CSS_URL = re.compile(r"""url\(\s*(['"]?)([^'")]+)\1\s*\)""")
+
+def minify(filename, text):
+    """Minify JS/CSS if rjsmin/rcssmin are installed, else return the source unchanged"""
+    try:
+        if filename.endswith(".js"):
+            import rjsmin
+            return rjsmin.jsmin(text)
+        if filename.endswith(".css"):
+            import rcssmin
+            return rcssmin.cssmin(text)
+    except ImportError as e:
+        print(f"⚠️  {e.name} not installed; {filename} is copied unminified")
+    return text
+
+def rewrite_css_urls(filename, text, manifest):
+    """Point url(...) references in a stylesheet at the fingerprinted files"""
+    def replace(match):
+        quote, target = match.groups()
+        if re.match(r"^(?:[a-z]+:|/|#)", target):
+            return match.group(0)
+        path, _, suffix = target.partition("?")
+        resolved = posixpath.normpath(posixpath.join(posixpath.dirname(filename), path))
+        if resolved.startswith("../static/"):
+            # Written relative to the site root's parent, e.g. url('../static/logo.png')
+            resolved = resolved[len("../static/"):]
+        hashed = manifest.get(resolved)
+        if hashed is None:
+            return match.group(0)
+        # The stylesheet itself ends up at the same place under dist/
+        relative = posixpath.relpath(hashed, posixpath.dirname(posixpath.join(DIST_DIR, filename)))
+        return f"url({quote}{relative}{('?' + suffix) if suffix else ''}{quote})"
+    return CSS_URL.sub(replace, text)
+
+def fingerprint(filename, content):
+    digest = hashlib.blake2b(content, digest_size=6).hexdigest()
+    stem, ext = posixpath.splitext(filename)
+    return posixpath.join(DIST_DIR, f"{stem}.{digest}{ext}")
+
+def write_variants(path, content):
+    """Write `content` to `path` plus .gz/.br siblings when they are smaller"""
+    with open(path, "wb") as f:
+        f.write(content)
+    sizes = {"raw": len(content)}
+
+    compressed = gzip.compress(content, compresslevel=9, mtime=0)
+    if len(compressed) < len(content):
+        with open(path + ".gz", "wb") as f:
+            f.write(compressed)
+        sizes["gz"] = len(compressed)
+
+    try:
+        import brotli
+    except ImportError:
+        return sizes
+    compressed = brotli.compress(content, quality=11)
+    if len(compressed) < len(content):
+        with open(path + ".br", "wb") as f:
+            f.write(compressed)
+        sizes["br"] = len(compressed)
+    return sizes
+
+def collect_sources():
+    sources = []
+    for root, dirs, files in os.walk(STATIC_DIR):
+        rel_root = os.path.relpath(root, STATIC_DIR).replace(os.sep, "/")
+        if rel_root == DIST_DIR or rel_root.startswith(DIST_DIR + "/"):
+            dirs[:] = []
+            continue
+        for name in files:
+            if not SKIP.search(name):
+                sources.append(posixpath.normpath(posixpath.join(rel_root, name)))
+    # Stylesheets last, so the files they reference are already fingerprinted
+    return sorted(sources, key=lambda name: (name.endswith(".css"), name))
+
+def build(minify_sources=True):
+    dist_path = os.path.join(STATIC_DIR, DIST_DIR)
+    shutil.rmtree(dist_path, ignore_errors=True)
+    os.makedirs(dist_path)
+
+    manifest = {}
+    print("\n" + "="*80)
+    print("BUILDING STATIC ASSETS")
+    print("="*80)
+    print(f"{'asset':<46} {'raw':>9} {'gzip':>9} {'brotli':>9}")
+    for filename in collect_sources():
+        with open(os.path.join(STATIC_DIR, filename), "rb") as f:
+            content = f.read()
+
+        if filename.endswith((".js", ".css")):
+            text = content.decode("utf-8")
+            if minify_sources:
+                text = minify(filename, text)
+            if filename.endswith(".css"):
+                text = rewrite_css_urls(filename, text, manifest)
+            content = text.encode("utf-8")
+
+        hashed = fingerprint(filename, content)
+        target = os.path.join(STATIC_DIR, hashed)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        if filename.endswith(COMPRESSIBLE):
+            sizes = write_variants(target, content)
+        else:
+            with open(target, "wb") as f:
+                f.write(content)
+            sizes = {"raw": len(content)}
+        manifest[filename] = hashed
+        print(f"{hashed:<46} {sizes['raw']:>9} {sizes.get('gz', '-'):>9} {sizes.get('br', '-'):>9}")
+
+    with open(os.path.join(dist_path, MANIFEST), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    print("="*80)
+    print(f"✅ {len(manifest)} assets written to website/static/{DIST_DIR}")
+    return manifest
+
+def main():
+    parser = argparse.ArgumentParser(description="Fingerprint, minify and precompress SSIS static assets")
+    parser.add_argument("--no-minify", action="store_true", help="Copy JS/CSS without minifying")
+    args = parser.parse_args()
+    build(minify_sources=not args.no_minify)
+
+if __name__ == "__main__":
+    main()
@@ -9,6 +9,30 @@ class Config:
     CLOUDINARY_CLOUD_NAME = os.environ.get('CLOUDINARY_CLOUD_NAME')
     CLOUDINARY_API_KEY = os.environ.get('CLOUDINARY_API_KEY')
     CLOUDINARY_API_SECRET = os.environ.get('CLOUDINARY_API_SECRET')
+    CLOUDINARY_SIGNATURE_ALGORITHM = os.environ.get('CLOUDINARY_SIGNATURE_ALGORITHM', 'sha1')
+    
+    # Signed browser-to-Cloudinary uploads of profile pictures (website/media.py); when
+    # disabled (or Cloudinary isn't configured) files are posted through Flask as before
+    DIRECT_UPLOADS_ENABLED = os.environ.get('DIRECT_UPLOADS_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+    DIRECT_UPLOAD_FOLDER = os.environ.get('DIRECT_UPLOAD_FOLDER', 'ssis/profile_pics')
+    DIRECT_UPLOAD_MAX_BYTES = int(os.environ.get('DIRECT_UPLOAD_MAX_BYTES', str(5 * 1024 * 1024)))
+    DIRECT_UPLOAD_MAX_DIMENSION = int(os.environ.get('DIRECT_UPLOAD_MAX_DIMENSION', '1024'))
+    # An upload must be attached to a student within this many seconds of being made
+    DIRECT_UPLOAD_TTL_SECONDS = int(os.environ.get('DIRECT_UPLOAD_TTL_SECONDS', '900'))
+    
+    # Upload ingest (website/uploads.py): largest picture posted through Flask, largest request
+    # body (picture plus form fields; Flask rejects anything bigger), and the largest
+    # dimensions read from the image header
+    UPLOAD_MAX_BYTES = int(os.environ.get('UPLOAD_MAX_BYTES', str(5 * 1024 * 1024)))
+    MAX_CONTENT_LENGTH = UPLOAD_MAX_BYTES + int(os.environ.get('UPLOAD_FORM_OVERHEAD_BYTES', str(64 * 1024)))
+    UPLOAD_MAX_DIMENSION = int(os.environ.get('UPLOAD_MAX_DIMENSION', '8000'))
+    UPLOAD_MAX_PIXELS = int(os.environ.get('UPLOAD_MAX_PIXELS', str(40 * 1000 * 1000)))
+    
+    # Reuse an already uploaded Cloudinary asset when the same picture bytes are uploaded
+    # again, with per-asset reference counts (requires migrate_picture_dedup.sql)
+    PICTURE_DEDUP_ENABLED = os.environ.get('PICTURE_DEDUP_ENABLED', 'false').lower() in ('1', 'true', 'yes')
+    # Unreferenced assets younger than this are kept by `flask prune-pictures` (an upload may be mid-attach)
+    PICTURE_PRUNE_GRACE_SECONDS = int(os.environ.get('PICTURE_PRUNE_GRACE_SECONDS', '3600'))
     
     # PostgreSQL Configuration
     POSTGRES_HOST = os.environ.get('POSTGRES_HOST', 'localhost')
@@ -17,6 +41,100 @@ class Config:
     POSTGRES_PASSWORD = os.environ.get('POSTGRES_PASSWORD', 'geodgmn')
     POSTGRES_DB = os.environ.get('POSTGRES_DB', 'ssis')
     
+    # Optional libpq DSN for the primary (overrides the POSTGRES_* fields above) and
+    # comma-separated DSNs of read replicas used by read_only model methods
+    POSTGRES_PRIMARY_DSN = os.environ.get('POSTGRES_PRIMARY_DSN', '')
+    POSTGRES_REPLICA_DSNS = [dsn.strip() for dsn in os.environ.get('POSTGRES_REPLICA_DSNS', '').split(',') if dsn.strip()]
+    # Replicas further behind than this are skipped; lag is re-measured every REPLICA_LAG_CHECK_SECONDS
+    REPLICA_MAX_LAG_SECONDS = float(os.environ.get('REPLICA_MAX_LAG_SECONDS', '5'))
+    REPLICA_LAG_CHECK_SECONDS = float(os.environ.get('REPLICA_LAG_CHECK_SECONDS', '2'))
+    # After a write, the same browser reads from the primary for this long
+    REPLICA_STICKY_SECONDS = float(os.environ.get('REPLICA_STICKY_SECONDS', '5'))
+    
+    # PREPARE hot queries once per pooled connection (disable behind transaction-pooling proxies)
+    PREPARED_STATEMENTS_ENABLED = os.environ.get('PREPARED_STATEMENTS_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+    
+    # Latency budgets (website/budgets.py): routes without their own budget get
+    # DEFAULT_ROUTE_BUDGET_MS; queries default to these statement/lock timeouts
+    DEFAULT_ROUTE_BUDGET_MS = int(os.environ.get('DEFAULT_ROUTE_BUDGET_MS', '10000'))
+    DB_STATEMENT_TIMEOUT_MS = int(os.environ.get('DB_STATEMENT_TIMEOUT_MS', '5000'))
+    DB_LOCK_TIMEOUT_MS = int(os.environ.get('DB_LOCK_TIMEOUT_MS', '2000'))
+    BUDGET_RETRY_AFTER_SECONDS = int(os.environ.get('BUDGET_RETRY_AFTER_SECONDS', '2'))
+    
+    # Admission control (website/admission.py): requests in flight per class and process
+    # (0 = unlimited), how many more may queue and for how long before a 503 + Retry-After.
+    # Keep their sum within DB_POOL_MAX_SIZE and each limit below SSIS_THREADS (checked at startup)
+    ADMISSION_CONTROL_ENABLED = os.environ.get('ADMISSION_CONTROL_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+    ADMISSION_READ_LIMIT = int(os.environ.get('ADMISSION_READ_LIMIT', '3'))
+    ADMISSION_WRITE_LIMIT = int(os.environ.get('ADMISSION_WRITE_LIMIT', '2'))
+    ADMISSION_UPLOAD_LIMIT = int(os.environ.get('ADMISSION_UPLOAD_LIMIT', '1'))
+    ADMISSION_EXPORT_LIMIT = int(os.environ.get('ADMISSION_EXPORT_LIMIT', '1'))
+    ADMISSION_QUEUE_SIZE = int(os.environ.get('ADMISSION_QUEUE_SIZE', '16'))
+    ADMISSION_QUEUE_TIMEOUT_MS = int(os.environ.get('ADMISSION_QUEUE_TIMEOUT_MS', '2000'))
+    ADMISSION_RETRY_AFTER_SECONDS = int(os.environ.get('ADMISSION_RETRY_AFTER_SECONDS', '2'))
+    # Per-client (remote address) token bucket on upload routes; 0 disables it
+    UPLOAD_RATE_PER_MINUTE = float(os.environ.get('UPLOAD_RATE_PER_MINUTE', '30'))
+    UPLOAD_RATE_BURST = int(os.environ.get('UPLOAD_RATE_BURST', '10'))
+    
+    # Per-process psycopg2 connection pool (size it to at least the worker's thread count).
+    # When every connection is in use a query waits up to DB_POOL_TIMEOUT_MS (never longer
+    # than the rest of its route budget) for one, then fails with 503 + Retry-After
+    DB_POOL_MIN_SIZE = int(os.environ.get('DB_POOL_MIN_SIZE', '1'))
+    DB_POOL_MAX_SIZE = int(os.environ.get('DB_POOL_MAX_SIZE', '10'))
+    DB_POOL_TIMEOUT_MS = int(os.environ.get('DB_POOL_TIMEOUT_MS', '5000'))
+    
+    # Batched data migrations (website/batch_migrations.py, migrate_data.py): rows per chunk and
+    # transaction, target throughput (0 = unthrottled), and how long a chunk may wait on a row
+    # lock held by app traffic before it backs off and retries
+    MIGRATION_BATCH_SIZE = int(os.environ.get('MIGRATION_BATCH_SIZE', '500'))
+    MIGRATION_ROWS_PER_SECOND = float(os.environ.get('MIGRATION_ROWS_PER_SECOND', '2000'))
+    MIGRATION_LOCK_TIMEOUT_MS = int(os.environ.get('MIGRATION_LOCK_TIMEOUT_MS', '500'))
+    MIGRATION_STATEMENT_TIMEOUT_MS = int(os.environ.get('MIGRATION_STATEMENT_TIMEOUT_MS', '5000'))
+    MIGRATION_MAX_RETRIES = int(os.environ.get('MIGRATION_MAX_RETRIES', '5'))
+    MIGRATION_RETRY_DELAY_SECONDS = float(os.environ.get('MIGRATION_RETRY_DELAY_SECONDS', '1'))
+    
+    # Archive tier (website/archive.py, `flask archive-students`): cohorts enrolled at least this
+    # many years ago are moved from student to student_archive
+    ARCHIVE_AFTER_YEARS = int(os.environ.get('ARCHIVE_AFTER_YEARS', '5'))
+    
+    # Seconds a worker may serve cached program/college lists written by another worker
+    REFERENCE_CACHE_TTL = float(os.environ.get('REFERENCE_CACHE_TTL', '30'))
+    
+    # Seconds between full rebuilds of the in-process typeahead index
+    SUGGEST_REFRESH_SECONDS = float(os.environ.get('SUGGEST_REFRESH_SECONDS', '300'))
+    
+    # Optional in-process roster snapshot kept current by LISTEN/NOTIFY
+    # (requires migrate_change_notifications.sql)
+    ROSTER_SNAPSHOT_ENABLED = os.environ.get('ROSTER_SNAPSHOT_ENABLED', 'false').lower() in ('1', 'true', 'yes')
+    ROSTER_MAX_STALENESS = float(os.environ.get('ROSTER_MAX_STALENESS', '5'))
+    LISTENER_HEARTBEAT_SECONDS = float(os.environ.get('LISTENER_HEARTBEAT_SECONDS', '2'))
+    
+    # Live table updates over Server-Sent Events (/events). Under WSGI each open stream holds a
+    # worker thread, so keep SSE_MAX_CLIENTS below the per-process thread count (SSIS_THREADS);
+    # the ASGI app streams without a thread per client and allows SSE_ASYNC_MAX_CLIENTS
+    SSE_MAX_CLIENTS = int(os.environ.get('SSE_MAX_CLIENTS', '2'))
+    SSE_ASYNC_MAX_CLIENTS = int(os.environ.get('SSE_ASYNC_MAX_CLIENTS', '1000'))
+    SSE_CLIENT_QUEUE_SIZE = int(os.environ.get('SSE_CLIENT_QUEUE_SIZE', '100'))
+    SSE_HEARTBEAT_SECONDS = float(os.environ.get('SSE_HEARTBEAT_SECONDS', '15'))
+    
+    # Async (ASGI) serving mode - asyncpg pool sizing and HTTP client timeout
+    ASYNC_POOL_MIN_SIZE = int(os.environ.get('ASYNC_POOL_MIN_SIZE', '2'))
+    ASYNC_POOL_MAX_SIZE = int(os.environ.get('ASYNC_POOL_MAX_SIZE', '20'))
+    ASYNC_HTTP_TIMEOUT = float(os.environ.get('ASYNC_HTTP_TIMEOUT', '30'))
+    
+    # Compression of HTML/JSON responses (website/compression.py): preferred encodings first;
+    # zstd and br are used only when the zstandard / brotli packages are installed
+    COMPRESSION_ENABLED = os.environ.get('COMPRESSION_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+    COMPRESSION_ENCODINGS = [e.strip() for e in os.environ.get('COMPRESSION_ENCODINGS', 'zstd,br,gzip').split(',') if e.strip()]
+    COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE', '1024'))
+    
+    # Serve the fingerprinted build of website/static (python build_assets.py) when one exists;
+    # set false while editing the sources so changes show up without a rebuild
+    STATIC_FINGERPRINTING = os.environ.get('STATIC_FINGERPRINTING', 'true').lower() in ('1', 'true', 'yes')
+    
+    # Flask-SQLAlchemy is not used by any model; enable only if an extension needs it
+    SQLALCHEMY_ENABLED = os.environ.get('SQLALCHEMY_ENABLED', 'false').lower() in ('1', 'true', 'yes')
+    
     # SQLAlchemy Database URI
     SQLALCHEMY_DATABASE_URI = (
         f"postgresql://{POSTGRES_USER}:{POSTGRES_PASSWORD}@"
@@ -0,0 +1,56 @@
+-- Migration Script: Row-level change notifications
+-- Every INSERT/UPDATE/DELETE on student, program and college sends a NOTIFY on
+-- the 'ssis_changes' channel. Worker processes LISTEN on it to keep in-process
+-- copies (roster snapshot, caches) current without polling.
+--
+-- Payload (JSON): {"table": "student", "op": "UPDATE", "key": "2024-0001",
+--                  "old_key": "2024-0001", "row": {...new row...},
+--                  "old_row": {...previous row...}}
+-- "row" is null for deletes and "old_row" is null for inserts. Notifications are delivered only on commit, in
+-- commit order, and cascaded deletes notify every affected row.
+
+-- student's triggers pass its name as the argument: once student is partitioned
+-- (migrate_student_partitions.sql) row triggers fire with the partition's TG_TABLE_NAME
+CREATE OR REPLACE FUNCTION notify_row_change() RETURNS trigger AS $$
+DECLARE
+    logical_table TEXT := COALESCE(TG_ARGV[0], TG_TABLE_NAME);
+    new_key TEXT;
+    old_key TEXT;
+BEGIN
+    IF logical_table = 'student' THEN
+        IF TG_OP <> 'DELETE' THEN new_key := NEW.id; END IF;
+        IF TG_OP <> 'INSERT' THEN old_key := OLD.id; END IF;
+    ELSE
+        IF TG_OP <> 'DELETE' THEN new_key := NEW.code; END IF;
+        IF TG_OP <> 'INSERT' THEN old_key := OLD.code; END IF;
+    END IF;
+
+    PERFORM pg_notify('ssis_changes', json_build_object(
+        'table', logical_table,
+        'op', TG_OP,
+        'key', COALESCE(new_key, old_key),
+        'old_key', old_key,
+        'row', CASE WHEN TG_OP = 'DELETE' THEN NULL ELSE row_to_json(NEW) END,
+        'old_row', CASE WHEN TG_OP = 'INSERT' THEN NULL ELSE row_to_json(OLD) END
+    )::text);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS student_notify_change ON student;
+CREATE TRIGGER student_notify_change
+AFTER INSERT OR UPDATE OR DELETE ON student
+FOR EACH ROW EXECUTE FUNCTION notify_row_change('student');
+
+DROP TRIGGER IF EXISTS program_notify_change ON program;
+CREATE TRIGGER program_notify_change
+AFTER INSERT OR UPDATE OR DELETE ON program
+FOR EACH ROW EXECUTE FUNCTION notify_row_change();
+
+DROP TRIGGER IF EXISTS college_notify_change ON college;
+CREATE TRIGGER college_notify_change
+AFTER INSERT OR UPDATE OR DELETE ON college
+FOR EACH ROW EXECUTE FUNCTION notify_row_change();
+
+-- Verify the changes
+SELECT 'Migration completed successfully!' AS status;
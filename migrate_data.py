@@ -0,0 +1,89 @@
+"""
+Migration Script: Online data rewrites (batched, resumable, throttled)
+
+Runs the data migrations registered below with website/batch_migrations.py:
+keyset-ordered chunks in short transactions, a checkpoint per migration so an
+interrupted run picks up where it stopped, and a rows-per-second throttle so
+it can run while the app is serving traffic. Schema changes still go in the
+migrate_*.sql scripts; this is for rewriting the rows themselves.
+
+    python migrate_data.py list
+    python migrate_data.py status
+    python migrate_data.py run normalize_student_names --dry-run
+    python migrate_data.py run normalize_student_names --rate 500 --batch-size 200
+    python migrate_data.py run normalize_student_names --restart   # ignore the checkpoint
+"""
+import argparse
+
+from website.batch_migrations import DataMigration, MigrationRunner
+
+class NormalizeStudentNames(DataMigration):
+    name = 'normalize_student_names'
+    description = 'Trim student first/last names and collapse repeated whitespace'
+    table = 'student'
+    key = 'id'
+    pending_condition = (
+        r"firstname <> btrim(regexp_replace(firstname, '\s+', ' ', 'g'))"
+        r" OR lastname <> btrim(regexp_replace(lastname, '\s+', ' ', 'g'))"
+    )
+    assignments = (
+        r"firstname = btrim(regexp_replace(firstname, '\s+', ' ', 'g')),"
+        r" lastname = btrim(regexp_replace(lastname, '\s+', ' ', 'g'))"
+    )
+
+MIGRATIONS = {migration.name: migration for migration in (NormalizeStudentNames(),)}
+
+def list_migrations():
+    print("\n" + "="*80)
+    print("DATA MIGRATIONS")
+    print("="*80)
+    for name, migration in MIGRATIONS.items():
+        print(f"  {name:<30} {migration.table:<10} {migration.description}")
+
+def show_status():
+    MigrationRunner.ensure_progress_table()
+    rows = {row['name']: row for row in MigrationRunner.progress()}
+    print("\n" + "="*80)
+    print("DATA MIGRATION STATUS")
+    print("="*80)
+    print(f"  {'migration':<30} {'state':<10} {'last key':<14} {'scanned':>9} {'changed':>9}")
+    for name in sorted(set(MIGRATIONS) | set(rows)):
+        row = rows.get(name)
+        if row is None:
+            state, last_key, scanned, changed = 'pending', '-', 0, 0
+        else:
+            state = 'finished' if row['finished_at'] else 'partial'
+            last_key, scanned, changed = row['last_key'] or '-', row['rows_scanned'], row['rows_changed']
+        print(f"  {name:<30} {state:<10} {last_key:<14} {scanned:>9} {changed:>9}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Batched, resumable SSIS data migrations")
+    sub = parser.add_subparsers(dest='command', required=True)
+    sub.add_parser('list', help='Registered migrations')
+    sub.add_parser('status', help='Checkpoint of every migration')
+    run = sub.add_parser('run', help='Run or resume a migration')
+    run.add_argument('name', choices=sorted(MIGRATIONS))
+    run.add_argument('--batch-size', type=int, default=None, help='Rows per chunk (MIGRATION_BATCH_SIZE)')
+    run.add_argument('--rate', type=float, default=None, help='Target rows per second, 0 = unthrottled (MIGRATION_ROWS_PER_SECOND)')
+    run.add_argument('--dry-run', action='store_true', help='Count the rows each chunk would change; write nothing')
+    run.add_argument('--restart', action='store_true', help='Start from the first row instead of the checkpoint')
+    args = parser.parse_args()
+
+    if args.command == 'list':
+        list_migrations()
+    elif args.command == 'status':
+        show_status()
+    else:
+        runner = MigrationRunner(MIGRATIONS[args.name], batch_size=args.batch_size,
+                                 rows_per_second=args.rate, dry_run=args.dry_run)
+        runner.run(restart=args.restart)
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        print("\n\n⚠️  Migration interrupted; run the same command again to resume from the last checkpoint")
+    except Exception as e:
+        print(f"\n\n❌ Unexpected error: {e}")
+        import traceback
+        traceback.print_exc()
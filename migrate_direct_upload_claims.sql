@@ -0,0 +1,17 @@
+-- Migration Script: One claim per direct upload
+-- A signed direct-upload result (website/media.py) verifies for
+-- DIRECT_UPLOAD_TTL_SECONDS after the upload. Recording each public_id when it
+-- is attached to a student means the same result can't be attached to a
+-- second student (or again after it was replaced and deleted) within that time.
+-- Rows older than the TTL are cleared by the next claim.
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS direct_upload_claim (
+    public_id VARCHAR(255) PRIMARY KEY,
+    claimed_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+CREATE INDEX IF NOT EXISTS idx_direct_upload_claim_claimed_at ON direct_upload_claim (claimed_at);
+
+COMMIT;
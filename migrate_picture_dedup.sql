@@ -0,0 +1,50 @@
+-- Migration Script: Content-addressed profile pictures
+-- Every picture uploaded through the app is hashed (BLAKE2b-256) while it
+-- streams in. picture_asset maps that hash to the Cloudinary asset holding
+-- those bytes, so the same photo uploaded again (a retry, an edit re-submitting
+-- the file, a bulk import) reuses the asset instead of being uploaded twice.
+--
+-- student.profile_pic_hash records which asset a student's picture is, and a
+-- trigger keeps picture_asset.ref_count equal to the number of students using
+-- it, whatever path changed or deleted the student (including cascades). The
+-- app deletes an asset from Cloudinary only once its count is back to zero.
+-- Enable with PICTURE_DEDUP_ENABLED=true after running this script.
+
+-- Step 1: Hash -> asset index
+CREATE TABLE IF NOT EXISTS picture_asset (
+    content_hash CHAR(64) PRIMARY KEY,
+    public_id VARCHAR(255) NOT NULL,
+    url TEXT NOT NULL,
+    bytes INTEGER,
+    ref_count INTEGER NOT NULL DEFAULT 0 CHECK (ref_count >= 0),
+    created_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_picture_asset_url ON picture_asset (url);
+CREATE INDEX IF NOT EXISTS idx_picture_asset_unreferenced ON picture_asset (created_at) WHERE ref_count = 0;
+
+-- Step 2: Which asset each student's picture is (NULL for pictures uploaded before
+-- this migration or straight from the browser; those are not shared)
+ALTER TABLE student ADD COLUMN IF NOT EXISTS profile_pic_hash CHAR(64) REFERENCES picture_asset (content_hash);
+CREATE INDEX IF NOT EXISTS idx_student_profile_pic_hash ON student (profile_pic_hash) WHERE profile_pic_hash IS NOT NULL;
+
+-- Step 3: Reference counts
+CREATE OR REPLACE FUNCTION count_picture_refs() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.profile_pic_hash IS NOT NULL THEN
+        UPDATE picture_asset SET ref_count = ref_count - 1 WHERE content_hash = OLD.profile_pic_hash;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.profile_pic_hash IS NOT NULL THEN
+        UPDATE picture_asset SET ref_count = ref_count + 1 WHERE content_hash = NEW.profile_pic_hash;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS student_picture_refs ON student;
+CREATE TRIGGER student_picture_refs
+AFTER INSERT OR DELETE OR UPDATE OF profile_pic_hash ON student
+FOR EACH ROW EXECUTE FUNCTION count_picture_refs();
+
+-- Verify the changes
+SELECT 'Migration completed successfully!' AS status;
@@ -0,0 +1,10 @@
+-- Migration Script: Keyset index for program student pages
+-- Program and college detail pages load each program's students a page at a
+-- time: WHERE program_code = $1 AND id > $2 ORDER BY id LIMIT $3. With
+-- (program_code, id) every page is one index range scan that stops after
+-- LIMIT rows, however deep into the program it starts.
+-- CONCURRENTLY: builds without blocking writes to student (run outside a transaction).
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_student_program_id ON student (program_code, id);
+
+ANALYZE student;
@@ -0,0 +1,108 @@
+-- Migration Script: Row versions and tombstones for delta sync (/api/changes)
+-- Every row of student, program and college carries the id of the transaction
+-- that last wrote it (row_version, a 64-bit transaction id, so it only grows)
+-- and an updated_at timestamp. Deleted keys leave a tombstone with the same
+-- fields. Requires PostgreSQL 13+ (pg_current_xact_id / pg_current_snapshot).
+--
+-- Transaction ids rather than a sequence are used so a reader can tell which
+-- versions are final: every version below pg_snapshot_xmin(pg_current_snapshot())
+-- belongs to a finished transaction, so no row can still appear behind it.
+
+-- Step 1: Columns (existing rows get this migration's transaction id)
+ALTER TABLE college ADD COLUMN IF NOT EXISTS row_version BIGINT NOT NULL DEFAULT pg_current_xact_id()::text::bigint;
+ALTER TABLE college ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ NOT NULL DEFAULT now();
+ALTER TABLE program ADD COLUMN IF NOT EXISTS row_version BIGINT NOT NULL DEFAULT pg_current_xact_id()::text::bigint;
+ALTER TABLE program ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ NOT NULL DEFAULT now();
+ALTER TABLE student ADD COLUMN IF NOT EXISTS row_version BIGINT NOT NULL DEFAULT pg_current_xact_id()::text::bigint;
+ALTER TABLE student ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ NOT NULL DEFAULT now();
+
+CREATE INDEX IF NOT EXISTS idx_college_row_version ON college (row_version, code);
+CREATE INDEX IF NOT EXISTS idx_program_row_version ON program (row_version, code);
+CREATE INDEX IF NOT EXISTS idx_student_row_version ON student (row_version, id);
+
+-- Step 2: Tombstones (at most one per key; removed again if the key is re-created)
+CREATE TABLE IF NOT EXISTS row_tombstone (
+    table_name VARCHAR(30) NOT NULL,
+    key VARCHAR(50) NOT NULL,
+    row_version BIGINT NOT NULL,
+    deleted_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    PRIMARY KEY (table_name, key)
+);
+
+CREATE INDEX IF NOT EXISTS idx_row_tombstone_version ON row_tombstone (row_version, table_name, key);
+
+-- Step 3: Trigger functions
+-- student's triggers pass its name as the argument: once student is partitioned
+-- (migrate_student_partitions.sql) row triggers fire with the partition's TG_TABLE_NAME
+CREATE OR REPLACE FUNCTION stamp_row_version() RETURNS trigger AS $$
+DECLARE
+    logical_table TEXT := COALESCE(TG_ARGV[0], TG_TABLE_NAME);
+    new_key TEXT := to_jsonb(NEW) ->> CASE WHEN logical_table = 'student' THEN 'id' ELSE 'code' END;
+    old_key TEXT;
+BEGIN
+    NEW.row_version := pg_current_xact_id()::text::bigint;
+    NEW.updated_at := now();
+
+    IF TG_OP = 'UPDATE' THEN
+        old_key := to_jsonb(OLD) ->> CASE WHEN logical_table = 'student' THEN 'id' ELSE 'code' END;
+        IF old_key <> new_key THEN
+            -- A renamed key is a delete of the old key for sync purposes
+            INSERT INTO row_tombstone (table_name, key, row_version)
+            VALUES (logical_table, old_key, NEW.row_version)
+            ON CONFLICT (table_name, key) DO UPDATE
+                SET row_version = EXCLUDED.row_version, deleted_at = now();
+        END IF;
+    END IF;
+
+    DELETE FROM row_tombstone WHERE table_name = logical_table AND key = new_key;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION record_tombstone() RETURNS trigger AS $$
+DECLARE
+    logical_table TEXT := COALESCE(TG_ARGV[0], TG_TABLE_NAME);
+BEGIN
+    INSERT INTO row_tombstone (table_name, key, row_version)
+    VALUES (logical_table,
+            to_jsonb(OLD) ->> CASE WHEN logical_table = 'student' THEN 'id' ELSE 'code' END,
+            pg_current_xact_id()::text::bigint)
+    ON CONFLICT (table_name, key) DO UPDATE
+        SET row_version = EXCLUDED.row_version, deleted_at = now();
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Step 4: Attach to each table
+DROP TRIGGER IF EXISTS student_stamp_version ON student;
+CREATE TRIGGER student_stamp_version
+BEFORE INSERT OR UPDATE ON student
+FOR EACH ROW EXECUTE FUNCTION stamp_row_version('student');
+
+DROP TRIGGER IF EXISTS student_tombstone ON student;
+CREATE TRIGGER student_tombstone
+AFTER DELETE ON student
+FOR EACH ROW EXECUTE FUNCTION record_tombstone('student');
+
+DROP TRIGGER IF EXISTS program_stamp_version ON program;
+CREATE TRIGGER program_stamp_version
+BEFORE INSERT OR UPDATE ON program
+FOR EACH ROW EXECUTE FUNCTION stamp_row_version();
+
+DROP TRIGGER IF EXISTS program_tombstone ON program;
+CREATE TRIGGER program_tombstone
+AFTER DELETE ON program
+FOR EACH ROW EXECUTE FUNCTION record_tombstone();
+
+DROP TRIGGER IF EXISTS college_stamp_version ON college;
+CREATE TRIGGER college_stamp_version
+BEFORE INSERT OR UPDATE ON college
+FOR EACH ROW EXECUTE FUNCTION stamp_row_version();
+
+DROP TRIGGER IF EXISTS college_tombstone ON college;
+CREATE TRIGGER college_tombstone
+AFTER DELETE ON college
+FOR EACH ROW EXECUTE FUNCTION record_tombstone();
+
+-- Verify the changes
+SELECT 'Migration completed successfully!' AS status;
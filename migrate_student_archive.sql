@@ -0,0 +1,114 @@
+-- Migration Script: Archive tier for graduated and inactive students
+-- student_archive holds students moved out of the live student table by the
+-- archive job (website/archive.py, flask archive-students). The move is one
+-- DELETE ... RETURNING feeding an INSERT, so it fires the usual student
+-- triggers: tombstones and notifications go out for the removed rows, the
+-- table version is bumped, and live caches, counts and the roster drop them.
+-- Archived rows are only read through the opt-in /api/archive/students search
+-- and can be moved back with a restore.
+--
+-- Requires migrate_student_partitions.sql (checked below). The picture
+-- reference count (migrate_picture_dedup.sql) and version counter
+-- (migrate_table_versions.sql) are installed only if those migrations ran;
+-- re-run this script after running either of them later. Re-running is safe.
+
+BEGIN;
+
+DO $$
+BEGIN
+    IF to_regproc('ensure_student_partition') IS NULL
+       OR (SELECT relkind FROM pg_class WHERE oid = 'student'::regclass) <> 'p' THEN
+        RAISE EXCEPTION 'Run migrate_student_partitions.sql before migrate_student_archive.sql';
+    END IF;
+END;
+$$;
+
+-- Step 1: Archive table (no foreign key to program: the archive outlives deleted programs).
+-- year and gender take student's column types (enums after migrate_student_enums.py)
+DO $$
+BEGIN
+    IF to_regclass('student_archive') IS NOT NULL THEN
+        RETURN;
+    END IF;
+    EXECUTE format($table$
+        CREATE TABLE student_archive (
+            id VARCHAR(10) PRIMARY KEY CHECK (id ~ '^[0-9]{4}-[0-9]{4}$'),
+            firstname VARCHAR(20) NOT NULL,
+            lastname VARCHAR(20) NOT NULL,
+            program_code VARCHAR(10) NOT NULL,
+            year %s NOT NULL,
+            gender %s NOT NULL,
+            profile_pic_url VARCHAR(255),
+            profile_pic_hash CHAR(64),
+            archive_reason VARCHAR(100) NOT NULL,
+            archived_at TIMESTAMPTZ NOT NULL DEFAULT now()
+        )$table$,
+        (SELECT format_type(atttypid, atttypmod) FROM pg_attribute WHERE attrelid = 'student'::regclass AND attname = 'year'),
+        (SELECT format_type(atttypid, atttypmod) FROM pg_attribute WHERE attrelid = 'student'::regclass AND attname = 'gender'));
+END;
+$$;
+
+CREATE INDEX IF NOT EXISTS idx_student_archive_archived_at ON student_archive (archived_at);
+
+-- Step 2: An archived student keeps its picture: it counts as a reference too
+-- (migrate_picture_dedup.sql)
+DO $$
+BEGIN
+    IF to_regclass('picture_asset') IS NULL OR to_regproc('count_picture_refs') IS NULL THEN
+        RAISE NOTICE 'picture_asset not found; archived pictures are not reference counted';
+        RETURN;
+    END IF;
+    IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = 'student_archive_profile_pic_hash_fkey') THEN
+        ALTER TABLE student_archive ADD CONSTRAINT student_archive_profile_pic_hash_fkey
+            FOREIGN KEY (profile_pic_hash) REFERENCES picture_asset(content_hash);
+    END IF;
+    DROP TRIGGER IF EXISTS student_archive_picture_refs ON student_archive;
+    CREATE TRIGGER student_archive_picture_refs
+    AFTER INSERT OR DELETE OR UPDATE OF profile_pic_hash ON student_archive
+    FOR EACH ROW EXECUTE FUNCTION count_picture_refs();
+END;
+$$;
+
+-- Step 3: Version counter, for caches of archive reads (migrate_table_versions.sql)
+DO $$
+BEGIN
+    IF to_regclass('table_version_delta') IS NULL OR to_regproc('bump_table_version') IS NULL THEN
+        RAISE NOTICE 'table_version not found; archive reads are not versioned';
+        RETURN;
+    END IF;
+    INSERT INTO table_version_delta (table_name, delta)
+    SELECT 'student_archive', 0
+    WHERE NOT EXISTS (SELECT 1 FROM table_version_delta WHERE table_name = 'student_archive');
+
+    DROP TRIGGER IF EXISTS student_archive_version_bump ON student_archive;
+    CREATE TRIGGER student_archive_version_bump
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON student_archive
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version();
+END;
+$$;
+
+-- Step 4: Never reissue an archived student's ID
+CREATE OR REPLACE FUNCTION generate_student_id(year_param INT DEFAULT NULL)
+RETURNS VARCHAR(10) AS $$
+DECLARE
+    target_year INT := COALESCE(year_param, EXTRACT(YEAR FROM CURRENT_DATE)::INT);
+    lower_bound TEXT := target_year || '-0000';
+    upper_bound TEXT := (target_year + 1) || '-0000';
+    last_id VARCHAR(10);
+BEGIN
+    PERFORM ensure_student_partition(target_year);
+
+    SELECT GREATEST(
+        (SELECT id FROM student WHERE id >= lower_bound AND id < upper_bound ORDER BY id DESC LIMIT 1),
+        (SELECT id FROM student_archive WHERE id >= lower_bound AND id < upper_bound ORDER BY id DESC LIMIT 1)
+    ) INTO last_id;
+
+    RETURN target_year || '-' || LPAD((COALESCE(SPLIT_PART(last_id, '-', 2)::INT, 0) + 1)::TEXT, 4, '0');
+END;
+$$ LANGUAGE plpgsql;
+
+COMMIT;
+
+-- Verify
+SELECT (SELECT COUNT(*) FROM student) AS live_students,
+       (SELECT COUNT(*) FROM student_archive) AS archived_students;
@@ -0,0 +1,186 @@
+"""
+Migration Script: Store student year level and gender as Postgres enums
+
+This script:
+1. Measures the student table/index size and filter latency
+2. Creates the year_level and gender_type enum types
+3. Converts student.year / student.gender to those types (4 bytes per value
+   instead of a length-prefixed string)
+4. Adds composite indexes for the common program/year/gender filters
+5. Measures again and prints the difference
+
+Labels are unchanged, so forms and templates keep working with '3rd Year' etc.
+"""
+
+from website.database import DatabaseManager
+from website.models.studentModels import StudentModel
+import time
+
+FILTER_RUNS = 200
+
+def sql_labels(labels):
+    return ", ".join("'" + label.replace("'", "''") + "'" for label in labels)
+
+def measure(label):
+    """Return table/index sizes and average latency of a typical filter"""
+    print("\n" + "="*80)
+    print(f"MEASURE: {label}")
+    print("="*80)
+
+    try:
+        with DatabaseManager.get_cursor() as (cur, conn):
+            cur.execute("ANALYZE student")
+            cur.execute("""
+                SELECT pg_relation_size('student') AS table_bytes,
+                       pg_indexes_size('student') AS index_bytes,
+                       pg_total_relation_size('student') AS total_bytes
+            """)
+            sizes = dict(cur.fetchone())
+
+            cur.execute("SELECT program_code, year, gender FROM student LIMIT 1")
+            sample = cur.fetchone()
+            if sample is None:
+                sizes['filter_ms'] = 0.0
+            else:
+                start = time.perf_counter()
+                for _ in range(FILTER_RUNS):
+                    cur.execute(
+                        "SELECT COUNT(*) FROM student WHERE program_code = %s AND year = %s AND gender = %s",
+                        (sample['program_code'], sample['year'], sample['gender'])
+                    )
+                    cur.fetchone()
+                sizes['filter_ms'] = (time.perf_counter() - start) * 1000 / FILTER_RUNS
+
+        print(f"  Table size : {sizes['table_bytes']:>10,} bytes")
+        print(f"  Index size : {sizes['index_bytes']:>10,} bytes")
+        print(f"  Total size : {sizes['total_bytes']:>10,} bytes")
+        print(f"  Filter avg : {sizes['filter_ms']:>10.3f} ms (program + year + gender, {FILTER_RUNS} runs)")
+        return sizes
+    except Exception as e:
+        print(f"❌ Error measuring: {e}")
+        return None
+
+def create_enum_types():
+    """Create the enum types if they don't exist yet"""
+    print("\n" + "="*80)
+    print("STEP 1: Creating Enum Types")
+    print("="*80)
+
+    try:
+        with DatabaseManager.get_cursor() as (cur, conn):
+            for type_name, labels in (("year_level", StudentModel.YEAR_LEVELS), ("gender_type", StudentModel.GENDERS)):
+                cur.execute("SELECT 1 FROM pg_type WHERE typname = %s", (type_name,))
+                if cur.fetchone():
+                    print(f"✅ Type '{type_name}' already exists")
+                    continue
+                cur.execute(f"CREATE TYPE {type_name} AS ENUM ({sql_labels(labels)})")
+                print(f"✅ Type '{type_name}' created: {', '.join(labels)}")
+        return True
+    except Exception as e:
+        print(f"❌ Error creating enum types: {e}")
+        return False
+
+def convert_columns():
+    """Normalize existing values and convert the columns in one rewrite"""
+    print("\n" + "="*80)
+    print("STEP 2: Converting student.year and student.gender")
+    print("="*80)
+
+    try:
+        with DatabaseManager.get_cursor() as (cur, conn):
+            cur.execute("""
+                SELECT data_type, udt_name FROM information_schema.columns
+                WHERE table_name = 'student' AND column_name = 'year'
+            """)
+            column = cur.fetchone()
+            if column and column['udt_name'] == 'year_level':
+                print("✅ Columns already converted")
+                return True
+
+            # Fix stray whitespace/case so every value maps onto a label
+            cur.execute("UPDATE student SET year = TRIM(year), gender = INITCAP(TRIM(gender))")
+
+            cur.execute(f"""
+                SELECT COUNT(*) AS bad FROM student
+                WHERE year NOT IN ({sql_labels(StudentModel.YEAR_LEVELS)})
+                   OR gender NOT IN ({sql_labels(StudentModel.GENDERS)})
+            """)
+            bad = cur.fetchone()['bad']
+            if bad:
+                print(f"❌ {bad} students have a year level or gender outside the allowed labels")
+                raise ValueError("unmapped values")
+
+            cur.execute("""
+                ALTER TABLE student
+                    ALTER COLUMN year TYPE year_level USING year::year_level,
+                    ALTER COLUMN gender TYPE gender_type USING gender::gender_type
+            """)
+            print("✅ Columns converted")
+        return True
+    except Exception as e:
+        print(f"❌ Error converting columns: {e}")
+        return False
+
+def create_indexes():
+    """Composite indexes for the filters the app and analytics use"""
+    print("\n" + "="*80)
+    print("STEP 3: Creating Composite Indexes")
+    print("="*80)
+
+    indexes = {
+        "idx_student_program_year_gender": "student (program_code, year, gender)",
+        "idx_student_year_gender": "student (year, gender)",
+    }
+    try:
+        with DatabaseManager.get_cursor() as (cur, conn):
+            for name, definition in indexes.items():
+                cur.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {definition}")
+                print(f"✅ Index {name} on {definition}")
+        return True
+    except Exception as e:
+        print(f"❌ Error creating indexes: {e}")
+        return False
+
+def main():
+    """Run all migration steps"""
+    print("\n" + "="*80)
+    print("STUDENT ENUM MIGRATION")
+    print("From: VARCHAR year/gender → To: year_level / gender_type enums")
+    print("="*80)
+
+    before = measure("before")
+
+    if not create_enum_types():
+        print("\n❌ Migration failed at step 1")
+        return False
+
+    if not convert_columns():
+        print("\n❌ Migration failed at step 2")
+        return False
+
+    if not create_indexes():
+        print("\n❌ Migration failed at step 3")
+        return False
+
+    after = measure("after")
+
+    print("\n" + "="*80)
+    print("✅ MIGRATION COMPLETED SUCCESSFULLY!")
+    print("="*80)
+    if before and after:
+        print("Summary (after vs before):")
+        print(f"  • Table size : {before['table_bytes']:,} → {after['table_bytes']:,} bytes")
+        print(f"  • Index size : {before['index_bytes']:,} → {after['index_bytes']:,} bytes (includes new indexes)")
+        print(f"  • Filter avg : {before['filter_ms']:.3f} → {after['filter_ms']:.3f} ms")
+    print("="*80)
+    return True
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        print("\n\n⚠️  Migration interrupted by user")
+    except Exception as e:
+        print(f"\n\n❌ Unexpected error: {e}")
+        import traceback
+        traceback.print_exc()
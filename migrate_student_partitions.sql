@@ -0,0 +1,249 @@
+-- Migration Script: Partition student by enrollment year
+-- Student IDs are YYYY-NNNN, so the enrollment year is the ID prefix and
+-- student becomes RANGE-partitioned on id itself, one partition per year
+-- (student_y2024 holds '2024-0000' <= id < '2025-0000'). The primary key stays
+-- (id), so uniqueness is still enforced across years, and every index below is
+-- created per partition. A query bounding id to a year range - the next ID for
+-- a year, a cohort filter in analytics - only touches that year's partition,
+-- and an old year can be detached (ALTER TABLE student DETACH PARTITION
+-- student_y2015 CONCURRENTLY) or dropped without a bulk DELETE.
+--
+-- generate_student_id() creates the partition for a year the first time an ID
+-- is issued in it (ensure_student_partition()); this script also creates one
+-- for the current and the next year.
+--
+-- Only the base schema (SSIS_postgres.sql) is required. The rebuilt table gets
+-- back exactly the triggers the old one had, and the keys and indexes whose
+-- columns and referenced tables exist, so opt-in migrations
+-- (migrate_picture_dedup.sql, migrate_row_versions.sql, ...) that were never
+-- run stay off; run any of them later as usual. The table is rewritten in one
+-- transaction under an exclusive lock: schedule it for a quiet moment.
+-- Re-running it is a no-op.
+
+BEGIN;
+
+-- Step 1: Row triggers fire on the partition (TG_TABLE_NAME = 'student_y2024'),
+-- so the student triggers pass the logical table name as their argument
+CREATE OR REPLACE FUNCTION notify_row_change() RETURNS trigger AS $$
+DECLARE
+    logical_table TEXT := COALESCE(TG_ARGV[0], TG_TABLE_NAME);
+    new_key TEXT;
+    old_key TEXT;
+BEGIN
+    IF logical_table = 'student' THEN
+        IF TG_OP <> 'DELETE' THEN new_key := NEW.id; END IF;
+        IF TG_OP <> 'INSERT' THEN old_key := OLD.id; END IF;
+    ELSE
+        IF TG_OP <> 'DELETE' THEN new_key := NEW.code; END IF;
+        IF TG_OP <> 'INSERT' THEN old_key := OLD.code; END IF;
+    END IF;
+
+    PERFORM pg_notify('ssis_changes', json_build_object(
+        'table', logical_table,
+        'op', TG_OP,
+        'key', COALESCE(new_key, old_key),
+        'old_key', old_key,
+        'row', CASE WHEN TG_OP = 'DELETE' THEN NULL ELSE row_to_json(NEW) END,
+        'old_row', CASE WHEN TG_OP = 'INSERT' THEN NULL ELSE row_to_json(OLD) END
+    )::text);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION stamp_row_version() RETURNS trigger AS $$
+DECLARE
+    logical_table TEXT := COALESCE(TG_ARGV[0], TG_TABLE_NAME);
+    new_key TEXT := to_jsonb(NEW) ->> CASE WHEN logical_table = 'student' THEN 'id' ELSE 'code' END;
+    old_key TEXT;
+BEGIN
+    NEW.row_version := pg_current_xact_id()::text::bigint;
+    NEW.updated_at := now();
+
+    IF TG_OP = 'UPDATE' THEN
+        old_key := to_jsonb(OLD) ->> CASE WHEN logical_table = 'student' THEN 'id' ELSE 'code' END;
+        IF old_key <> new_key THEN
+            -- A renamed key is a delete of the old key for sync purposes
+            INSERT INTO row_tombstone (table_name, key, row_version)
+            VALUES (logical_table, old_key, NEW.row_version)
+            ON CONFLICT (table_name, key) DO UPDATE
+                SET row_version = EXCLUDED.row_version, deleted_at = now();
+        END IF;
+    END IF;
+
+    DELETE FROM row_tombstone WHERE table_name = logical_table AND key = new_key;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION record_tombstone() RETURNS trigger AS $$
+DECLARE
+    logical_table TEXT := COALESCE(TG_ARGV[0], TG_TABLE_NAME);
+BEGIN
+    INSERT INTO row_tombstone (table_name, key, row_version)
+    VALUES (logical_table,
+            to_jsonb(OLD) ->> CASE WHEN logical_table = 'student' THEN 'id' ELSE 'code' END,
+            pg_current_xact_id()::text::bigint)
+    ON CONFLICT (table_name, key) DO UPDATE
+        SET row_version = EXCLUDED.row_version, deleted_at = now();
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Step 2: One partition per enrollment year, created on demand. The table is
+-- built detached and then attached, which locks student only against DDL, not
+-- against reads and writes (CREATE TABLE ... PARTITION OF would block both)
+CREATE OR REPLACE FUNCTION ensure_student_partition(target_year INT) RETURNS TEXT AS $$
+DECLARE
+    partition_name TEXT := format('student_y%s', target_year);
+    lower_bound TEXT := format('%s-0000', target_year);
+    upper_bound TEXT := format('%s-0000', target_year + 1);
+BEGIN
+    IF target_year NOT BETWEEN 1000 AND 9998 THEN
+        RAISE EXCEPTION 'Invalid enrollment year %', target_year;
+    END IF;
+    IF to_regclass(partition_name) IS NOT NULL THEN
+        RETURN partition_name;
+    END IF;
+
+    -- Two sessions issuing the first ID of a year: the second waits, then finds it
+    PERFORM pg_advisory_xact_lock(hashtext('ensure_student_partition'), target_year);
+    IF to_regclass(partition_name) IS NOT NULL THEN
+        RETURN partition_name;
+    END IF;
+
+    EXECUTE format('CREATE TABLE %I (LIKE student INCLUDING DEFAULTS INCLUDING CONSTRAINTS)', partition_name);
+    -- Matches the partition bound, so ATTACH needn't scan the table to check it
+    EXECUTE format('ALTER TABLE %I ADD CONSTRAINT %I CHECK (id >= %L AND id < %L)',
+                   partition_name, partition_name || '_bound', lower_bound, upper_bound);
+    EXECUTE format('ALTER TABLE student ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)',
+                   partition_name, lower_bound, upper_bound);
+    RAISE NOTICE 'Created partition % for enrollment year %', partition_name, target_year;
+    RETURN partition_name;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Step 3: Next ID from that year's partition only: an id range (not LIKE, which
+-- the planner can't prune with) and one step down the partition's primary key
+CREATE OR REPLACE FUNCTION generate_student_id(year_param INT DEFAULT NULL)
+RETURNS VARCHAR(10) AS $$
+DECLARE
+    target_year INT := COALESCE(year_param, EXTRACT(YEAR FROM CURRENT_DATE)::INT);
+    last_id VARCHAR(10);
+BEGIN
+    PERFORM ensure_student_partition(target_year);
+
+    SELECT id INTO last_id
+    FROM student
+    WHERE id >= target_year || '-0000' AND id < (target_year + 1) || '-0000'
+    ORDER BY id DESC
+    LIMIT 1;
+
+    RETURN target_year || '-' || LPAD((COALESCE(SPLIT_PART(last_id, '-', 2)::INT, 0) + 1)::TEXT, 4, '0');
+END;
+$$ LANGUAGE plpgsql;
+
+-- Step 4: Rebuild student as a partitioned table
+DO $$
+DECLARE
+    enrollment_year INT;
+    old_triggers TEXT[];
+BEGIN
+    IF (SELECT relkind FROM pg_class WHERE oid = 'student'::regclass) = 'p' THEN
+        RAISE NOTICE 'student is already partitioned';
+        RETURN;
+    END IF;
+
+    LOCK TABLE student IN ACCESS EXCLUSIVE MODE;
+
+    -- Triggers installed by earlier migrations; only these are recreated below
+    SELECT COALESCE(array_agg(tgname::TEXT), '{}') INTO old_triggers
+    FROM pg_trigger WHERE tgrelid = 'student'::regclass AND NOT tgisinternal;
+
+    -- Same columns, defaults and CHECKs; indexes, keys and triggers are added after the copy
+    CREATE TABLE student_partitioned (LIKE student INCLUDING DEFAULTS INCLUDING CONSTRAINTS)
+        PARTITION BY RANGE (id);
+
+    FOR enrollment_year IN
+        SELECT DISTINCT left(id, 4)::INT FROM student
+        UNION SELECT EXTRACT(YEAR FROM CURRENT_DATE)::INT
+        UNION SELECT EXTRACT(YEAR FROM CURRENT_DATE)::INT + 1
+        ORDER BY 1
+    LOOP
+        EXECUTE format('CREATE TABLE %I PARTITION OF student_partitioned FOR VALUES FROM (%L) TO (%L)',
+                       format('student_y%s', enrollment_year),
+                       format('%s-0000', enrollment_year), format('%s-0000', enrollment_year + 1));
+    END LOOP;
+
+    -- No triggers yet: rows keep their row_version and no notifications or tombstones are sent
+    INSERT INTO student_partitioned SELECT * FROM student;
+
+    DROP TABLE student;
+    ALTER TABLE student_partitioned RENAME TO student;
+
+    -- Keys and indexes (each is created on every partition)
+    ALTER TABLE student ADD CONSTRAINT student_pkey PRIMARY KEY (id);
+    ALTER TABLE student ADD CONSTRAINT student_program_code_fkey
+        FOREIGN KEY (program_code) REFERENCES program(code) ON DELETE CASCADE;
+
+    CREATE INDEX idx_student_program_year_gender ON student (program_code, year, gender);
+    CREATE INDEX idx_student_year_gender ON student (year, gender);
+    CREATE INDEX idx_student_program_id ON student (program_code, id);
+
+    -- migrate_row_versions.sql
+    IF EXISTS (SELECT 1 FROM pg_attribute WHERE attrelid = 'student'::regclass AND attname = 'row_version' AND NOT attisdropped) THEN
+        CREATE INDEX idx_student_row_version ON student (row_version, id);
+    END IF;
+
+    -- migrate_picture_dedup.sql
+    IF EXISTS (SELECT 1 FROM pg_attribute WHERE attrelid = 'student'::regclass AND attname = 'profile_pic_hash' AND NOT attisdropped) THEN
+        CREATE INDEX idx_student_profile_pic_hash ON student (profile_pic_hash) WHERE profile_pic_hash IS NOT NULL;
+        IF to_regclass('picture_asset') IS NOT NULL THEN
+            ALTER TABLE student ADD CONSTRAINT student_profile_pic_hash_fkey
+                FOREIGN KEY (profile_pic_hash) REFERENCES picture_asset(content_hash);
+        END IF;
+    END IF;
+
+    -- Triggers (row triggers are cloned onto each partition, present and future)
+    IF 'student_stamp_version' = ANY(old_triggers) THEN
+        CREATE TRIGGER student_stamp_version
+        BEFORE INSERT OR UPDATE ON student
+        FOR EACH ROW EXECUTE FUNCTION stamp_row_version('student');
+    END IF;
+
+    IF 'student_tombstone' = ANY(old_triggers) THEN
+        CREATE TRIGGER student_tombstone
+        AFTER DELETE ON student
+        FOR EACH ROW EXECUTE FUNCTION record_tombstone('student');
+    END IF;
+
+    IF 'student_notify_change' = ANY(old_triggers) THEN
+        CREATE TRIGGER student_notify_change
+        AFTER INSERT OR UPDATE OR DELETE ON student
+        FOR EACH ROW EXECUTE FUNCTION notify_row_change('student');
+    END IF;
+
+    IF 'student_picture_refs' = ANY(old_triggers) THEN
+        CREATE TRIGGER student_picture_refs
+        AFTER INSERT OR DELETE OR UPDATE OF profile_pic_hash ON student
+        FOR EACH ROW EXECUTE FUNCTION count_picture_refs();
+    END IF;
+
+    IF 'student_version_bump' = ANY(old_triggers) THEN
+        CREATE TRIGGER student_version_bump
+        AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON student
+        FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version();
+    END IF;
+END;
+$$;
+
+ANALYZE student;
+
+COMMIT;
+
+-- Verify
+SELECT partition.relname AS partition, pg_get_expr(partition.relpartbound, partition.oid) AS bound,
+       (SELECT COUNT(*) FROM student WHERE tableoid = partition.oid) AS students
+FROM pg_inherits
+JOIN pg_class partition ON partition.oid = pg_inherits.inhrelid
+WHERE pg_inherits.inhparent = 'student'::regclass
+ORDER BY partition.relname;
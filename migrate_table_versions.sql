@@ -0,0 +1,87 @@
+-- Migration Script: Per-table version counters
+-- Every statement that changes student, program or college bumps that table's
+-- version. Caches (e.g. the enrollment analytics endpoint) key their entries on
+-- these versions, so a cached result is reused only while the data is unchanged.
+--
+-- A version is the sum of the table's rows in table_version_delta. A bump
+-- inserts a +1 row instead of updating one counter row, so concurrent writers
+-- never wait on each other's bump (an UPDATE of a single hot row would be
+-- locked until commit and serialize every writer of the table). Unlike a
+-- sequence, the insert is transactional: the version changes exactly when the
+-- write commits, so a reader can't see the new version alongside the old data.
+-- Re-running is safe; a table_version table from an earlier run is converted.
+
+BEGIN;
+
+-- Step 1: Version deltas, summed by the table_version view
+CREATE TABLE IF NOT EXISTS table_version_delta (
+    table_name VARCHAR(30) NOT NULL,
+    delta BIGINT NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_table_version_delta_table ON table_version_delta (table_name);
+
+DO $$
+BEGIN
+    IF (SELECT relkind FROM pg_class WHERE oid = to_regclass('table_version')) = 'r' THEN
+        -- Carry the counters over, so versions keep growing
+        INSERT INTO table_version_delta (table_name, delta)
+        SELECT table_name, version FROM table_version;
+        DROP TABLE table_version;
+    END IF;
+END;
+$$;
+
+CREATE OR REPLACE VIEW table_version AS
+SELECT table_name, SUM(delta)::BIGINT AS version
+FROM table_version_delta
+GROUP BY table_name;
+
+INSERT INTO table_version_delta (table_name, delta)
+SELECT tracked.table_name, 0
+FROM (VALUES ('student'), ('program'), ('college')) AS tracked (table_name)
+WHERE NOT EXISTS (SELECT 1 FROM table_version_delta WHERE table_version_delta.table_name = tracked.table_name);
+
+-- Step 2: Statement-level trigger function (one bump per statement, not per row).
+-- Deltas are folded into one row by whichever writer gets the advisory lock; the
+-- others skip it rather than wait, and nobody else deletes these rows, so the
+-- fold never blocks. TG_ARGV[0] overrides the table name (see
+-- migrate_student_partitions.sql)
+CREATE OR REPLACE FUNCTION bump_table_version() RETURNS trigger AS $$
+DECLARE
+    logical_table TEXT := COALESCE(TG_ARGV[0], TG_TABLE_NAME);
+BEGIN
+    INSERT INTO table_version_delta (table_name, delta) VALUES (logical_table, 1);
+
+    IF pg_try_advisory_xact_lock(hashtext('table_version_delta'), hashtext(logical_table)) THEN
+        WITH folded AS (
+            DELETE FROM table_version_delta WHERE table_name = logical_table
+            RETURNING delta
+        )
+        INSERT INTO table_version_delta (table_name, delta)
+        SELECT logical_table, SUM(delta) FROM folded HAVING COUNT(*) > 0;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Step 3: Attach to each table
+DROP TRIGGER IF EXISTS student_version_bump ON student;
+CREATE TRIGGER student_version_bump
+AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON student
+FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version();
+
+DROP TRIGGER IF EXISTS program_version_bump ON program;
+CREATE TRIGGER program_version_bump
+AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON program
+FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version();
+
+DROP TRIGGER IF EXISTS college_version_bump ON college;
+CREATE TRIGGER college_version_bump
+AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON college
+FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version();
+
+COMMIT;
+
+-- Verify the changes
+SELECT 'Migration completed successfully!' AS status;
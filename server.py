@@ -0,0 +1,110 @@
+"""
+SSIS Production Server
+
+This module is both a gunicorn config file and a small CLI around it.
+
+    python server.py --workers 4 --threads 4      # start (execs gunicorn -c server.py wsgi:app)
+    python server.py reload                       # graceful reload: new workers, then old ones drain
+                                                  # (code is preloaded; restart to deploy new code)
+    python server.py stop                         # graceful shutdown
+
+    gunicorn -c server.py wsgi:app                # equivalent to the first command
+
+Every setting can also come from the environment (SSIS_WORKERS, SSIS_THREADS, ...).
+The app is preloaded in the master, warmed up (templates compiled, program and
+college caches filled) before any worker is forked, and each worker re-creates
+its Postgres pool and Cloudinary HTTP client after fork.
+"""
+import argparse
+import multiprocessing
+import os
+import signal
+import sys
+
+# ---------------------------------------------------------------------------
+# gunicorn settings
+# ---------------------------------------------------------------------------
+bind = os.environ.get('SSIS_BIND', '0.0.0.0:8000')
+workers = int(os.environ.get('SSIS_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.environ.get('SSIS_THREADS', '4'))
+worker_class = 'gthread'
+preload_app = True
+
+# Recycle workers periodically; jitter keeps them from restarting all at once
+max_requests = int(os.environ.get('SSIS_MAX_REQUESTS', '1000'))
+max_requests_jitter = int(os.environ.get('SSIS_MAX_REQUESTS_JITTER', '100'))
+
+timeout = int(os.environ.get('SSIS_TIMEOUT', '60'))
+graceful_timeout = int(os.environ.get('SSIS_GRACEFUL_TIMEOUT', '30'))
+keepalive = int(os.environ.get('SSIS_KEEPALIVE', '5'))
+
+pidfile = os.environ.get('SSIS_PIDFILE', '/tmp/ssis-gunicorn.pid')
+accesslog = os.environ.get('SSIS_ACCESS_LOG', '-')
+errorlog = os.environ.get('SSIS_ERROR_LOG', '-')
+
+# ---------------------------------------------------------------------------
+# gunicorn server hooks
+# ---------------------------------------------------------------------------
+def when_ready(server):
+    """Runs in the master after the preloaded app is loaded, before forking"""
+    from website.lifecycle import warm_up
+
+    warm_up(server.app.wsgi())
+    server.log.info("SSIS ready: %s workers x %s threads on %s", workers, threads, bind)
+
+def post_fork(server, worker):
+    """Runs in each worker right after fork, before it accepts connections"""
+    from website.lifecycle import reinit_after_fork
+
+    reinit_after_fork()
+    server.log.info("Worker %s initialised", worker.pid)
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+def signal_master(sig):
+    try:
+        with open(pidfile) as f:
+            pid = int(f.read().strip())
+    except (OSError, ValueError):
+        print(f"❌ No running server found (pidfile {pidfile})")
+        return False
+    os.kill(pid, sig)
+    return True
+
+def main():
+    parser = argparse.ArgumentParser(description="Run SSIS under gunicorn")
+    parser.add_argument("command", nargs="?", choices=["start", "reload", "stop"], default="start")
+    parser.add_argument("--bind", help=f"Address to listen on (default {bind})")
+    parser.add_argument("--workers", type=int, help=f"Worker processes (default {workers})")
+    parser.add_argument("--threads", type=int, help=f"Threads per worker (default {threads})")
+    parser.add_argument("--max-requests", type=int, help=f"Recycle a worker after N requests (default {max_requests})")
+    parser.add_argument("--timeout", type=int, help=f"Worker timeout in seconds (default {timeout})")
+    args = parser.parse_args()
+
+    if args.command == "reload":
+        if signal_master(signal.SIGHUP):
+            print("🔄 Graceful reload requested")
+        return
+    if args.command == "stop":
+        if signal_master(signal.SIGTERM):
+            print("🛑 Graceful shutdown requested")
+        return
+
+    overrides = {
+        'SSIS_BIND': args.bind,
+        'SSIS_WORKERS': args.workers,
+        'SSIS_THREADS': args.threads,
+        'SSIS_MAX_REQUESTS': args.max_requests,
+        'SSIS_TIMEOUT': args.timeout,
+    }
+    for key, value in overrides.items():
+        if value is not None:
+            os.environ[key] = str(value)
+
+    config_path = os.path.abspath(__file__)
+    os.chdir(os.path.dirname(config_path))
+    os.execvp(sys.executable, [sys.executable, "-m", "gunicorn", "-c", config_path, "wsgi:app"])
+
+if __name__ == "__main__":
+    main()
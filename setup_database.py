@@ -140,8 +140,22 @@ def setup_schema():
             cursor.execute(sql_commands)
         
         conn.commit()
+
+        # A student table from before the enum types keeps its VARCHAR columns
+        # (CREATE TABLE IF NOT EXISTS skips it); convert it like a fresh one
+        cursor.execute("""
+            SELECT udt_name FROM information_schema.columns
+            WHERE table_name = 'student' AND column_name = 'year'
+        """)
+        year_type = cursor.fetchone()
         cursor.close()
         conn.close()
+
+        if year_type and year_type[0] != 'year_level':
+            print("📝 Existing student table uses VARCHAR year/gender; converting to enums...")
+            import migrate_student_enums
+            if not (migrate_student_enums.convert_columns() and migrate_student_enums.create_indexes()):
+                return False
         
         print("✅ Database schema created successfully!")
         return True
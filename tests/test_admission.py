@@ -0,0 +1,165 @@
+import threading
+import time
+
+import pytest
+
+from config import Config
+from website import admission
+from website.admission import AdmissionGate, TokenBuckets, classify
+
+@pytest.fixture
+def config(monkeypatch):
+    """Set Config attributes for one test and rebuild the gates from them"""
+    def set_config(**settings):
+        for name, value in settings.items():
+            monkeypatch.setattr(Config, name, value)
+        admission.configure()
+    yield set_config
+    monkeypatch.undo()
+    admission.configure()
+
+def upload_view():
+    pass
+upload_view._accepts_uploads = True
+
+@pytest.mark.parametrize('endpoint, method, view, expected', [
+    (None, 'GET', None, None),
+    ('static', 'GET', None, None),
+    ('suggest.suggest', 'GET', None, None),
+    ('students.student_rows', 'GET', None, None),
+    ('students.index', 'GET', None, 'read'),
+    ('students.index', 'HEAD', None, 'read'),
+    ('students.api_students', 'GET', None, 'export'),
+    ('students.delete_student', 'DELETE', None, 'write'),
+    ('students.add_student', 'POST', None, 'write'),
+    ('students.add_student', 'POST', upload_view, 'upload'),
+])
+def test_classify(endpoint, method, view, expected):
+    assert classify(endpoint, method, view) == expected
+
+def test_gate_admits_up_to_limit_then_refuses_when_queue_full():
+    gate = AdmissionGate('read', limit=2, max_queue=0)
+
+    assert gate.enter(0.1) is None
+    assert gate.enter(0.1) is None
+    assert gate.enter(0.1) == 'queue_full'
+    gate.leave()
+    assert gate.enter(0.1) is None
+    assert gate.snapshot()['rejected'] == {'queue_full': 1}
+
+def test_gate_queue_times_out():
+    gate = AdmissionGate('read', limit=1, max_queue=1)
+    gate.enter(0)
+
+    started = time.monotonic()
+    assert gate.enter(0.05) == 'queue_timeout'
+    assert time.monotonic() - started >= 0.05
+    snapshot = gate.snapshot()
+    assert snapshot['queued'] == 0
+    assert snapshot['rejected'] == {'queue_timeout': 1}
+
+def test_gate_admits_queued_requests_in_arrival_order():
+    gate = AdmissionGate('write', limit=1, max_queue=3)
+    gate.enter(0)
+    order = []
+
+    def request(number):
+        assert gate.enter(5) is None
+        order.append(number)
+        gate.leave()
+
+    threads = []
+    for number in range(3):
+        thread = threading.Thread(target=request, args=(number,))
+        thread.start()
+        threads.append(thread)
+        # Wait until it is queued, so arrival order is fixed
+        while gate.snapshot()['queued'] <= number:
+            time.sleep(0.001)
+    gate.leave()
+    for thread in threads:
+        thread.join(5)
+
+    assert order == [0, 1, 2]
+    snapshot = gate.snapshot()
+    assert snapshot['active'] == 0
+    assert snapshot['queued_total'] == 3
+    assert snapshot['peak_queued'] == 3
+
+def test_token_bucket_allows_burst_then_reports_wait(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(admission.time, 'monotonic', lambda: now[0])
+    buckets = TokenBuckets(rate=0.5, burst=2)
+
+    assert buckets.take('a') == 0
+    assert buckets.take('a') == 0
+    assert buckets.take('a') == pytest.approx(2.0)
+    assert buckets.take('b') == 0
+    now[0] += 1
+    assert buckets.take('a') == pytest.approx(1.0)
+    now[0] += 1
+    assert buckets.take('a') == 0
+    assert buckets.snapshot()['rate_limited'] == 2
+
+def test_token_bucket_refund(monkeypatch):
+    monkeypatch.setattr(admission.time, 'monotonic', lambda: 100.0)
+    buckets = TokenBuckets(rate=0.5, burst=1)
+
+    assert buckets.take('a') == 0
+    buckets.refund('a')
+    assert buckets.take('a') == 0
+    assert buckets.take('a') > 0
+    buckets.refund('a')
+    buckets.refund('a')
+    assert buckets._buckets['a'][0] == 1
+
+def test_forget_idle_drops_full_buckets(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(admission.time, 'monotonic', lambda: now[0])
+    monkeypatch.setattr(TokenBuckets, 'MAX_CLIENTS', 2)
+    buckets = TokenBuckets(rate=1, burst=1)
+    buckets.take('a')
+    buckets.take('b')
+    now[0] += 5
+    buckets.take('c')
+
+    assert set(buckets._buckets) == {'c'}
+
+def test_admit_refunds_upload_token_when_gate_refuses(config):
+    config(ADMISSION_CONTROL_ENABLED=True, ADMISSION_UPLOAD_LIMIT=1, ADMISSION_QUEUE_SIZE=0,
+           UPLOAD_RATE_PER_MINUTE=60, UPLOAD_RATE_BURST=1)
+
+    gate, refusal = admission.admit('upload', 'other client')
+    assert refusal is None
+
+    _, refusal = admission.admit('upload', 'client')
+    assert (refusal.status_code, refusal.reason) == (503, 'queue_full')
+    gate.leave()
+
+    # The refused upload didn't spend the client's only token
+    gate, refusal = admission.admit('upload', 'client')
+    assert refusal is None
+    gate.leave()
+    _, refusal = admission.admit('upload', 'client')
+    assert (refusal.status_code, refusal.reason) == (429, 'rate_limited')
+
+def test_admit_without_gate(config):
+    config(ADMISSION_CONTROL_ENABLED=False)
+
+    assert admission.admit('read', 'client') == (None, None)
+
+def test_capacity_warnings(config):
+    config(ADMISSION_CONTROL_ENABLED=True, ADMISSION_READ_LIMIT=3, ADMISSION_WRITE_LIMIT=2,
+           ADMISSION_UPLOAD_LIMIT=1, ADMISSION_EXPORT_LIMIT=1, DB_POOL_MAX_SIZE=10)
+    assert admission.capacity_warnings(4) == []
+
+    config(DB_POOL_MAX_SIZE=6)
+    warnings = admission.capacity_warnings()
+    assert len(warnings) == 1
+    assert 'add up to 7 but DB_POOL_MAX_SIZE is 6' in warnings[0]
+
+    config(DB_POOL_MAX_SIZE=10)
+    warnings = admission.capacity_warnings('2')
+    assert len(warnings) == 2
+    assert warnings[0].startswith('ADMISSION_READ_LIMIT=3')
+    assert warnings[1].startswith('ADMISSION_WRITE_LIMIT=2')
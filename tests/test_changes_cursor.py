@@ -0,0 +1,29 @@
+import pytest
+
+from website.models.changesModels import ChangesModel
+
+def test_cursor_round_trip():
+    token = ChangesModel.encode_cursor(42, 'student', '2024-0001')
+
+    assert '=' not in token
+    assert ChangesModel.decode_since(token) == (42, 'student', '2024-0001')
+
+def test_cursor_is_url_safe():
+    token = ChangesModel.encode_cursor(2 ** 40, 'program', '??>>~~')
+
+    assert set(token) <= set('ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_')
+    assert ChangesModel.decode_since(token) == (2 ** 40, 'program', '??>>~~')
+
+@pytest.mark.parametrize('since, expected', [
+    (None, (0, None, None)),
+    ('', (0, None, None)),
+    ('0', (0, None, None)),
+    (' 17 ', (17, None, None)),
+])
+def test_plain_version_resumes_after_all_of_it(since, expected):
+    assert ChangesModel.decode_since(since) == expected
+
+@pytest.mark.parametrize('token', ['not a token', '-12', 'e30', 'WzEsMl0'])
+def test_invalid_tokens_raise_value_error(token):
+    with pytest.raises(ValueError):
+        ChangesModel.decode_since(token)
@@ -0,0 +1,78 @@
+import gzip
+
+import pytest
+from flask import Flask, Response, jsonify
+from werkzeug.http import parse_accept_header
+
+from config import Config
+from website import compression
+
+@pytest.mark.parametrize('header, expected', [
+    ('gzip, deflate, br, zstd', 'zstd'),
+    ('gzip, br', 'br'),
+    ('br;q=0, gzip', 'gzip'),
+    ('identity', None),
+    ('', None),
+])
+def test_choose_encoding_prefers_configured_order(monkeypatch, header, expected):
+    monkeypatch.setattr(Config, 'COMPRESSION_ENCODINGS', ['zstd', 'br', 'gzip'])
+    available = {'gzip': None, 'br': None, 'zstd': None}
+
+    assert compression._choose_encoding(parse_accept_header(header), available) == expected
+
+def test_choose_encoding_skips_codecs_not_installed(monkeypatch):
+    monkeypatch.setattr(Config, 'COMPRESSION_ENCODINGS', ['zstd', 'br', 'gzip'])
+
+    assert compression._choose_encoding(parse_accept_header('zstd, br, gzip'), {'gzip': None}) == 'gzip'
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(Config, 'COMPRESSION_ENABLED', True)
+    monkeypatch.setattr(Config, 'COMPRESSION_ENCODINGS', ['gzip'])
+    monkeypatch.setattr(Config, 'COMPRESSION_MIN_SIZE', 500)
+    app = Flask(__name__)
+    compression.init_app(app)
+
+    @app.route('/big')
+    def big():
+        return jsonify({'students': ['2024-0001'] * 200})
+
+    @app.route('/small')
+    def small():
+        return jsonify({'ok': True})
+
+    @app.route('/stream')
+    def stream():
+        return Response((f"row {number}\n" for number in range(100)), mimetype='text/plain')
+
+    @app.route('/raw')
+    @compression.no_compression
+    def raw():
+        return jsonify({'students': ['2024-0001'] * 200})
+
+    return app.test_client()
+
+def test_compresses_when_accepted(client):
+    response = client.get('/big', headers={'Accept-Encoding': 'gzip'})
+
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in response.headers['Vary']
+    assert gzip.decompress(response.data).count(b'2024-0001') == 200
+
+def test_leaves_response_alone_when_not_accepted(client):
+    response = client.get('/big', headers={'Accept-Encoding': 'identity'})
+
+    assert 'Content-Encoding' not in response.headers
+    assert response.get_json()['students'][0] == '2024-0001'
+
+def test_skips_small_and_opted_out_responses(client):
+    for path in ('/small', '/raw'):
+        response = client.get(path, headers={'Accept-Encoding': 'gzip'})
+        assert 'Content-Encoding' not in response.headers
+
+def test_compresses_streams_chunk_by_chunk(client):
+    response = client.get('/stream', headers={'Accept-Encoding': 'gzip'})
+
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Content-Length' not in response.headers
+    assert gzip.decompress(response.data).decode().splitlines()[-1] == 'row 99'
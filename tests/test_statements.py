@@ -0,0 +1,23 @@
+import pytest
+
+from website.statements import StatementRegistry
+
+@pytest.mark.parametrize('sql, expected', [
+    ("SELECT 1", ("SELECT 1", 0)),
+    ("SELECT * FROM student WHERE id = %s", ("SELECT * FROM student WHERE id = $1", 1)),
+    ("SELECT * FROM student WHERE program_code = %s AND id > %s LIMIT %s",
+     ("SELECT * FROM student WHERE program_code = $1 AND id > $2 LIMIT $3", 3)),
+    # %% is a literal percent sign, not a parameter
+    ("SELECT * FROM student WHERE id LIKE '2024-%%' AND firstname ILIKE %s",
+     ("SELECT * FROM student WHERE id LIKE '2024-%' AND firstname ILIKE $1", 1)),
+    ("SELECT %s %%s", ("SELECT $1 %s", 1)),
+])
+def test_to_positional(sql, expected):
+    assert StatementRegistry._to_positional(sql) == expected
+
+def test_register_keeps_both_forms():
+    registry = StatementRegistry()
+
+    assert registry.register('student_by_id', "SELECT * FROM student WHERE id = %s") == 'student_by_id'
+    assert registry._statements['student_by_id'] == (
+        "SELECT * FROM student WHERE id = %s", "SELECT * FROM student WHERE id = $1", 1)
@@ -0,0 +1,140 @@
+from contextlib import contextmanager
+
+import pytest
+
+from website.database import DatabaseManager
+from website.suggest import PrefixIndex
+
+class FakeCursor:
+    """Answers the three queries PrefixIndex.load() runs; `on_students` runs before each student batch"""
+
+    def __init__(self, colleges, programs, students, on_students=None):
+        self.colleges = colleges
+        self.programs = programs
+        self.students = students
+        self.on_students = on_students
+        self.rows = []
+
+    def execute(self, sql, params=None):
+        if 'FROM college' in sql:
+            self.rows = self.colleges
+        elif 'FROM program' in sql:
+            self.rows = self.programs
+        else:
+            if self.on_students is not None:
+                self.on_students()
+            last_id, limit = params
+            self.rows = [row for row in self.students if row['id'] > last_id][:limit]
+
+    def fetchall(self):
+        return self.rows
+
+@pytest.fixture
+def database(monkeypatch):
+    """Point DatabaseManager.get_cursor at a FakeCursor; returns a function that sets it up"""
+    state = {}
+
+    @contextmanager
+    def get_cursor(*args, **kwargs):
+        yield state['cursor'], None
+
+    monkeypatch.setattr(DatabaseManager, 'get_cursor', get_cursor)
+
+    def setup(students=(), colleges=(), programs=(), on_students=None):
+        state['cursor'] = FakeCursor(list(colleges), list(programs), sorted(students, key=lambda row: row['id']),
+                                     on_students)
+    return setup
+
+def student(student_id, firstname, lastname):
+    return {'id': student_id, 'firstname': firstname, 'lastname': lastname}
+
+def values(results):
+    return [result['value'] for result in results]
+
+def test_search_matches_any_term_prefix():
+    index = PrefixIndex()
+    index.upsert_student('2024-0001', 'Maria', 'Santos')
+    index.upsert_student('2024-0002', 'Mark', 'Reyes')
+    index.upsert_program('BSCS', 'BS Computer Science')
+
+    assert values(index.search('mar')) == ['2024-0001', '2024-0002']
+    assert values(index.search('SANT')) == ['2024-0001']
+    assert values(index.search('maria san')) == ['2024-0001']
+    assert values(index.search('2024-0002')) == ['2024-0002']
+    assert index.search('bscs') == [{'type': 'program', 'value': 'BSCS', 'label': 'BS Computer Science'}]
+    assert index.search('  ') == []
+
+def test_search_returns_each_entry_once_up_to_limit():
+    index = PrefixIndex()
+    index.upsert_student('2024-0001', 'Ana', 'Ana')
+    for number in range(2, 6):
+        index.upsert_student(f'2024-000{number}', 'Anton', f'Cruz{number}')
+
+    assert values(index.search('an', limit=10)) == ['2024-0001', '2024-0002', '2024-0003', '2024-0004', '2024-0005']
+    assert len(index.search('an', limit=2)) == 2
+
+def test_upsert_replaces_old_terms():
+    index = PrefixIndex()
+    index.upsert_student('2024-0001', 'Maria', 'Santos')
+    index.upsert_student('2024-0001', 'Maria', 'Reyes')
+
+    assert index.search('santos') == []
+    assert index.search('reyes') == [{'type': 'student', 'value': '2024-0001', 'label': 'Maria Reyes'}]
+
+def test_remove_student():
+    index = PrefixIndex()
+    index.upsert_student('2024-0001', 'Maria', 'Santos')
+    index.remove_student('2024-0001')
+    index.remove_student('2024-0404')
+
+    assert index.search('maria') == []
+    assert index._terms == []
+
+def test_load_builds_sorted_index_in_batches(database, monkeypatch):
+    monkeypatch.setattr(PrefixIndex, 'BATCH_SIZE', 2)
+    database(
+        students=[student('2024-0003', 'Zed', 'Cruz'), student('2024-0001', 'Maria', 'Santos'),
+                  student('2024-0002', 'Mark', 'Reyes')],
+        colleges=[{'code': 'CCS', 'name': 'College of Computer Studies'}],
+        programs=[{'code': 'BSCS', 'name': 'BS Computer Science'}],
+    )
+    index = PrefixIndex()
+
+    assert index.load()
+    assert index.ready
+    assert index._terms == sorted(index._terms)
+    assert values(index.search('c')) == ['CCS', '2024-0003']
+    assert values(index.search('mar')) == ['2024-0001', '2024-0002']
+
+def test_load_replays_changes_made_during_the_rebuild(database, monkeypatch):
+    monkeypatch.setattr(PrefixIndex, 'BATCH_SIZE', 1)
+    index = PrefixIndex()
+    index.upsert_student('2024-0001', 'Maria', 'Santos')
+    index.upsert_student('2024-0002', 'Mark', 'Reyes')
+    writes = iter([
+        # Both happen after the rebuild has read (or skipped past) the rows they touch
+        lambda: index.upsert_student('2024-0000', 'Nina', 'Lopez'),
+        lambda: index.remove_student('2024-0001'),
+    ])
+    database(
+        students=[student('2024-0001', 'Maria', 'Santos'), student('2024-0002', 'Mark', 'Reyes')],
+        on_students=lambda: next(writes, lambda: None)(),
+    )
+
+    assert index.load()
+    assert values(index.search('nina')) == ['2024-0000']
+    assert index.search('maria') == []
+    assert values(index.search('mark')) == ['2024-0002']
+    assert index._journals == []
+
+def test_failed_load_keeps_the_old_index(database):
+    index = PrefixIndex()
+    index.upsert_student('2024-0001', 'Maria', 'Santos')
+
+    def broken():
+        raise RuntimeError('connection lost')
+    database(students=[student('2024-0002', 'Mark', 'Reyes')], on_students=broken)
+
+    assert not index.load()
+    assert values(index.search('maria')) == ['2024-0001']
+    assert index._journals == []
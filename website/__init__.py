@@ -1,30 +1,49 @@
 from flask import Flask
-from flask_sqlalchemy import SQLAlchemy
+import click
 import os
 from dotenv import load_dotenv
 from config import Config
-import cloudinary
-import cloudinary.uploader
-import cloudinary.api
 
 load_dotenv()
 
-# Create the SQLAlchemy instance outside the Flask app
-db = SQLAlchemy()
+# Flask-SQLAlchemy is optional (no model uses the ORM); it is only imported and
+# initialised when SQLALCHEMY_ENABLED is set. Cloudinary is configured lazily by
+# website.media on the first upload.
+db = None
 
 def create_app():
+    global db
     app = Flask(__name__)
     app.config.from_object(Config)
 
-    # Configure Cloudinary
-    cloudinary.config(
-        cloud_name=Config.CLOUDINARY_CLOUD_NAME,
-        api_key=Config.CLOUDINARY_API_KEY,
-        api_secret=Config.CLOUDINARY_API_SECRET
-    )
+    if Config.SQLALCHEMY_ENABLED:
+        from flask_sqlalchemy import SQLAlchemy
+        if db is None:
+            db = SQLAlchemy()
+        db.init_app(app)
 
-    # Initialize the SQLAlchemy extension
-    db.init_app(app)
+    # Registered first so its after_request hook runs last, on the final response
+    from website import compression
+    compression.init_app(app)
+
+    # Ahead of budgets and upload checks: a refused request costs neither
+    from website import admission
+    admission.init_app(app)
+
+    from website import budgets
+    budgets.init_app(app)
+
+    # Size/type/dimension checks on uploaded pictures before the view runs
+    from website import uploads
+    uploads.init_app(app)
+
+    # Fingerprinted static assets (python build_assets.py)
+    from website import assets
+    assets.init_app(app)
+
+    # Sized, lazily loaded profile pictures (website/media.py)
+    from website import media
+    app.jinja_env.globals.update(avatar_img=media.avatar_img, avatar_url=media.avatar_url)
 
     # Import and register blueprints here
     from website.routes.collegeRoute import collegeRoute
@@ -39,6 +58,29 @@ def create_app():
     from website.routes.logsRoute import logsRoute
     app.register_blueprint(logsRoute)
 
+    from website.routes.analyticsRoute import analyticsRoute
+    app.register_blueprint(analyticsRoute)
+
+    from website.routes.suggestRoute import suggestRoute
+    app.register_blueprint(suggestRoute)
+
+    from website.routes.eventsRoute import eventsRoute
+    app.register_blueprint(eventsRoute)
+
+    from website.routes.changesRoute import changesRoute
+    app.register_blueprint(changesRoute)
+
+    from website.routes.metricsRoute import metricsRoute
+    app.register_blueprint(metricsRoute)
+
+    from website.routes.archiveRoute import archiveRoute
+    app.register_blueprint(archiveRoute)
+
+    # In-memory roster: subscribed once here; each worker's change listener loads it
+    if Config.ROSTER_SNAPSHOT_ENABLED:
+        from website.roster import roster
+        roster.start()
+
     # Add home route
     @app.route('/')
     def home():
@@ -61,6 +103,40 @@ def create_app():
                              total_programs=total_programs,
                              total_colleges=total_colleges)
     
-    from flask import redirect
-    
+    @app.cli.command('startup-report')
+    @click.option('--top', default=15, help='Number of modules to list')
+    def startup_report(top):
+        """Profile cold-start time of create_app() (python -X importtime)"""
+        from website.startup_report import run_profile, print_report
+        total_ms, entries = run_profile(cwd=os.path.dirname(app.root_path))
+        print_report(total_ms, entries, top=top)
+
+    @app.cli.command('prune-pictures')
+    @click.option('--older-than', default=None, type=int, help='Seconds an asset must have been unreferenced')
+    def prune_pictures(older_than):
+        """Delete deduplicated pictures no student uses any more (requires PICTURE_DEDUP_ENABLED)"""
+        from website import pictures
+        public_ids = pictures.prune(older_than)
+        print(f"✅ Pruned {len(public_ids)} unreferenced picture(s)")
+
+    @app.cli.command('archive-students')
+    @click.option('--after-years', default=None, type=int, help='Archive cohorts enrolled at least this many years ago (ARCHIVE_AFTER_YEARS)')
+    @click.option('--batch-size', default=None, type=int, help='Students moved per transaction (MIGRATION_BATCH_SIZE)')
+    @click.option('--rate', default=None, type=float, help='Target students per second, 0 = unthrottled (MIGRATION_ROWS_PER_SECOND)')
+    @click.option('--dry-run', is_flag=True, help='Count the students that would move; move nothing')
+    def archive_students(after_years, batch_size, rate, dry_run):
+        """Move old cohorts from student to student_archive (requires migrate_student_archive.sql)"""
+        from website.archive import archive_students as run_archive
+        run_archive(after_years, batch_size=batch_size, rows_per_second=rate, dry_run=dry_run)
+
+    @app.cli.command('restore-student')
+    @click.argument('student_id')
+    def restore_student(student_id):
+        """Move an archived student back into the live table"""
+        from website.models.archiveModels import ArchiveModel
+        if not ArchiveModel.is_valid_id(student_id):
+            raise click.BadParameter('expected YYYY-NNNN', param_hint='STUDENT_ID')
+        result = ArchiveModel.restore_student(student_id)
+        print(("✅ " if result['success'] else "❌ ") + result['message'])
+
     return app
@@ -0,0 +1,280 @@
+"""
+Admission control and load shedding.
+
+Each request is sorted into a class - read (page renders and lists), write,
+upload, export (bulk API pulls) - and each class may only have so many
+requests running at once in this process (ADMISSION_<CLASS>_LIMIT). Extra
+requests wait in a bounded FIFO queue for at most ADMISSION_QUEUE_TIMEOUT_MS;
+when the queue is already full, or the wait runs out, the request is answered
+at once with 503 and Retry-After instead of piling onto the database with
+everyone else. Cheap endpoints (point lookups, row fragments, typeahead,
+static files, the event stream) are never queued, so they stay fast while
+heavy renders wait their turn.
+
+Upload routes are also rate limited per client by a token bucket
+(UPLOAD_RATE_PER_MINUTE, bursts of UPLOAD_RATE_BURST): a client over its rate
+gets 429 with Retry-After before its body is read. The token is handed back if
+the upload's gate then refuses it, so a 503 doesn't count against the rate.
+
+The limits only shape load if they fit the process: every admitted request may
+hold a pooled connection, so their sum should stay within DB_POOL_MAX_SIZE
+(past it, requests queue at the pool for DB_POOL_TIMEOUT_MS instead of in the
+gate's queue), and each limit should stay below the worker's thread count
+(SSIS_THREADS), or that class can take every thread and never queue at its
+gate. configure() warns about limits that don't fit.
+
+The Flask hook runs ahead of the latency budget (website/budgets.py) and the
+upload checks (website/uploads.py), so a refused request costs neither a
+budget nor a spooled body, and time spent queued is not taken out of the
+route's budget. The native ASGI handlers (website/asgi.py) go through the same
+gates via admit().
+"""
+import collections
+import math
+import os
+import threading
+import time
+from config import Config
+
+CLASSES = ('read', 'write', 'upload', 'export')
+
+# Endpoint -> class, where the method alone doesn't say (see classify())
+ADMISSION_CLASSES = {
+    'students.api_students': 'export',
+    'changes.changes': 'export',
+}
+
+# Endpoints that are cheap enough never to queue
+UNLIMITED_ENDPOINTS = {
+    'static', 'assets', 'events.events', 'suggest.suggest', 'metrics.metrics',
+    'students.api_student', 'students.student_rows', 'programs.program_rows', 'college.college_rows',
+}
+
+Refusal = collections.namedtuple('Refusal', 'status_code retry_after reason')
+
+def classify(endpoint, method, view=None):
+    """Admission class of a request, or None if it is never queued"""
+    if endpoint is None or endpoint in UNLIMITED_ENDPOINTS:
+        return None
+    if method == 'POST' and getattr(view, '_accepts_uploads', False):
+        return 'upload'
+    if endpoint in ADMISSION_CLASSES:
+        return ADMISSION_CLASSES[endpoint]
+    if method not in ('GET', 'HEAD', 'OPTIONS'):
+        return 'write'
+    return 'read'
+
+class AdmissionGate:
+    """At most `limit` requests of one class in flight; up to `max_queue` more wait, in arrival order"""
+    SAMPLES = 1000
+
+    def __init__(self, name, limit, max_queue):
+        self.name = name
+        self.limit = limit
+        self.max_queue = max_queue
+        self._condition = threading.Condition()
+        self._active = 0
+        self._waiting = collections.deque()
+        self._peak_queued = 0
+        self._admitted = 0
+        self._queued_total = 0
+        self._rejected = collections.Counter()
+        self._waits = collections.deque(maxlen=self.SAMPLES)
+
+    def enter(self, timeout):
+        """Take a slot, queueing for up to `timeout` seconds: None, or why the request was refused"""
+        started = time.monotonic()
+        with self._condition:
+            if self._active < self.limit and not self._waiting:
+                self._active += 1
+                self._admitted += 1
+                return None
+            if len(self._waiting) >= self.max_queue:
+                self._rejected['queue_full'] += 1
+                return 'queue_full'
+
+            ticket = object()
+            self._waiting.append(ticket)
+            self._queued_total += 1
+            self._peak_queued = max(self._peak_queued, len(self._waiting))
+            deadline = started + timeout
+            try:
+                # First in line gets the next free slot
+                while self._waiting[0] is not ticket or self._active >= self.limit:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._rejected['queue_timeout'] += 1
+                        return 'queue_timeout'
+                    self._condition.wait(remaining)
+            finally:
+                self._waiting.remove(ticket)
+                # Whoever is now first may be able to go
+                self._condition.notify_all()
+            self._active += 1
+            self._admitted += 1
+            self._waits.append((time.monotonic() - started) * 1000)
+            return None
+
+    def leave(self):
+        with self._condition:
+            self._active -= 1
+            self._condition.notify_all()
+
+    def snapshot(self):
+        with self._condition:
+            waits = sorted(self._waits)
+            pick = lambda q: round(waits[min(len(waits) - 1, int(len(waits) * q))], 2) if waits else None
+            return {
+                'limit': self.limit,
+                'max_queue': self.max_queue,
+                'active': self._active,
+                'queued': len(self._waiting),
+                'peak_queued': self._peak_queued,
+                'admitted': self._admitted,
+                'queued_total': self._queued_total,
+                'rejected': dict(self._rejected),
+                'queue_wait_p50_ms': pick(0.5),
+                'queue_wait_p99_ms': pick(0.99),
+            }
+
+class TokenBuckets:
+    """Per-client token buckets: `burst` tokens, refilled at `rate` per second"""
+    MAX_CLIENTS = 10000
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self._lock = threading.Lock()
+        self._buckets = {}
+        self._limited = 0
+
+    def take(self, client):
+        """Spend a token: 0 if allowed, else the seconds until the client has one again"""
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.get(client, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - updated) * self.rate)
+            if tokens >= 1:
+                self._buckets[client] = (tokens - 1, now)
+                if len(self._buckets) > self.MAX_CLIENTS:
+                    self._forget_idle(now)
+                return 0
+            self._buckets[client] = (tokens, now)
+            self._limited += 1
+            return (1 - tokens) / self.rate
+
+    def refund(self, client):
+        """Give back a token spent by a request that was then refused"""
+        with self._lock:
+            if client in self._buckets:
+                tokens, updated = self._buckets[client]
+                self._buckets[client] = (min(self.burst, tokens + 1), updated)
+
+    def _forget_idle(self, now):
+        # A bucket that has refilled completely is the same as no bucket
+        full_after = self.burst / self.rate
+        for client, (tokens, updated) in list(self._buckets.items()):
+            if now - updated >= full_after:
+                del self._buckets[client]
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'rate_per_minute': round(self.rate * 60, 2),
+                'burst': self.burst,
+                'clients': len(self._buckets),
+                'rate_limited': self._limited,
+            }
+
+gates = {}
+upload_buckets = None
+
+def configure():
+    """(Re)build the gates and buckets from Config"""
+    global upload_buckets
+    gates.clear()
+    if Config.ADMISSION_CONTROL_ENABLED:
+        for name in CLASSES:
+            limit = getattr(Config, f'ADMISSION_{name.upper()}_LIMIT')
+            if limit > 0:
+                gates[name] = AdmissionGate(name, limit, Config.ADMISSION_QUEUE_SIZE)
+    upload_buckets = TokenBuckets(Config.UPLOAD_RATE_PER_MINUTE / 60, Config.UPLOAD_RATE_BURST) if Config.UPLOAD_RATE_PER_MINUTE > 0 else None
+    for warning in capacity_warnings(os.environ.get('SSIS_THREADS')):
+        print(f"⚠️  Admission: {warning}")
+
+def capacity_warnings(threads=None):
+    """Ways the configured gates don't fit the connection pool or `threads` worker threads"""
+    warnings = []
+    total = sum(gate.limit for gate in gates.values())
+    if total > Config.DB_POOL_MAX_SIZE:
+        warnings.append(f"the class limits add up to {total} but DB_POOL_MAX_SIZE is {Config.DB_POOL_MAX_SIZE}; "
+                        f"admitted requests will wait at the pool instead of the gate queue")
+    if threads:
+        threads = int(threads)
+        for name, gate in gates.items():
+            if gate.limit >= threads:
+                warnings.append(f"ADMISSION_{name.upper()}_LIMIT={gate.limit} is not below SSIS_THREADS={threads}; "
+                                f"{name} requests can take every thread and never queue at their gate")
+    return warnings
+
+def admit(admission_class, client):
+    """Admit one request of `admission_class` (may block while queued): (gate to leave() or None, Refusal or None)"""
+    buckets = upload_buckets if admission_class == 'upload' else None
+    client = client or 'unknown'
+    if buckets is not None:
+        wait = buckets.take(client)
+        if wait:
+            return None, Refusal(429, max(1, math.ceil(wait)), 'rate_limited')
+    gate = gates.get(admission_class)
+    if gate is None:
+        return None, None
+    refused = gate.enter(Config.ADMISSION_QUEUE_TIMEOUT_MS / 1000)
+    if refused:
+        if buckets is not None:
+            buckets.refund(client)
+        return None, Refusal(503, Config.ADMISSION_RETRY_AFTER_SECONDS, refused)
+    return gate, None
+
+def snapshot():
+    return {
+        'classes': {name: gate.snapshot() for name, gate in gates.items()},
+        'upload_rate': upload_buckets.snapshot() if upload_buckets is not None else None,
+    }
+
+def refusal_message(refusal):
+    if refusal.reason == 'rate_limited':
+        return f'Too many uploads; please wait {refusal.retry_after}s and retry'
+    return 'The server is busy; please retry shortly'
+
+def init_app(app):
+    """Admit every request through its class's gate before any other hook runs"""
+    from flask import g, request, jsonify
+
+    configure()
+
+    @app.before_request
+    def _admit():
+        view = app.view_functions.get(request.endpoint)
+        admission_class = classify(request.endpoint, request.method, view)
+        if admission_class is None:
+            return None
+        gate, refusal = admit(admission_class, request.remote_addr)
+        if refusal is None:
+            g.admission_gate = gate
+            return None
+
+        print(f"🚦 {request.method} {request.path} refused ({admission_class}: {refusal.reason})")
+        message = refusal_message(refusal)
+        if request.path.startswith('/api/') or request.headers.get('X-Requested-With') == 'XMLHttpRequest':
+            response = jsonify({'success': False, 'error': message, 'message': message})
+        else:
+            response = app.response_class(message, mimetype='text/plain')
+        response.status_code = refusal.status_code
+        response.headers['Retry-After'] = str(refusal.retry_after)
+        return response
+
+    @app.teardown_request
+    def _leave(error=None):
+        gate = g.pop('admission_gate', None)
+        if gate is not None:
+            gate.leave()
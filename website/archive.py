@@ -0,0 +1,59 @@
+"""
+Archive tier for graduated and inactive students.
+
+The archive job moves every student of a cohort enrolled at least
+ARCHIVE_AFTER_YEARS years ago (the YYYY prefix of the ID) from student to
+student_archive. It runs as a batched data migration (website/batch_migrations.py):
+keyset chunks over just those cohorts' ID range (the oldest partitions), each
+moved by one DELETE ... RETURNING into an INSERT in its own short transaction,
+checkpointed, throttled and retried on lock timeouts like any other migration.
+
+Because the rows really leave student, its triggers do the bookkeeping: table
+versions are bumped (analytics and other versioned caches refresh),
+tombstones and change notifications go out (delta sync clients, the roster
+snapshot and live tables drop the rows), and picture reference counts move to
+the archive row. Other workers' typeahead indexes catch up on their next
+SUGGEST_REFRESH_SECONDS rebuild.
+
+Archived students are read only through /api/archive/students and come back
+with ArchiveModel.restore_student().
+"""
+from datetime import datetime
+from config import Config
+from website.batch_migrations import DataMigration, MigrationRunner
+from website.models.archiveModels import ArchiveModel
+from website.models.studentModels import StudentModel
+
+class ArchiveStudents(DataMigration):
+    name = 'archive_students'
+    table = 'student'
+    key = 'id'
+
+    def __init__(self, after_years=None):
+        after_years = Config.ARCHIVE_AFTER_YEARS if after_years is None else after_years
+        self.last_cohort = datetime.now().year - after_years
+        self.reason = f"Cohort {self.last_cohort} or older (archived after {after_years} years)"
+        self.description = f"Move cohorts up to {self.last_cohort} to student_archive"
+        # An ID range, so only the archived cohorts' partitions are walked
+        self.pending_condition = self.scope = f"id < '{StudentModel.enrollment_year_bounds(self.last_cohort)[1]}'"
+
+    def apply(self, cur, keys):
+        columns = ArchiveModel.moved_columns()
+        cur.execute(f"""
+            WITH moved AS (
+                DELETE FROM student WHERE id = ANY(%s) AND ({self.pending_condition})
+                RETURNING {columns}
+            )
+            INSERT INTO student_archive ({columns}, archive_reason)
+            SELECT {columns}, %s
+            FROM moved
+        """, (keys, self.reason))
+        return cur.rowcount
+
+def archive_students(after_years=None, batch_size=None, rows_per_second=None, dry_run=False):
+    """Run the archive policy now; returns the runner's summary dict"""
+    runner = MigrationRunner(ArchiveStudents(after_years), batch_size=batch_size,
+                             rows_per_second=rows_per_second, dry_run=dry_run)
+    # The cutoff moves every year, so each run walks the range again from the start
+    # (rows archived by an interrupted run are already gone from it)
+    return runner.run(restart=True)
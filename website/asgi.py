@@ -0,0 +1,185 @@
+"""
+ASGI serving mode for SSIS.
+
+The hot JSON and upload paths are served by native async handlers backed by an
+asyncpg pool and an httpx client, so a single process can keep many of them in
+flight while they wait on Postgres or Cloudinary. The /events stream is native
+too, so open live-update connections don't each hold a thread. Every other URL falls through
+to the regular Flask app (same blueprints and templates), which runs in the
+ASGI server's thread pool.
+
+Run with:  uvicorn asgi:app --workers 1
+"""
+import io
+import time
+from contextlib import asynccontextmanager
+from asgiref.wsgi import WsgiToAsgi
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import Request
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Mount, Route
+
+from website import admission, budgets, create_app
+from website.async_database import AsyncDatabaseManager
+from website import pictures
+from website.async_cloudinary import AsyncCloudinaryClient
+from website.budgets import QueryTimeout
+from website.events import event_broker
+from website.models.asyncStudentModels import AsyncStudentModel
+from website.routes.studentRoute import MAX_API_PAGE_SIZE, log_activity
+from website.uploads import UploadRejected, inspect_image, too_large, upload_metrics
+from config import Config
+
+def _int_arg(request, name, default):
+    try:
+        return int(request.query_params.get(name, default))
+    except ValueError:
+        return default
+
+async def api_students(request):
+    page_number = max(_int_arg(request, "page", 1), 1)
+    page_size = max(1, min(_int_arg(request, "page_size", 25), MAX_API_PAGE_SIZE))
+
+    data = await AsyncStudentModel.get_students(page_size=page_size, page_number=page_number)
+    if not isinstance(data, dict):
+        return JSONResponse({'error': data}, status_code=500)
+    return JSONResponse(data)
+
+def _limited_receive(receive, limit):
+    """ASGI receive() that stops the body once more than `limit` bytes have arrived"""
+    received = 0
+
+    async def limited():
+        nonlocal received
+        message = await receive()
+        if message['type'] == 'http.request':
+            received += len(message.get('body', b''))
+            if received > limit:
+                raise too_large()
+        return message
+    return limited
+
+def _rejected(error):
+    upload_metrics.record(error.reason)
+    print(f"🚫 Upload rejected (ASGI): {error}")
+    return JSONResponse({'success': False, 'message': str(error)}, status_code=error.status_code)
+
+async def api_upload_profile_pic(request):
+    """Native counterpart of the Flask view, with the same ingest checks (website/uploads.py)"""
+    student_id = request.path_params['student_id']
+    content_length = request.headers.get('content-length')
+    if content_length and content_length.isdigit() and int(content_length) > Config.MAX_CONTENT_LENGTH:
+        return _rejected(too_large())
+
+    # Count body bytes as they stream in; the parse is abandoned past the limit
+    request = Request(request.scope, _limited_receive(request.receive, Config.MAX_CONTENT_LENGTH))
+    try:
+        form = await request.form()
+    except UploadRejected as e:
+        return _rejected(e)
+    profile_file = form.get("file")
+    if profile_file is None or not getattr(profile_file, 'filename', None):
+        return JSONResponse({'success': False, 'message': 'No file uploaded'}, status_code=400)
+
+    file_bytes = await profile_file.read()
+    try:
+        if len(file_bytes) > Config.UPLOAD_MAX_BYTES:
+            raise too_large()
+        inspect_image(io.BytesIO(file_bytes))
+    except UploadRejected as e:
+        return _rejected(e)
+    upload_metrics.record('accepted')
+
+    try:
+        current_pic_url = await AsyncStudentModel.get_student_profile_pic_url(student_id)
+        secure_url, content_hash = await pictures.store_async(file_bytes, profile_file.filename)
+        if current_pic_url != secure_url:
+            try:
+                result = await AsyncStudentModel.update_student_profile_pic(student_id, secure_url, content_hash)
+            except QueryTimeout:
+                await pictures.release_async(secure_url)
+                raise
+            if 'successfully' not in result:
+                # The student still shows its old picture; the new one is unused
+                await pictures.release_async(secure_url)
+                return JSONResponse({'success': False, 'message': result}, status_code=500)
+            await pictures.release_async(current_pic_url)
+        log_activity("UPLOAD Profile Picture", f"ID={student_id}, URL={secure_url}")
+        return JSONResponse({'success': True, 'message': 'Profile picture updated successfully', 'secureUrl': secure_url})
+    except QueryTimeout:
+        raise
+    except Exception as e:
+        return JSONResponse({'success': False, 'message': f'Failed to update profile picture: {str(e)}'}, status_code=502)
+
+async def events(request):
+    """/events without a worker thread per open stream (see website/events.py)"""
+    if event_broker.client_count() >= Config.SSE_ASYNC_MAX_CLIENTS:
+        return JSONResponse({'error': 'Too many live update connections'}, status_code=503,
+                            headers={'Retry-After': '30'})
+    last_event_id = request.headers.get('Last-Event-ID') or request.query_params.get('last_event_id')
+    return StreamingResponse(event_broker.stream_async(last_event_id), media_type='text/event-stream',
+                             headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+def _budgeted(endpoint, handler):
+    """Give `handler` the route budget of the Flask `endpoint` it mirrors, and answer QueryTimeout with 503"""
+    async def budgeted_handler(request):
+        started = time.monotonic()
+        token = budgets.start_async_request(endpoint)
+        try:
+            return await handler(request)
+        except QueryTimeout as e:
+            budgets.budget_metrics.record_timeout(endpoint, e)
+            print(f"⏱️  {request.method} {request.url.path}: {e}")
+            return JSONResponse({'success': False, 'error': 'The server is busy; please retry shortly', 'timeout': e.kind},
+                                status_code=503, headers={'Retry-After': str(Config.BUDGET_RETRY_AFTER_SECONDS)})
+        finally:
+            budgets.end_async_request(token)
+            budgets.budget_metrics.record_request(endpoint, (time.monotonic() - started) * 1000,
+                                                  budgets.route_budget_ms(endpoint))
+    return budgeted_handler
+
+def _admitted(admission_class, handler):
+    """Run `handler` through the same admission gates as the Flask routes (website/admission.py)"""
+    async def admitted_handler(request):
+        client = request.client.host if request.client else None
+        # A queued request blocks while it waits: do that on a worker thread, not the event loop
+        gate, refusal = await run_in_threadpool(admission.admit, admission_class, client)
+        if refusal is not None:
+            print(f"🚦 {request.method} {request.url.path} refused (ASGI {admission_class}: {refusal.reason})")
+            message = admission.refusal_message(refusal)
+            return JSONResponse({'success': False, 'error': message, 'message': message},
+                                status_code=refusal.status_code, headers={'Retry-After': str(refusal.retry_after)})
+        try:
+            return await handler(request)
+        finally:
+            if gate is not None:
+                gate.leave()
+    return admitted_handler
+
+@asynccontextmanager
+async def lifespan(app):
+    try:
+        await AsyncDatabaseManager.init_pool()
+    except Exception as e:
+        # The pool is created lazily on first use if Postgres is not up yet
+        print(f"⚠️  Warning: Could not create async database pool: {e}")
+    try:
+        yield
+    finally:
+        await AsyncCloudinaryClient.close()
+        await AsyncDatabaseManager.close_pool()
+
+def create_asgi_app():
+    flask_app = create_app()
+
+    return Starlette(
+        routes=[
+            Route("/api/students", _admitted('export', _budgeted('students.api_students', api_students)), methods=["GET"]),
+            Route("/api/students/{student_id}/profile_pic",
+                  _admitted('upload', _budgeted('students.api_upload_profile_pic', api_upload_profile_pic)), methods=["POST"]),
+            Route("/events", events, methods=["GET"]),
+            Mount("/", app=WsgiToAsgi(flask_app)),
+        ],
+        lifespan=lifespan,
+    )
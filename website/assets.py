@@ -0,0 +1,83 @@
+"""
+Fingerprinted, precompressed static assets.
+
+build_assets.py writes content-hashed (and minified) copies of website/static
+to website/static/dist, with .br/.gz siblings for text assets and a
+manifest.json of original -> hashed names. init_app() loads that manifest,
+makes url_for('static', filename=...) in templates return the hashed name, and
+serves /static/dist/ itself: the best precompressed variant the browser
+accepts, with a one-year immutable Cache-Control, so repeat page loads don't
+request the assets at all. A changed file gets a new name, never a stale copy.
+
+Without a manifest (nothing built yet, or STATIC_FINGERPRINTING=false while
+editing website/static) url_for and /static behave as usual.
+"""
+import json
+import mimetypes
+import os
+from config import Config
+
+DIST_DIR = 'dist'
+MANIFEST = 'manifest.json'
+COMPRESSIBLE = ('.js', '.css', '.svg', '.json', '.txt', '.html')
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+# Preferred first; file suffix written by build_assets.py
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+_manifest = {}
+
+def load_manifest(static_folder):
+    """Read dist/manifest.json; an empty mapping when nothing has been built"""
+    path = os.path.join(static_folder, DIST_DIR, MANIFEST)
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+    except Exception as e:
+        print(f"⚠️  Could not read asset manifest {path}: {e}")
+        return {}
+
+def asset_url_for(endpoint, **values):
+    """flask.url_for, with static filenames swapped for their fingerprinted names"""
+    from flask import url_for
+    if endpoint == 'static' and _manifest:
+        hashed = _manifest.get(values.get('filename'))
+        if hashed:
+            values['filename'] = hashed
+    return url_for(endpoint, **values)
+
+def serve_asset(filename):
+    """A fingerprinted file from dist/, precompressed if the client accepts it"""
+    from flask import current_app, request, send_from_directory, abort
+    if filename == MANIFEST:
+        abort(404)
+    directory = os.path.join(current_app.static_folder, DIST_DIR)
+    mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+
+    encoding, variant = None, filename
+    for name, suffix in ENCODINGS:
+        if request.accept_encodings[name] and os.path.isfile(os.path.join(directory, filename + suffix)):
+            encoding, variant = name, filename + suffix
+            break
+
+    response = send_from_directory(directory, variant, mimetype=mimetype, max_age=IMMUTABLE_MAX_AGE)
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    if filename.endswith(COMPRESSIBLE):
+        response.vary.add('Accept-Encoding')
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
+
+def init_app(app):
+    """Load the manifest and route /static/dist/ (a no-op url_for override when nothing is built)"""
+    global _manifest
+    if not Config.STATIC_FINGERPRINTING:
+        return
+    _manifest = load_manifest(app.static_folder)
+    if not _manifest:
+        print("ℹ️  No static asset manifest; run python build_assets.py for fingerprinted assets")
+    app.jinja_env.globals['url_for'] = asset_url_for
+    app.add_url_rule(f"{app.static_url_path}/{DIST_DIR}/<path:filename>", 'assets', serve_asset)
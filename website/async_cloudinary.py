@@ -0,0 +1,48 @@
+import httpx
+from cloudinary import utils as cloudinary_utils
+from cloudinary.exceptions import Error as CloudinaryError
+from config import Config
+from website import media
+
+class AsyncCloudinaryClient:
+    """Minimal non-blocking client for the Cloudinary upload API.
+
+    Request signing reuses the official SDK helpers; only the HTTP transport
+    is swapped for a pooled httpx.AsyncClient so uploads do not tie up a thread.
+    """
+    _client = None
+
+    @classmethod
+    def get_client(cls):
+        if cls._client is None:
+            cls._client = httpx.AsyncClient(timeout=Config.ASYNC_HTTP_TIMEOUT)
+        return cls._client
+
+    @classmethod
+    async def close(cls):
+        if cls._client is not None:
+            await cls._client.aclose()
+            cls._client = None
+
+    @classmethod
+    async def _call_api(cls, action, params, files=None):
+        media.configure()
+        params = dict(params, timestamp=cloudinary_utils.now())
+        signed = cloudinary_utils.sign_request(params, {})
+        url = cloudinary_utils.cloudinary_api_url(action)
+        response = await cls.get_client().post(url, data=signed, files=files)
+        result = response.json()
+        if response.status_code != 200 or 'error' in result:
+            message = result.get('error', {}).get('message', response.text)
+            raise CloudinaryError(message)
+        return result
+
+    @classmethod
+    async def upload(cls, file_bytes, filename, **options):
+        """Upload image bytes and return Cloudinary's response dict"""
+        return await cls._call_api('upload', options, files={'file': (filename, file_bytes)})
+
+    @classmethod
+    async def destroy(cls, public_id):
+        """Delete an uploaded image by public ID"""
+        return await cls._call_api('destroy', {'public_id': public_id})
@@ -0,0 +1,94 @@
+import asyncio
+import asyncpg
+import psycopg2.extensions
+from config import Config
+from contextlib import asynccontextmanager
+from website.budgets import QueryTimeout, query_limits
+from website.database import DatabaseManager
+
+# libpq DSN keyword -> asyncpg connect() argument
+_DSN_KEYWORDS = {
+    'host': 'host',
+    'port': 'port',
+    'user': 'user',
+    'password': 'password',
+    'dbname': 'database',
+    'sslmode': 'ssl',
+}
+
+class AsyncDatabaseManager:
+    """asyncpg connection pool used by the ASGI serving mode"""
+    _pool = None
+
+    @staticmethod
+    def connect_params():
+        """DatabaseManager.primary_params() in the form asyncpg.create_pool() takes"""
+        params = DatabaseManager.primary_params()
+        if 'dsn' not in params:
+            return dict(params, port=int(params['port']))
+
+        dsn = params['dsn']
+        if dsn.startswith(('postgres://', 'postgresql://')):
+            return {'dsn': dsn}
+        # asyncpg only parses URIs; spell out a libpq "key=value" DSN
+        parsed = psycopg2.extensions.parse_dsn(dsn)
+        unsupported = sorted(set(parsed) - set(_DSN_KEYWORDS))
+        if unsupported:
+            print(f"⚠️  Warning: async pool ignores POSTGRES_PRIMARY_DSN keywords: {', '.join(unsupported)}")
+        connect = {_DSN_KEYWORDS[key]: value for key, value in parsed.items() if key in _DSN_KEYWORDS}
+        if 'port' in connect:
+            connect['port'] = int(connect['port'])
+        return connect
+
+    @classmethod
+    async def init_pool(cls):
+        """Create the shared connection pool (called once on ASGI startup)"""
+        if cls._pool is None:
+            cls._pool = await asyncpg.create_pool(
+                **cls.connect_params(),
+                min_size=Config.ASYNC_POOL_MIN_SIZE,
+                max_size=Config.ASYNC_POOL_MAX_SIZE
+            )
+        return cls._pool
+
+    @classmethod
+    async def close_pool(cls):
+        """Close the pool (called on ASGI shutdown)"""
+        if cls._pool is not None:
+            await cls._pool.close()
+            cls._pool = None
+
+    @classmethod
+    @asynccontextmanager
+    async def get_connection(cls):
+        """Borrow a pooled connection wrapped in a transaction.
+
+        Limited by the route budget of the current ASGI request like
+        DatabaseManager.get_cursor() (website.budgets); a query that hits it
+        raises QueryTimeout.
+        """
+        limits = query_limits()
+        pool = await cls.init_pool()
+        # Wait for a pooled connection no longer than the rest of the budget allows
+        wait_ms = min(Config.DB_POOL_TIMEOUT_MS, limits[0]) if limits and limits[0] else Config.DB_POOL_TIMEOUT_MS
+        try:
+            conn = await pool.acquire(timeout=wait_ms / 1000)
+        except asyncio.TimeoutError as e:
+            raise QueryTimeout('pool', wait_ms, limits and limits[2]) from e
+        try:
+            async with conn.transaction():
+                # Transaction-local (SET LOCAL), so the pooled connection is clean again after commit/rollback
+                settings = "".join(
+                    f"SET LOCAL {name} = {int(value)}; "
+                    for name, value in zip(('statement_timeout', 'lock_timeout'), limits or ()) if value
+                )
+                if settings:
+                    await conn.execute(settings)
+                yield conn
+        except (asyncpg.exceptions.QueryCanceledError, asyncpg.exceptions.LockNotAvailableError) as e:
+            if not limits:
+                raise
+            kind = 'statement' if isinstance(e, asyncpg.exceptions.QueryCanceledError) else 'lock'
+            raise QueryTimeout(kind, limits[0] if kind == 'statement' else limits[1], limits[2]) from e
+        finally:
+            await pool.release(conn)
@@ -0,0 +1,194 @@
+"""
+Resumable, batched data migrations.
+
+A DataMigration rewrites the rows of one table in keyset order (key > last
+key ORDER BY key LIMIT batch_size), one short transaction per chunk, so the app
+keeps serving while it runs: no table lock is taken, and a chunk that waits
+longer than MIGRATION_LOCK_TIMEOUT_MS for a row a user is editing gives up
+(QueryTimeout, see website/budgets.py) and is retried after a pause rather
+than queueing traffic behind it.
+
+Progress is checkpointed in data_migration_progress in the same transaction as
+each chunk's writes, so an interrupted run resumes after the last chunk that
+committed and no chunk is applied twice. Runs are throttled to a target rows
+per second. A dry run walks the same chunks and reports how many rows each
+would change, without writing anything.
+
+A migration sets name/table/key and either pending_condition + assignments (a
+single UPDATE per chunk) or overrides apply(). pending_condition should only
+match rows that still need the rewrite, which keeps re-runs and rows written by
+the app mid-run correct. An optional scope limits the rows walked in the first
+place (website/archive.py walks only the archived cohorts' key range).
+"""
+import time
+from config import Config
+from website.budgets import QueryTimeout, budget
+from website.database import DatabaseManager, read_write
+
+PROGRESS_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS data_migration_progress (
+        name VARCHAR(100) PRIMARY KEY,
+        last_key TEXT,
+        rows_scanned BIGINT NOT NULL DEFAULT 0,
+        rows_changed BIGINT NOT NULL DEFAULT 0,
+        started_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+        updated_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+        finished_at TIMESTAMPTZ
+    )
+"""
+
+class DataMigration:
+    """A keyset-chunked rewrite of one table"""
+    name = None
+    description = ''
+    table = None
+    key = 'id'
+    # SQL condition matching rows that still need rewriting
+    pending_condition = 'TRUE'
+    # Optional SQL condition bounding the rows walked at all (e.g. a key range), so
+    # the runner doesn't visit the whole table to find a few pending rows
+    scope = None
+    # SET clause applied to the pending rows of each chunk
+    assignments = None
+
+    def count_pending(self, cur, keys):
+        cur.execute(
+            f"SELECT COUNT(*) AS count FROM {self.table} WHERE {self.key} = ANY(%s) AND ({self.pending_condition})",
+            (keys,)
+        )
+        return cur.fetchone()['count']
+
+    def apply(self, cur, keys):
+        """Rewrite the pending rows among `keys`; returns the number of rows changed"""
+        cur.execute(
+            f"UPDATE {self.table} SET {self.assignments} WHERE {self.key} = ANY(%s) AND ({self.pending_condition})",
+            (keys,)
+        )
+        return cur.rowcount
+
+class MigrationRunner:
+    """Runs one DataMigration chunk by chunk, checkpointing, throttling and retrying"""
+
+    def __init__(self, migration, batch_size=None, rows_per_second=None, dry_run=False):
+        self.migration = migration
+        self.batch_size = batch_size or Config.MIGRATION_BATCH_SIZE
+        self.rows_per_second = Config.MIGRATION_ROWS_PER_SECOND if rows_per_second is None else rows_per_second
+        self.dry_run = dry_run
+
+    @staticmethod
+    @read_write
+    def ensure_progress_table():
+        with DatabaseManager.get_cursor() as (cur, conn):
+            cur.execute(PROGRESS_TABLE_SQL)
+
+    @staticmethod
+    def progress(name=None):
+        """Checkpoint rows (all migrations, or one)"""
+        with DatabaseManager.get_cursor() as (cur, conn):
+            if name is None:
+                cur.execute("SELECT * FROM data_migration_progress ORDER BY name")
+                return [dict(row) for row in cur.fetchall()]
+            cur.execute("SELECT * FROM data_migration_progress WHERE name = %s", (name,))
+            row = cur.fetchone()
+            return dict(row) if row else None
+
+    @read_write
+    def reset(self):
+        with DatabaseManager.get_cursor() as (cur, conn):
+            cur.execute("DELETE FROM data_migration_progress WHERE name = %s", (self.migration.name,))
+
+    def _chunk_keys(self, cur, after):
+        m = self.migration
+        conditions = [f"({m.scope})"] if m.scope else []
+        params = []
+        if after is not None:
+            conditions.append(f"{m.key} > %s")
+            params.append(after)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        cur.execute(f"SELECT {m.key} AS key FROM {m.table} {where} ORDER BY {m.key} LIMIT %s", params + [self.batch_size])
+        return [row['key'] for row in cur.fetchall()]
+
+    @read_write
+    def _run_chunk(self, after):
+        """One chunk in one transaction: (last key, rows scanned, rows changed), or None when done"""
+        with DatabaseManager.get_cursor() as (cur, conn):
+            keys = self._chunk_keys(cur, after)
+            if not keys:
+                if not self.dry_run:
+                    cur.execute("""
+                        INSERT INTO data_migration_progress (name, finished_at) VALUES (%s, now())
+                        ON CONFLICT (name) DO UPDATE SET finished_at = now(), updated_at = now()
+                    """, (self.migration.name,))
+                return None
+            if self.dry_run:
+                return keys[-1], len(keys), self.migration.count_pending(cur, keys)
+
+            changed = self.migration.apply(cur, keys)
+            # Checkpoint commits together with the chunk's writes
+            cur.execute("""
+                INSERT INTO data_migration_progress (name, last_key, rows_scanned, rows_changed)
+                VALUES (%s, %s, %s, %s)
+                ON CONFLICT (name) DO UPDATE SET
+                    last_key = EXCLUDED.last_key,
+                    rows_scanned = data_migration_progress.rows_scanned + EXCLUDED.rows_scanned,
+                    rows_changed = data_migration_progress.rows_changed + EXCLUDED.rows_changed,
+                    updated_at = now(),
+                    finished_at = NULL
+            """, (self.migration.name, str(keys[-1]), len(keys), changed))
+            return keys[-1], len(keys), changed
+
+    def _chunk_with_retries(self, after):
+        run_chunk = budget(statement_ms=Config.MIGRATION_STATEMENT_TIMEOUT_MS,
+                           lock_ms=Config.MIGRATION_LOCK_TIMEOUT_MS)(self._run_chunk)
+        for attempt in range(1, Config.MIGRATION_MAX_RETRIES + 1):
+            try:
+                return run_chunk(after)
+            except QueryTimeout as e:
+                if attempt == Config.MIGRATION_MAX_RETRIES:
+                    raise
+                pause = Config.MIGRATION_RETRY_DELAY_SECONDS * attempt
+                print(f"⏳ Chunk after {after!r} hit a {e.kind} timeout (attempt {attempt}); retrying in {pause:.1f}s")
+                time.sleep(pause)
+
+    def run(self, restart=False):
+        """Run (or resume) the migration; returns a summary dict"""
+        m = self.migration
+        self.ensure_progress_table()
+        if restart and not self.dry_run:
+            self.reset()
+        checkpoint = None if restart else self.progress(m.name)
+        if checkpoint and checkpoint['finished_at'] and not self.dry_run:
+            print(f"✅ {m.name} already finished at {checkpoint['finished_at']} (use --restart to run it again)")
+            return {'name': m.name, 'rows_scanned': 0, 'rows_changed': 0, 'chunks': 0, 'finished': True}
+
+        after = checkpoint['last_key'] if checkpoint and not checkpoint['finished_at'] else None
+        mode = "DRY RUN" if self.dry_run else "RUN"
+        print(f"\n🚚 {mode} {m.name}: {m.table} in chunks of {self.batch_size}"
+              + (f", resuming after {after!r}" if after is not None else "")
+              + (f", throttled to {self.rows_per_second:g} rows/s" if self.rows_per_second else ""))
+
+        started = time.monotonic()
+        scanned = changed = chunks = 0
+        while True:
+            result = self._chunk_with_retries(after)
+            if result is None:
+                break
+            after, chunk_scanned, chunk_changed = result
+            chunks += 1
+            scanned += chunk_scanned
+            changed += chunk_changed
+            elapsed = time.monotonic() - started
+            verb = "would change" if self.dry_run else "changed"
+            print(f"  chunk {chunks:>4}: up to {after!s:<14} {chunk_scanned:>6} rows, {chunk_changed:>6} {verb}"
+                  f"  ({scanned / elapsed if elapsed else 0:,.0f} rows/s)")
+
+            if self.rows_per_second:
+                # Stay at or below the target rate, averaged over the run
+                ahead = scanned / self.rows_per_second - (time.monotonic() - started)
+                if ahead > 0:
+                    time.sleep(ahead)
+
+        elapsed = time.monotonic() - started
+        print(f"✅ {m.name}: {scanned} rows scanned, {changed} {'would change' if self.dry_run else 'changed'}"
+              f" in {chunks} chunks, {elapsed:.1f}s")
+        return {'name': m.name, 'rows_scanned': scanned, 'rows_changed': changed, 'chunks': chunks, 'finished': True}
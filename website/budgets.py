@@ -0,0 +1,223 @@
+"""
+Per-route and per-model-method latency budgets.
+
+Every Flask request gets a wall-clock budget (ROUTE_BUDGETS_MS by endpoint,
+else Config.DEFAULT_ROUTE_BUDGET_MS). Each cursor borrowed while it runs is
+given SET LOCAL statement_timeout / lock_timeout no larger than what is left
+of that budget, further capped by a @budget(...) on the model method making
+the query. The native ASGI handlers (asgi.py) get the same route budgets for
+their asyncpg connections (website/async_database.py). A query that hits either limit, or that cannot get a pooled
+connection within that time, surfaces as QueryTimeout, which the app answers
+with 503 and Retry-After instead of holding the worker.
+
+Model methods and routes catch their own exceptions, so get_cursor() also
+records the timeout: the read_only/read_write wrappers re-raise it once the
+model method returns (see website/database.py), and the response of a request
+that hit one is replaced by the 503 even if the route swallowed it.
+"""
+import collections
+import contextvars
+import functools
+import threading
+import time
+from config import Config
+
+# Endpoint -> wall-clock budget in milliseconds
+ROUTE_BUDGETS_MS = {
+    'home': 3000,
+    'students.students': 5000,
+    'students.view_student': 2000,
+    'students.student_rows': 2000,
+    'students.api_students': 2000,
+    'students.student_data': 2000,
+    'students.api_student': 1000,
+    'programs.programs': 5000,
+    'programs.view_program': 3000,
+    'programs.program_students': 2000,
+    'programs.program_rows': 2000,
+    'programs.delete_program': 15000,
+    'college.colleges': 5000,
+    'college.view_college': 3000,
+    'college.college_rows': 2000,
+    'college.delete_college': 15000,
+    'suggest.suggest': 500,
+    'analytics.enrollment': 5000,
+    'changes.changes': 10000,
+    'archive.archived_students': 3000,
+    'archive.restore_student': 5000,
+}
+
+# Endpoints that never touch the database for long (or stream on purpose)
+UNBUDGETED_ENDPOINTS = {'static', 'assets', 'events.events'}
+
+class QueryTimeout(Exception):
+    """A query exceeded its statement/lock timeout, or the request ran out of budget"""
+
+    def __init__(self, kind, budget_ms, where=None):
+        self.kind = kind          # 'statement', 'lock', 'budget' or 'pool'
+        self.budget_ms = budget_ms
+        self.where = where
+        super().__init__(f"{kind} timeout after {budget_ms} ms" + (f" in {where}" if where else ""))
+
+# Innermost @budget of the model method currently running: (name, statement_ms, lock_ms)
+_method_budget = contextvars.ContextVar('method_budget', default=None)
+
+# Native ASGI request being served (no Flask g there): (endpoint, budget_ms, deadline)
+_async_request = contextvars.ContextVar('async_request_budget', default=None)
+
+def budget(statement_ms=None, lock_ms=None):
+    """Cap the statement/lock timeouts of the queries made by a model method"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            outer = _method_budget.get()
+            statement = min(filter(None, (statement_ms, outer and outer[1])), default=None)
+            lock = min(filter(None, (lock_ms, outer and outer[2])), default=None)
+            token = _method_budget.set((func.__qualname__, statement, lock))
+            try:
+                return func(*args, **kwargs)
+            finally:
+                _method_budget.reset(token)
+        return wrapper
+    return decorator
+
+def route_budget_ms(endpoint):
+    """Wall-clock budget of `endpoint` in milliseconds"""
+    return ROUTE_BUDGETS_MS.get(endpoint, Config.DEFAULT_ROUTE_BUDGET_MS)
+
+def start_request(endpoint):
+    """Open the wall-clock budget of the current request (before_request)"""
+    from flask import g
+    if endpoint in UNBUDGETED_ENDPOINTS:
+        return
+    g.budget_ms = route_budget_ms(endpoint)
+    g.budget_deadline = time.monotonic() + g.budget_ms / 1000
+
+def start_async_request(endpoint):
+    """start_request() for a native ASGI handler; returns the token to reset once it is done"""
+    budget_ms = route_budget_ms(endpoint)
+    return _async_request.set((endpoint, budget_ms, time.monotonic() + budget_ms / 1000))
+
+def end_async_request(token):
+    """Close the budget opened by start_async_request()"""
+    _async_request.reset(token)
+
+def note_timeout(error):
+    """Remember a timeout on the request, in case a route's own except clause swallows it"""
+    from flask import g, has_request_context
+    if has_request_context():
+        g.query_timeout = error
+
+def query_limits():
+    """(statement_ms, lock_ms, where) for the next cursor, or None when nothing applies"""
+    from flask import g, has_request_context
+    method = _method_budget.get()
+    statement = method and method[1]
+    lock = method and method[2]
+    where = method and method[0]
+
+    request_budget = None
+    if has_request_context() and g.get('budget_deadline') is not None:
+        request_budget = (g.get('budget_endpoint'), g.budget_ms, g.budget_deadline)
+    elif _async_request.get() is not None:
+        request_budget = _async_request.get()
+
+    if request_budget is not None:
+        endpoint, budget_ms, deadline = request_budget
+        remaining = int((deadline - time.monotonic()) * 1000)
+        if remaining <= 0:
+            raise QueryTimeout('budget', budget_ms, where or endpoint)
+        statement = min(statement or Config.DB_STATEMENT_TIMEOUT_MS, remaining)
+        lock = min(lock or Config.DB_LOCK_TIMEOUT_MS, statement)
+    elif method is None:
+        return None
+    return statement, lock, where
+
+class BudgetMetrics:
+    """Per-endpoint request counts, latency percentiles, budget overruns and timeouts (per process)"""
+    SAMPLES = 1000
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._endpoints = {}
+
+    def _entry(self, endpoint):
+        entry = self._endpoints.get(endpoint)
+        if entry is None:
+            entry = self._endpoints[endpoint] = {
+                'requests': 0,
+                'over_budget': 0,
+                'timeouts': collections.Counter(),
+                'latency_ms': collections.deque(maxlen=self.SAMPLES),
+            }
+        return entry
+
+    def record_request(self, endpoint, elapsed_ms, budget_ms):
+        with self._lock:
+            entry = self._entry(endpoint)
+            entry['requests'] += 1
+            entry['latency_ms'].append(elapsed_ms)
+            if budget_ms is not None and elapsed_ms > budget_ms:
+                entry['over_budget'] += 1
+
+    def record_timeout(self, endpoint, error):
+        with self._lock:
+            self._entry(endpoint)['timeouts'][f"{error.kind}:{error.where or '-'}"] += 1
+
+    def snapshot(self):
+        with self._lock:
+            report = {}
+            for endpoint, entry in self._endpoints.items():
+                samples = sorted(entry['latency_ms'])
+                pick = lambda q: round(samples[min(len(samples) - 1, int(len(samples) * q))], 2) if samples else None
+                report[endpoint] = {
+                    'requests': entry['requests'],
+                    'budget_ms': route_budget_ms(endpoint),
+                    'over_budget': entry['over_budget'],
+                    'timeouts': dict(entry['timeouts']),
+                    'p50_ms': pick(0.5),
+                    'p99_ms': pick(0.99),
+                    'max_ms': round(samples[-1], 2) if samples else None,
+                }
+            return report
+
+budget_metrics = BudgetMetrics()
+
+def init_app(app):
+    """Open a budget per request, record its latency, and map QueryTimeout to 503"""
+    from flask import g, request, jsonify
+
+    def timeout_response(error):
+        budget_metrics.record_timeout(g.get('budget_endpoint') or request.endpoint, error)
+        print(f"⏱️  {request.method} {request.path}: {error}")
+        message = 'The server is busy; please retry shortly'
+        if request.path.startswith('/api/') or request.headers.get('X-Requested-With') == 'XMLHttpRequest':
+            response = jsonify({'success': False, 'error': message, 'timeout': error.kind})
+        else:
+            response = app.response_class(message, mimetype='text/plain')
+        response.status_code = 503
+        response.headers['Retry-After'] = str(Config.BUDGET_RETRY_AFTER_SECONDS)
+        return response
+
+    @app.before_request
+    def _open_budget():
+        g.budget_started = time.monotonic()
+        g.budget_endpoint = request.endpoint
+        start_request(request.endpoint)
+
+    @app.errorhandler(QueryTimeout)
+    def _timeout(error):
+        g.pop('query_timeout', None)
+        return timeout_response(error)
+
+    @app.after_request
+    def _record_budget(response):
+        # Routes wrap their work in broad try/except blocks; a timeout they
+        # caught still becomes a 503 rather than an error page or redirect
+        timeout = g.pop('query_timeout', None)
+        if timeout is not None:
+            response = timeout_response(timeout)
+        started = g.get('budget_started')
+        if started is not None and g.get('budget_ms') is not None:
+            budget_metrics.record_request(g.budget_endpoint, (time.monotonic() - started) * 1000, g.budget_ms)
+        return response
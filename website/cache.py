@@ -0,0 +1,68 @@
+import threading
+from collections import OrderedDict
+import time
+from config import Config
+
+class ReferenceCache:
+    """Per-process TTL cache for small, rarely-changing reference lists.
+
+    Program and college lists are rendered on nearly every page. Writes made by
+    this process invalidate their keys immediately; writes made by other worker
+    processes become visible once the TTL expires.
+    """
+    _entries = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def get(cls, key, loader, ttl=None):
+        """Return the cached value for key, calling loader() to (re)fill it"""
+        ttl = Config.REFERENCE_CACHE_TTL if ttl is None else ttl
+        entry = cls._entries.get(key)
+        if entry is not None and time.monotonic() - entry[0] < ttl:
+            return entry[1]
+
+        value = loader()
+        with cls._lock:
+            cls._entries[key] = (time.monotonic(), value)
+        return value
+
+    @classmethod
+    def invalidate(cls, *keys):
+        """Drop the given keys, or everything if no keys are given"""
+        with cls._lock:
+            if not keys:
+                cls._entries.clear()
+            for key in keys:
+                cls._entries.pop(key, None)
+
+class VersionedCache:
+    """Bounded LRU cache whose keys include the current table versions.
+
+    Entries are never explicitly invalidated: once a write bumps a table's
+    version (see migrate_table_versions.sql), lookups use a new key and the
+    stale entry simply ages out of the LRU.
+    """
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, loader):
+        """Return the cached value for key, calling loader() on a miss"""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+
+        value = loader()
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,216 @@
+"""
+Response compression for rendered pages and JSON.
+
+init_app() adds an after_request hook that compresses text responses (HTML,
+JSON, CSS/JS, CSV, SVG) with the best encoding both sides support, in
+COMPRESSION_ENCODINGS order: zstd and br when the zstandard / brotli packages
+are installed, gzip always. Buffered responses under COMPRESSION_MIN_SIZE are
+left alone. Streamed responses are compressed chunk by chunk, flushing after
+each one, so the browser still receives every chunk as soon as it is yielded.
+
+Skipped: responses that already carry a Content-Encoding, file responses
+(send_file / the precompressed /static/dist assets), Server-Sent Events, and
+views decorated with @no_compression (e.g. payloads that are already
+compressed).
+"""
+import threading
+import time
+import zlib
+from config import Config
+
+COMPRESSIBLE_MIMETYPES = {
+    'text/html', 'text/plain', 'text/css', 'text/csv', 'text/xml', 'text/javascript',
+    'application/json', 'application/javascript', 'application/xml', 'image/svg+xml',
+}
+
+# Dynamic content: favour speed over the last few percent of ratio
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 4
+ZSTD_LEVEL = 3
+
+class _GzipCompressor:
+    def __init__(self):
+        self._compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+
+    def compress(self, data):
+        return self._compressor.compress(data)
+
+    def flush(self):
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self._compressor.flush()
+
+class _BrotliCompressor:
+    def __init__(self):
+        import brotli
+        self._compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+
+    def compress(self, data):
+        return self._compressor.process(data)
+
+    def flush(self):
+        return self._compressor.flush()
+
+    def finish(self):
+        return self._compressor.finish()
+
+class _ZstdCompressor:
+    def __init__(self):
+        import zstandard
+        self._flush_block = zstandard.COMPRESSOBJ_FLUSH_BLOCK
+        self._compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compressobj()
+
+    def compress(self, data):
+        return self._compressor.compress(data)
+
+    def flush(self):
+        return self._compressor.flush(self._flush_block)
+
+    def finish(self):
+        return self._compressor.flush()
+
+def _available_encodings():
+    """Content-Encoding -> compressor class, for the codecs installed here"""
+    encodings = {'gzip': _GzipCompressor}
+    try:
+        import brotli  # noqa: F401
+        encodings['br'] = _BrotliCompressor
+    except ImportError:
+        pass
+    try:
+        import zstandard  # noqa: F401
+        encodings['zstd'] = _ZstdCompressor
+    except ImportError:
+        pass
+    return encodings
+
+def no_compression(view):
+    """Never compress this view's responses (images, archives, other precompressed payloads)"""
+    view._no_compression = True
+    return view
+
+class CompressionMetrics:
+    """Per-encoding compressed responses, bytes in/out and CPU time; skip reasons (per process)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._encodings = {}
+        self._skipped = {}
+
+    def record(self, encoding, bytes_in, bytes_out, cpu_seconds, streamed):
+        with self._lock:
+            entry = self._encodings.setdefault(encoding, {
+                'responses': 0, 'streamed': 0, 'bytes_in': 0, 'bytes_out': 0, 'cpu_ms': 0.0,
+            })
+            entry['responses'] += 1
+            entry['streamed'] += int(streamed)
+            entry['bytes_in'] += bytes_in
+            entry['bytes_out'] += bytes_out
+            entry['cpu_ms'] += cpu_seconds * 1000
+
+    def record_skip(self, reason):
+        with self._lock:
+            self._skipped[reason] = self._skipped.get(reason, 0) + 1
+
+    def snapshot(self):
+        with self._lock:
+            encodings = {}
+            for encoding, entry in self._encodings.items():
+                encodings[encoding] = {
+                    **entry,
+                    'cpu_ms': round(entry['cpu_ms'], 2),
+                    'ratio': round(entry['bytes_in'] / entry['bytes_out'], 2) if entry['bytes_out'] else None,
+                    'cpu_us_per_kb': round(entry['cpu_ms'] * 1000 / (entry['bytes_in'] / 1024), 2) if entry['bytes_in'] else None,
+                }
+            return {'encodings': encodings, 'skipped': dict(self._skipped)}
+
+compression_metrics = CompressionMetrics()
+
+def _choose_encoding(accept_encodings, available):
+    for encoding in Config.COMPRESSION_ENCODINGS:
+        if encoding in available and accept_encodings[encoding]:
+            return encoding
+    return None
+
+def _compress_stream(chunks, compressor, encoding):
+    """Compress a streamed body chunk by chunk, flushing each so nothing is held back"""
+    bytes_in = bytes_out = 0
+    cpu = 0.0
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode('utf-8')
+            if not chunk:
+                continue
+            started = time.thread_time()
+            data = compressor.compress(chunk) + compressor.flush()
+            cpu += time.thread_time() - started
+            bytes_in += len(chunk)
+            bytes_out += len(data)
+            yield data
+        started = time.thread_time()
+        data = compressor.finish()
+        cpu += time.thread_time() - started
+        bytes_out += len(data)
+        yield data
+        compression_metrics.record(encoding, bytes_in, bytes_out, cpu, streamed=True)
+    finally:
+        close = getattr(chunks, 'close', None)
+        if close is not None:
+            close()
+
+def init_app(app):
+    """Compress eligible responses (register before other after_request hooks so it runs last)"""
+    from flask import request
+
+    if not Config.COMPRESSION_ENABLED:
+        return
+    available = _available_encodings()
+    print(f"🗜️  Response compression: {', '.join(e for e in Config.COMPRESSION_ENCODINGS if e in available)}")
+
+    @app.after_request
+    def _compress(response):
+        if response.mimetype not in COMPRESSIBLE_MIMETYPES:
+            return response
+        if response.direct_passthrough or 'Content-Encoding' in response.headers:
+            return response
+        view = app.view_functions.get(request.endpoint)
+        if getattr(view, '_no_compression', False):
+            compression_metrics.record_skip('opted_out')
+            return response
+
+        response.vary.add('Accept-Encoding')
+        if request.method == 'HEAD' or response.status_code < 200 or response.status_code in (204, 304):
+            return response
+        encoding = _choose_encoding(request.accept_encodings, available)
+        if encoding is None:
+            compression_metrics.record_skip('not_accepted')
+            return response
+
+        if response.is_streamed and response.content_length is not None and response.content_length < Config.COMPRESSION_MIN_SIZE:
+            # An iterable body whose size is known anyway (e.g. error pages)
+            compression_metrics.record_skip('below_min_size')
+            return response
+
+        compressor = available[encoding]()
+        if response.is_streamed:
+            response.response = _compress_stream(response.response, compressor, encoding)
+            response.headers.pop('Content-Length', None)
+        else:
+            body = response.get_data()
+            if len(body) < Config.COMPRESSION_MIN_SIZE:
+                compression_metrics.record_skip('below_min_size')
+                return response
+            started = time.thread_time()
+            compressed = compressor.compress(body) + compressor.finish()
+            cpu = time.thread_time() - started
+            response.set_data(compressed)
+            compression_metrics.record(encoding, len(body), len(compressed), cpu, streamed=False)
+
+        response.headers['Content-Encoding'] = encoding
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            # The compressed bytes differ from what the strong ETag described
+            response.set_etag(etag, weak=True)
+        return response
@@ -1,53 +1,352 @@
 import psycopg2
+import psycopg2.extensions
+from psycopg2 import errors
 from psycopg2.extras import RealDictCursor
+from psycopg2.pool import ThreadedConnectionPool, PoolError
 from config import Config
+from website.budgets import QueryTimeout, query_limits, note_timeout
 from contextlib import contextmanager
+import contextvars
+import functools
+import itertools
+import logging
 import os
+import threading
+import time
+
+PRIMARY = 'primary'
+
+logger = logging.getLogger(__name__)
+
+# What the model method currently running intends to do: None (unknown), 'read' or 'write'
+_query_intent = contextvars.ContextVar('query_intent', default=None)
+
+# QueryTimeout raised by get_cursor() inside the current model method (which may swallow it)
+_pending_timeout = contextvars.ContextVar('pending_timeout', default=None)
+
+def _run_tagged(intent, func, args, kwargs):
+    intent_token = _query_intent.set(intent)
+    timeout_token = _pending_timeout.set(None)
+    try:
+        result = func(*args, **kwargs)
+        timeout = _pending_timeout.get()
+    finally:
+        _pending_timeout.reset(timeout_token)
+        _query_intent.reset(intent_token)
+    if timeout is not None:
+        # Models return []/None on errors; a timeout must still reach the route
+        _pending_timeout.set(timeout)
+        raise timeout
+    return result
+
+def read_only(func):
+    """Tag a model method as read-only: its queries may be served by a replica"""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        # A read nested inside a write stays on the primary
+        return _run_tagged(_query_intent.get() or 'read', func, args, kwargs)
+    return wrapper
+
+def read_write(func):
+    """Tag a model method as writing: its queries go to the primary"""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        return _run_tagged('write', func, args, kwargs)
+    return wrapper
+
+class BlockingConnectionPool(ThreadedConnectionPool):
+    """ThreadedConnectionPool whose getconn() waits for a free connection instead of failing at once"""
+
+    def __init__(self, minconn, maxconn, *args, **kwargs):
+        self._slots = threading.BoundedSemaphore(maxconn)
+        super().__init__(minconn, maxconn, *args, **kwargs)
+
+    def getconn(self, key=None, timeout=None):
+        """Borrow a connection, waiting up to `timeout` seconds (default DB_POOL_TIMEOUT_MS) for one"""
+        if timeout is None:
+            timeout = Config.DB_POOL_TIMEOUT_MS / 1000
+        if not self._slots.acquire(timeout=max(0, timeout)):
+            raise PoolError(f"connection pool exhausted (waited {int(timeout * 1000)} ms)")
+        try:
+            return super().getconn(key)
+        except Exception:
+            self._slots.release()
+            raise
+
+    def putconn(self, conn, key=None, close=False):
+        try:
+            super().putconn(conn, key, close)
+        finally:
+            self._slots.release()
+
+class _BudgetedCursorMixin:
+    """Sends the request's SET LOCAL timeouts in the same round trip as the cursor's first statement"""
+    pending_settings = ''
+
+    def _take_settings(self):
+        settings, self.pending_settings = self.pending_settings, ''
+        return settings
+
+    def execute(self, query, vars=None):
+        settings = self._take_settings()
+        if settings and isinstance(query, str):
+            return super().execute(settings + query, vars)
+        if settings:
+            super().execute(settings)
+        return super().execute(query, vars)
+
+    def executemany(self, query, vars_list):
+        settings = self._take_settings()
+        if settings:
+            super().execute(settings)
+        return super().executemany(query, vars_list)
+
+class BudgetedCursor(_BudgetedCursorMixin, psycopg2.extensions.cursor):
+    pass
+
+class BudgetedDictCursor(_BudgetedCursorMixin, RealDictCursor):
+    pass
 
 class DatabaseManager:
+    _pools = {}
+    _pool_pid = None
+    _pool_lock = threading.Lock()
+
+    # Replica name -> (checked_at, lag in seconds or None when unreachable)
+    _replica_lag = {}
+    _lag_locks = {}
+    _round_robin = itertools.count()
+    # Replica name -> when its failure was last logged (one warning per REPLICA_LOG_INTERVAL)
+    _replica_logged = {}
+    REPLICA_LOG_INTERVAL = 60
+
+    @staticmethod
+    def primary_params():
+        """Connection parameters of the primary"""
+        if Config.POSTGRES_PRIMARY_DSN:
+            return {'dsn': Config.POSTGRES_PRIMARY_DSN}
+        return {
+            'host': Config.POSTGRES_HOST,
+            'port': Config.POSTGRES_PORT,
+            'user': Config.POSTGRES_USER,
+            'password': Config.POSTGRES_PASSWORD,
+            'database': Config.POSTGRES_DB,
+        }
+
+    @staticmethod
+    def replica_params():
+        """Replica name -> connection parameters; sessions are read-only so a mis-tagged write fails loudly"""
+        return {
+            f"replica-{index}": {'dsn': dsn, 'options': '-c default_transaction_read_only=on'}
+            for index, dsn in enumerate(Config.POSTGRES_REPLICA_DSNS)
+        }
+
     @staticmethod
     def get_connection():
         """Get a database connection"""
         try:
-            return psycopg2.connect(
-                host=Config.POSTGRES_HOST,
-                port=Config.POSTGRES_PORT,
-                user=Config.POSTGRES_USER,
-                password=Config.POSTGRES_PASSWORD,
-                database=Config.POSTGRES_DB
-            )
+            return psycopg2.connect(**DatabaseManager.primary_params())
         except psycopg2.OperationalError as e:
             # If database doesn't exist, try to connect to default 'postgres' database
-            if "database" in str(e) and "does not exist" in str(e):
-                return psycopg2.connect(
-                    host=Config.POSTGRES_HOST,
-                    port=Config.POSTGRES_PORT,
-                    user=Config.POSTGRES_USER,
-                    password=Config.POSTGRES_PASSWORD,
-                    database='postgres'
-                )
+            if "database" in str(e) and "does not exist" in str(e) and not Config.POSTGRES_PRIMARY_DSN:
+                return psycopg2.connect(**dict(DatabaseManager.primary_params(), database='postgres'))
             raise e
-    
+
+    @classmethod
+    def get_pool(cls, target=PRIMARY):
+        """Get the per-process connection pool for `target`, creating it on first use.
+
+        Pools are keyed by PID so a forked worker never reuses sockets that
+        were opened by its parent.
+        """
+        if cls._pool_pid != os.getpid() or target not in cls._pools:
+            with cls._pool_lock:
+                if cls._pool_pid != os.getpid():
+                    cls._pools = {}
+                    cls._replica_lag = {}
+                    cls._pool_pid = os.getpid()
+                if target not in cls._pools:
+                    params = cls.primary_params() if target == PRIMARY else cls.replica_params()[target]
+                    cls._pools[target] = BlockingConnectionPool(
+                        Config.DB_POOL_MIN_SIZE,
+                        Config.DB_POOL_MAX_SIZE,
+                        **params
+                    )
+        return cls._pools[target]
+
+    @classmethod
+    def close_pool(cls):
+        """Close every pooled connection (e.g. in the master before forking workers)"""
+        with cls._pool_lock:
+            if cls._pool_pid == os.getpid():
+                for pool in cls._pools.values():
+                    pool.closeall()
+            cls._pools = {}
+            cls._pool_pid = None
+
+    @classmethod
+    def reset_pool(cls):
+        """Forget inherited pools after fork without touching the parent's sockets"""
+        with cls._pool_lock:
+            cls._pools = {}
+            cls._replica_lag = {}
+            cls._pool_pid = None
+
+    # ------------------------------------------------------------------
+    # Read/write routing
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _note_write():
+        """Pin this request (and this browser, briefly) to the primary after a write"""
+        from flask import g, session, has_request_context
+        if has_request_context():
+            g.db_wrote = True
+            session['db_wrote_at'] = time.time()
+
+    @staticmethod
+    def _recently_wrote():
+        from flask import g, session, has_request_context
+        if not has_request_context():
+            return False
+        if g.get('db_wrote'):
+            return True
+        # Stickiness across the redirect that follows a form post
+        return time.time() - session.get('db_wrote_at', 0) < Config.REPLICA_STICKY_SECONDS
+
+    @classmethod
+    def replica_lag(cls, name):
+        """Replication lag of a replica in seconds (None if unreachable), re-measured every few seconds"""
+        checked_at, lag = cls._replica_lag.get(name, (0.0, None))
+        if time.monotonic() - checked_at < Config.REPLICA_LAG_CHECK_SECONDS:
+            return lag
+
+        lock = cls._lag_locks.setdefault(name, threading.Lock())
+        if not lock.acquire(blocking=False):
+            return lag  # another thread is measuring; use the previous value
+        try:
+            pool = cls.get_pool(name)
+            conn = pool.getconn()
+            broken = False
+            try:
+                with conn.cursor() as cur:
+                    # Caught-up standbys report 0 even when the primary is idle;
+                    # a server that is not a standby (e.g. a second DSN for the same instance) has no lag
+                    cur.execute("""
+                        SELECT CASE
+                            WHEN NOT pg_is_in_recovery() THEN 0
+                            WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+                            ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 'Infinity')
+                        END
+                    """)
+                    lag = float(cur.fetchone()[0])
+                conn.rollback()
+            except psycopg2.Error:
+                broken = True
+                raise
+            finally:
+                pool.putconn(conn, close=broken or conn.closed != 0)
+        except Exception as e:
+            cls._log_replica_failure(name, "Replica %s unavailable: %s", e)
+            lag = None
+        finally:
+            cls._replica_lag[name] = (time.monotonic(), lag)
+            lock.release()
+        return lag
+
+    @classmethod
+    def _log_replica_failure(cls, name, message, error):
+        """Warn about a failing replica, at most once per REPLICA_LOG_INTERVAL seconds each"""
+        now = time.monotonic()
+        if now - cls._replica_logged.get(name, -cls.REPLICA_LOG_INTERVAL) >= cls.REPLICA_LOG_INTERVAL:
+            cls._replica_logged[name] = now
+            logger.warning(message, name, error)
+
+    @classmethod
+    def choose_target(cls):
+        """Primary, or a healthy replica for read-only work that must not see its own writes"""
+        if not Config.POSTGRES_REPLICA_DSNS:
+            # No replicas: nothing to route, and no need to pin the session after writes
+            return PRIMARY
+        intent = _query_intent.get()
+        if intent == 'write':
+            cls._note_write()
+            return PRIMARY
+        if intent != 'read' or cls._recently_wrote():
+            return PRIMARY
+
+        healthy = []
+        for name in cls.replica_params():
+            lag = cls.replica_lag(name)
+            if lag is not None and lag <= Config.REPLICA_MAX_LAG_SECONDS:
+                healthy.append(name)
+        if not healthy:
+            return PRIMARY
+        return healthy[next(cls._round_robin) % len(healthy)]
+
+    @classmethod
+    def _mark_unavailable(cls, name):
+        cls._replica_lag[name] = (time.monotonic(), None)
+
     @staticmethod
     @contextmanager
     def get_cursor(dictionary=True):
-        """Context manager for database cursor"""
+        """Context manager for database cursor.
+
+        Routed by the read_only/read_write tag of the calling model method, and
+        limited by the current route/method latency budget (website.budgets).
+        """
+        pool = None
         conn = None
         cursor = None
+        broken = False
+        limits = None
         try:
-            conn = DatabaseManager.get_connection()
-            if dictionary:
-                cursor = conn.cursor(cursor_factory=RealDictCursor)
-            else:
-                cursor = conn.cursor()
+            limits = query_limits()
+            target = DatabaseManager.choose_target()
+            # Wait for a pooled connection no longer than the rest of the budget allows
+            wait_ms = min(Config.DB_POOL_TIMEOUT_MS, limits[0]) if limits and limits[0] else Config.DB_POOL_TIMEOUT_MS
+            try:
+                try:
+                    pool = DatabaseManager.get_pool(target)
+                    conn = pool.getconn(timeout=wait_ms / 1000)
+                except psycopg2.Error as e:
+                    if target == PRIMARY:
+                        raise
+                    # Replica went away between lag checks: serve this read from the primary
+                    DatabaseManager._log_replica_failure(target, "Replica %s failed, using primary: %s", e)
+                    DatabaseManager._mark_unavailable(target)
+                    pool = DatabaseManager.get_pool(PRIMARY)
+                    conn = pool.getconn(timeout=wait_ms / 1000)
+            except PoolError as e:
+                pool = None
+                raise QueryTimeout('pool', wait_ms, limits and limits[2]) from e
+            # Transaction-local (SET LOCAL), so the pooled connection is clean again after commit/rollback
+            settings = "".join(
+                f"SET LOCAL {name} = {int(value)}; "
+                for name, value in zip(('statement_timeout', 'lock_timeout'), limits or ()) if value
+            )
+            cursor = conn.cursor(cursor_factory=BudgetedDictCursor if dictionary else BudgetedCursor)
+            cursor.pending_settings = settings
             yield cursor, conn
             conn.commit()
         except Exception as e:
             if conn:
-                conn.rollback()
+                try:
+                    conn.rollback()
+                except psycopg2.Error:
+                    broken = True
+            if isinstance(e, (errors.QueryCanceled, errors.LockNotAvailable)) and limits:
+                kind = 'statement' if isinstance(e, errors.QueryCanceled) else 'lock'
+                timeout = QueryTimeout(kind, limits[0] if kind == 'statement' else limits[1], limits[2])
+                _pending_timeout.set(timeout)
+                note_timeout(timeout)
+                raise timeout from e
+            if isinstance(e, QueryTimeout):
+                _pending_timeout.set(e)
+                note_timeout(e)
             raise e
         finally:
             if cursor:
                 cursor.close()
             if conn:
-                conn.close()
\ No newline at end of file
+                pool.putconn(conn, close=broken or conn.closed != 0)
@@ -0,0 +1,203 @@
+"""
+Server-Sent Events fan-out of row-level changes.
+
+The broker subscribes once per worker process to the shared change listener
+(website.notifications), so every browser connected to that worker is fed
+from the same LISTEN connection. Each connected browser gets a bounded queue;
+a browser that falls behind, or reconnects after the short replay history
+has moved on, is told to resync instead of silently missing rows.
+
+Events sent to the browser carry only what it needs to patch its tables:
+table, op, key, old_key and the program/college codes the row points at.
+
+Under WSGI each open stream (stream()) holds a worker thread, which is why
+/events is capped at SSE_MAX_CLIENTS per process there. The ASGI app serves
+/events with stream_async(), which waits on the event loop instead, and is
+capped at SSE_ASYNC_MAX_CLIENTS.
+"""
+import asyncio
+import collections
+import json
+import os
+import queue
+import threading
+import time
+from config import Config
+from website.notifications import change_listener
+
+# Foreign keys worth telling the browser about (for count badges and joins)
+REFERENCES = {
+    'student': 'program_code',
+    'program': 'college_code',
+}
+
+class _Client:
+    __slots__ = ('queue', 'overflowed', 'after', 'wake')
+
+    def __init__(self, size, wake=None):
+        self.queue = queue.Queue(maxsize=size)
+        self.overflowed = False
+        self.after = 0
+        # Called after each event is queued (async clients wait on the event loop, not the queue)
+        self.wake = wake
+
+class EventBroker:
+    HISTORY = 256
+    RETRY_MS = 3000
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._clients = set()
+        self._history = collections.deque(maxlen=self.HISTORY)
+        self._seq = 0
+        self._pid = None
+        self._token = None
+        self._had_connection = False
+
+    # ------------------------------------------------------------------
+    # Producer side (runs on the listener thread)
+    # ------------------------------------------------------------------
+    def _start(self):
+        with self._lock:
+            if self._pid != os.getpid():
+                # Event ids are only meaningful within one worker process
+                self._pid = os.getpid()
+                self._token = f"{self._pid:x}{int(time.time()):x}"
+                self._clients = set()
+                self._history.clear()
+                self._had_connection = False
+        change_listener.subscribe(self.handle_event)
+
+    def handle_event(self, event):
+        if event.get('op') == 'RESYNC':
+            # The first connect is not a gap; later reconnects may have lost events
+            with self._lock:
+                had_connection, self._had_connection = self._had_connection, True
+            if had_connection:
+                self.publish({'op': 'RESYNC'})
+            return
+
+        table = event.get('table')
+        message = {
+            'table': table,
+            'op': event.get('op'),
+            'key': event.get('key'),
+            'old_key': event.get('old_key'),
+        }
+        column = REFERENCES.get(table)
+        if column:
+            refs = {(row or {}).get(column) for row in (event.get('row'), event.get('old_row'))}
+            message['refs'] = sorted(code for code in refs if code)
+        self.publish(message)
+
+    def publish(self, message):
+        with self._lock:
+            self._seq += 1
+            item = (self._seq, message)
+            self._history.append(item)
+            clients = list(self._clients)
+        for client in clients:
+            try:
+                client.queue.put_nowait(item)
+            except queue.Full:
+                client.overflowed = True
+            if client.wake is not None:
+                client.wake()
+
+    # ------------------------------------------------------------------
+    # Consumer side (runs on the request thread)
+    # ------------------------------------------------------------------
+    def client_count(self):
+        return len(self._clients) if self._pid == os.getpid() else 0
+
+    def _format(self, seq, message):
+        return f"id: {self._token}:{seq}\ndata: {json.dumps(message)}\n\n"
+
+    def _replay(self, client, last_event_id):
+        """Events a reconnecting browser missed, or a RESYNC if they are gone"""
+        token, _, seq = (last_event_id or '').partition(':')
+        with self._lock:
+            history = list(self._history)
+            current = self._seq
+        client.after = current
+        if not last_event_id:
+            return []
+        if token != self._token or not seq.isdigit():
+            return [(current, {'op': 'RESYNC'})]
+        seq = int(seq)
+        if history and seq < history[0][0] - 1 or seq > current:
+            return [(current, {'op': 'RESYNC'})]
+        return [item for item in history if item[0] > seq]
+
+    def _open(self, last_event_id, wake=None):
+        """Register one browser: (client, frames to send first)"""
+        self._start()
+        client = _Client(Config.SSE_CLIENT_QUEUE_SIZE, wake)
+        with self._lock:
+            self._clients.add(client)
+        frames = [f"retry: {self.RETRY_MS}\n\n"]
+        frames.extend(self._format(seq, message) for seq, message in self._replay(client, last_event_id))
+        return client, frames
+
+    def _close(self, client):
+        with self._lock:
+            self._clients.discard(client)
+
+    def _resync_frame(self, client):
+        """A RESYNC for a client too slow to keep up (its backlog is dropped), else None"""
+        if not client.overflowed:
+            return None
+        while not client.queue.empty():
+            client.queue.get_nowait()
+        client.overflowed = False
+        client.after = self._seq
+        return self._format(client.after, {'op': 'RESYNC'})
+
+    def stream(self, last_event_id=None):
+        """Generator of SSE frames for one browser; ends when the client disconnects"""
+        client, frames = self._open(last_event_id)
+        try:
+            yield from frames
+            while True:
+                frame = self._resync_frame(client)
+                if frame:
+                    yield frame
+                try:
+                    seq, message = client.queue.get(timeout=Config.SSE_HEARTBEAT_SECONDS)
+                except queue.Empty:
+                    yield ": keep-alive\n\n"
+                    continue
+                if seq > client.after:
+                    yield self._format(seq, message)
+        finally:
+            self._close(client)
+
+    async def stream_async(self, last_event_id=None):
+        """Async generator of SSE frames for one browser, for the ASGI app"""
+        loop = asyncio.get_running_loop()
+        ready = asyncio.Event()
+        client, frames = self._open(last_event_id, wake=lambda: loop.call_soon_threadsafe(ready.set))
+        try:
+            for frame in frames:
+                yield frame
+            while True:
+                frame = self._resync_frame(client)
+                if frame:
+                    yield frame
+                try:
+                    seq, message = client.queue.get_nowait()
+                except queue.Empty:
+                    ready.clear()
+                    # An event queued between get_nowait() and clear() must not be slept through
+                    if client.queue.empty():
+                        try:
+                            await asyncio.wait_for(ready.wait(), Config.SSE_HEARTBEAT_SECONDS)
+                        except asyncio.TimeoutError:
+                            yield ": keep-alive\n\n"
+                    continue
+                if seq > client.after:
+                    yield self._format(seq, message)
+        finally:
+            self._close(client)
+
+event_broker = EventBroker()
@@ -0,0 +1,47 @@
+"""
+Process lifecycle hooks shared by the production launchers (server.py / wsgi.py).
+
+warm_up() runs once in the master after the app is preloaded, so every forked
+worker inherits compiled templates and filled reference caches copy-on-write.
+reinit_after_fork() runs in each worker before it accepts traffic and drops
+any network clients inherited from the master.
+"""
+import time
+from website.database import DatabaseManager
+from website import media
+from website.suggest import suggest_index
+
+def compile_templates(app):
+    """Load every Jinja template into the environment's cache"""
+    count = 0
+    for name in app.jinja_env.list_templates():
+        if name.endswith('.html'):
+            app.jinja_env.get_template(name)
+            count += 1
+    return count
+
+def warm_reference_cache():
+    """Fill the program/college caches used by almost every page"""
+    from website.models.programModels import ProgramModel
+    from website.models.collegeModels import CollegeModel
+
+    return len(ProgramModel.get_programs()), len(CollegeModel.get_colleges())
+
+def warm_up(app):
+    """Prepare a freshly loaded app before workers are forked from it"""
+    start = time.perf_counter()
+    with app.app_context():
+        templates = compile_templates(app)
+        programs, colleges = warm_reference_cache()
+        suggest_index.load()
+
+    # Workers must not share the master's Postgres sockets
+    DatabaseManager.close_pool()
+
+    elapsed = (time.perf_counter() - start) * 1000
+    print(f"🔥 Warm-up: {templates} templates compiled, {programs} programs / {colleges} colleges cached, suggestion index built ({elapsed:.0f} ms)")
+
+def reinit_after_fork():
+    """Re-create per-process clients in a newly forked worker"""
+    DatabaseManager.reset_pool()
+    media.reset_http()
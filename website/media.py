@@ -0,0 +1,226 @@
+"""
+Lazy Cloudinary access.
+
+The Cloudinary SDK (and its urllib3 pool) is only imported and configured the
+first time an image is actually uploaded or deleted, so app start-up and
+short-lived workers that never touch images don't pay for it.
+
+Templates never embed the original upload: avatar_img() / avatar_url() derive
+sized, f_auto,q_auto delivery URLs from the public ID in the stored URL.
+
+Browsers upload profile pictures straight to Cloudinary: direct_upload_params()
+issues a signed, constrained upload request and verify_direct_upload() checks
+the result the browser reports back before it is stored. Signing is done here
+with Cloudinary's algorithm, so an UploadSigner with a local secret works as a
+fake for exercising the flow without a Cloudinary account.
+"""
+import functools
+import hashlib
+import hmac
+import re
+import secrets
+import sys
+import threading
+import time
+from markupsafe import Markup, escape
+from config import Config
+
+_configured = False
+_lock = threading.Lock()
+
+def configure():
+    """Import and configure the Cloudinary SDK on first use"""
+    global _configured
+    if not _configured:
+        with _lock:
+            if not _configured:
+                import cloudinary
+                cloudinary.config(
+                    cloud_name=Config.CLOUDINARY_CLOUD_NAME,
+                    api_key=Config.CLOUDINARY_API_KEY,
+                    api_secret=Config.CLOUDINARY_API_SECRET
+                )
+                _configured = True
+
+def upload(file, **options):
+    """Upload a file to Cloudinary and return the API response"""
+    configure()
+    import cloudinary.uploader
+    return cloudinary.uploader.upload(file, **options)
+
+def destroy(public_id, **options):
+    """Delete an image from Cloudinary by public ID"""
+    configure()
+    import cloudinary.uploader
+    return cloudinary.uploader.destroy(public_id, **options)
+
+def reset_http():
+    """Give this process its own Cloudinary urllib3 pools after fork.
+
+    Nothing to do if the SDK hasn't been loaded yet; it will create fresh pools
+    on first use.
+    """
+    if 'cloudinary.uploader' not in sys.modules:
+        return
+    import cloudinary
+    from cloudinary import utils as cloudinary_utils
+    from cloudinary.api_client import call_api
+
+    sys.modules['cloudinary.uploader']._http = cloudinary_utils.get_http_connector(cloudinary.config(), cloudinary.CERT_KWARGS)
+    call_api._http = cloudinary_utils.get_http_connector(cloudinary.config(), cloudinary.CERT_KWARGS)
+
+# https://res.cloudinary.com/<cloud>/image/upload/[<transformations>/][v<version>/]<public_id>.<ext>
+_DELIVERY_URL = re.compile(
+    r"^https?://res\.cloudinary\.com/(?P<cloud>[^/]+)/image/upload/"
+    r"(?:(?:[a-z]{1,3}_[^/]*)/)*(?:v(?P<version>\d+)/)?(?P<public_id>.+?)(?:\.[A-Za-z0-9]+)?$"
+)
+
+# Device-pixel-ratio variants offered in each srcset
+AVATAR_DENSITIES = (1, 2, 3)
+
+def parse_delivery_url(url):
+    """(cloud_name, public_id, version) of a Cloudinary image URL, or None for any other URL"""
+    match = _DELIVERY_URL.match(url or '')
+    if not match:
+        return None
+    return match.group('cloud'), match.group('public_id'), match.group('version')
+
+@functools.lru_cache(maxsize=4096)
+def _avatar_urls(cloud_name, public_id, version, size):
+    """(src, srcset) for a square avatar of `size` CSS pixels; cached per public ID and size"""
+    from cloudinary.utils import cloudinary_url
+
+    def sized(pixels):
+        url, _ = cloudinary_url(
+            public_id, cloud_name=cloud_name, version=version, secure=True,
+            width=pixels, height=pixels, crop='fill', gravity='face',
+            fetch_format='auto', quality='auto',
+        )
+        return url
+
+    srcset = ", ".join(f"{sized(size * density)} {size * density}w" for density in AVATAR_DENSITIES)
+    return sized(size), srcset
+
+def avatar_url(url, size):
+    """A single sized URL for a stored profile picture (the original if it isn't on Cloudinary)"""
+    parsed = parse_delivery_url(url)
+    if parsed is None:
+        return url
+    try:
+        return _avatar_urls(*parsed, size)[0]
+    except Exception as e:
+        print(f"Failed to build avatar URL: {e}")
+        return url
+
+def avatar_img(url, size, alt='Profile', css_class=None, style=None):
+    """<img> for a profile picture: sized srcset, explicit dimensions, lazy loading"""
+    parsed = parse_delivery_url(url)
+    src, srcset = url, None
+    if parsed is not None:
+        try:
+            src, srcset = _avatar_urls(*parsed, size)
+        except Exception as e:
+            print(f"Failed to build avatar URLs: {e}")
+
+    attributes = [
+        f'src="{escape(src)}"',
+        f'srcset="{escape(srcset)}" sizes="{size}px"' if srcset else None,
+        f'width="{size}" height="{size}"',
+        f'alt="{escape(alt)}"',
+        f'class="{escape(css_class)}"' if css_class else None,
+        f'style="{escape(style)}"' if style else None,
+        'loading="lazy" decoding="async"',
+    ]
+    return Markup(f"<img {' '.join(filter(None, attributes))}>")
+
+class UploadSigner:
+    """Signs upload parameters and verifies upload responses (Cloudinary's api_sign_request algorithm)"""
+
+    def __init__(self, cloud_name, api_key, api_secret, algorithm='sha1'):
+        self.cloud_name = cloud_name
+        self.api_key = api_key
+        self.api_secret = api_secret
+        self.algorithm = algorithm
+
+    def sign(self, params):
+        """Signature of `params`: sorted key=value pairs joined by &, secret appended, hashed"""
+        to_sign = "&".join(
+            f"{key}={','.join(map(str, value)) if isinstance(value, (list, tuple)) else value}"
+            for key, value in sorted(params.items()) if value not in (None, '', [])
+        )
+        return hashlib.new(self.algorithm, (to_sign + self.api_secret).encode('utf-8')).hexdigest()
+
+    def verify_response(self, public_id, version, signature):
+        """Whether an upload response's signature was produced with our secret"""
+        expected = self.sign({'public_id': public_id, 'version': version})
+        return hmac.compare_digest(expected, str(signature or ''))
+
+_signer = None
+
+def upload_signer():
+    """The signer for the configured Cloudinary account, or None if uploads aren't configured"""
+    global _signer
+    if _signer is None and Config.CLOUDINARY_CLOUD_NAME and Config.CLOUDINARY_API_KEY and Config.CLOUDINARY_API_SECRET:
+        _signer = UploadSigner(Config.CLOUDINARY_CLOUD_NAME, Config.CLOUDINARY_API_KEY,
+                               Config.CLOUDINARY_API_SECRET, Config.CLOUDINARY_SIGNATURE_ALGORITHM)
+    return _signer
+
+DIRECT_UPLOAD_FORMATS = ('jpg', 'jpeg', 'png', 'gif', 'webp')
+
+def direct_upload_params(signer=None):
+    """Signed parameters for one browser upload into DIRECT_UPLOAD_FOLDER.
+
+    The signature fixes the folder, a random public ID, the allowed formats and
+    an incoming resize, so the browser can't use it to upload anything else.
+    """
+    signer = signer or upload_signer()
+    params = {
+        'timestamp': int(time.time()),
+        'folder': Config.DIRECT_UPLOAD_FOLDER,
+        'public_id': secrets.token_urlsafe(16),
+        'allowed_formats': ','.join(DIRECT_UPLOAD_FORMATS),
+        # Stored images never exceed this, whatever the browser sends
+        'transformation': f"c_limit,w_{Config.DIRECT_UPLOAD_MAX_DIMENSION},h_{Config.DIRECT_UPLOAD_MAX_DIMENSION}",
+    }
+    params['signature'] = signer.sign(params)
+    params['api_key'] = signer.api_key
+    return {
+        'upload_url': f"https://api.cloudinary.com/v1_1/{signer.cloud_name}/image/upload",
+        'params': params,
+        'max_bytes': Config.DIRECT_UPLOAD_MAX_BYTES,
+        'formats': list(DIRECT_UPLOAD_FORMATS),
+        'expires_at': params['timestamp'] + Config.DIRECT_UPLOAD_TTL_SECONDS,
+    }
+
+def verify_direct_upload(result, signer=None):
+    """Check an upload result reported by the browser; the delivery URL to store, or ValueError.
+
+    The response signature covers public_id and version (the upload's Unix
+    time), so a result that verifies was really uploaded with one of our
+    signatures, recently; format and size are then checked against the limits.
+    """
+    signer = signer or upload_signer()
+    if not isinstance(result, dict):
+        raise ValueError('Missing upload result')
+    public_id = str(result.get('public_id') or '')
+    version = str(result.get('version') or '')
+    image_format = str(result.get('format') or '').lower()
+
+    if not signer.verify_response(public_id, version, result.get('signature')):
+        raise ValueError('Upload signature does not match')
+    if not public_id.startswith(Config.DIRECT_UPLOAD_FOLDER + '/'):
+        raise ValueError('Upload is outside the profile picture folder')
+    if not version.isdigit() or time.time() - int(version) > Config.DIRECT_UPLOAD_TTL_SECONDS:
+        raise ValueError('Upload result has expired')
+    if image_format not in DIRECT_UPLOAD_FORMATS:
+        raise ValueError('Invalid image format')
+    # Reported by the browser (not signed); the signed c_limit transformation is
+    # what bounds what Cloudinary actually stores
+    try:
+        size = int(result.get('bytes'))
+    except (TypeError, ValueError):
+        raise ValueError('Missing upload size')
+    if size > Config.DIRECT_UPLOAD_MAX_BYTES:
+        raise ValueError(f'File size exceeds {Config.DIRECT_UPLOAD_MAX_BYTES // (1024 * 1024)}MB limit')
+
+    return f"https://res.cloudinary.com/{signer.cloud_name}/image/upload/v{version}/{public_id}.{image_format}"
@@ -0,0 +1,106 @@
+from website.database import DatabaseManager, read_only
+from website.budgets import budget
+from website.cache import VersionedCache
+from website.models.studentModels import StudentModel
+
+class AnalyticsModel:
+    # Public dimension name -> SQL expression
+    DIMENSIONS = {
+        'college': 'college.code',
+        'program': 'program.code',
+        'year': 'student.year',
+        'gender': 'student.gender',
+        # Enrollment year, the YYYY prefix of the student ID
+        'cohort': 'left(student.id, 4)',
+    }
+
+    # How subtotal rows are produced
+    TOTALS = ('rollup', 'marginals', 'none')
+
+    _cache = VersionedCache(max_entries=256)
+
+    @classmethod
+    @read_only
+    def get_table_versions(cls):
+        """Current (student, program, college) versions, or None if not tracked"""
+        try:
+            with DatabaseManager.get_cursor() as (cur, conn):
+                cur.execute("SELECT table_name, version FROM table_version")
+                versions = {row['table_name']: row['version'] for row in cur.fetchall()}
+                return tuple(versions.get(name) for name in ('student', 'program', 'college'))
+        except Exception as e:
+            return None
+
+    @classmethod
+    def _group_by_clause(cls, columns, totals):
+        column_list = ", ".join(columns)
+        if totals == 'rollup':
+            return f"GROUP BY ROLLUP ({column_list})"
+        if totals == 'marginals':
+            # Full breakdown, one total per dimension, and the grand total
+            sets = [f"({column_list})"] + [f"({column})" for column in columns] + ["()"]
+            return f"GROUP BY GROUPING SETS ({', '.join(dict.fromkeys(sets))})"
+        return f"GROUP BY {column_list}"
+
+    @classmethod
+    def _run_enrollment_query(cls, group_by, filters, totals):
+        columns = [cls.DIMENSIONS[name] for name in group_by]
+
+        where = []
+        params = []
+        for name, values in filters.items():
+            if name == 'cohort':
+                # ID ranges rather than left(id, 4), so only those years' partitions are scanned
+                bounds = [StudentModel.enrollment_year_bounds(value) for value in values]
+                where.append("(" + " OR ".join(["(student.id >= %s AND student.id < %s)"] * len(bounds)) + ")")
+                params.extend(bound for pair in bounds for bound in pair)
+                continue
+            where.append(f"{cls.DIMENSIONS[name]}::text = ANY(%s)")
+            params.append(list(values))
+        where_clause = f"WHERE {' AND '.join(where)}" if where else ""
+
+        select_columns = "".join(f"{column} AS {name}, " for name, column in zip(group_by, columns))
+        grouping = f"GROUPING({', '.join(columns)})" if columns else "0"
+        group_clause = cls._group_by_clause(columns, totals) if columns else ""
+        order_clause = f"ORDER BY {', '.join(f'{column} NULLS LAST' for column in columns)}" if columns else ""
+
+        with DatabaseManager.get_cursor() as (cur, conn):
+            cur.execute(f"""
+                SELECT {select_columns}COUNT(*) AS count, {grouping} AS level
+                FROM student
+                INNER JOIN program ON student.program_code = program.code
+                INNER JOIN college ON program.college_code = college.code
+                {where_clause}
+                {group_clause}
+                {order_clause}
+            """, params)
+            rows = cur.fetchall()
+
+        # Columnar layout: one array per column instead of one object per row
+        data = {name: [row[name] for row in rows] for name in group_by}
+        data['count'] = [row['count'] for row in rows]
+        data['level'] = [row['level'] for row in rows]
+        return {'dimensions': list(group_by), 'rows': len(rows), 'columns': data}
+
+    @classmethod
+    @read_only
+    @budget(statement_ms=4000)
+    def get_enrollment_breakdown(cls, group_by, filters=None, totals='rollup'):
+        """Student counts grouped by the given dimensions, aggregated in Postgres.
+
+        `level` is the GROUPING() bitmask of each row: 0 for a full breakdown
+        row, non-zero for subtotal rows (bit set = dimension rolled up).
+        """
+        filters = filters or {}
+        try:
+            versions = cls.get_table_versions()
+            loader = lambda: cls._run_enrollment_query(group_by, filters, totals)
+            if versions is None:
+                result = loader()
+            else:
+                key = (versions, tuple(group_by), tuple(sorted((k, tuple(sorted(v))) for k, v in filters.items())), totals)
+                result = cls._cache.get(key, loader)
+            return dict(result, version=versions)
+        except Exception as e:
+            print(f"Failed to compute enrollment breakdown: {str(e)}")
+            return None
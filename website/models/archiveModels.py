@@ -0,0 +1,131 @@
+import re
+from psycopg2 import errors
+from config import Config
+from website.database import DatabaseManager, read_only, read_write
+from website.budgets import budget, QueryTimeout
+from website.suggest import suggest_index
+
+class ArchiveModel:
+    """Reads and restores of student_archive (see migrate_student_archive.sql, website/archive.py)"""
+
+    COLUMNS = "id, firstname, lastname, program_code, year, gender, profile_pic_url"
+    ID_PATTERN = re.compile(r'\d{4}-\d{4}', re.ASCII)
+
+    @classmethod
+    def is_valid_id(cls, student_id):
+        """True if `student_id` has the YYYY-NNNN shape of a student ID"""
+        return bool(cls.ID_PATTERN.fullmatch(student_id or ''))
+
+    @classmethod
+    def moved_columns(cls):
+        """Columns moved between student and student_archive (profile_pic_hash exists after migrate_picture_dedup.sql)"""
+        return cls.COLUMNS + (", profile_pic_hash" if Config.PICTURE_DEDUP_ENABLED else "")
+
+    SEARCH_CONDITION = """
+        (student_archive.id ILIKE %s
+        OR student_archive.firstname ILIKE %s
+        OR student_archive.lastname ILIKE %s
+        OR student_archive.program_code ILIKE %s
+        OR program.name ILIKE %s)
+    """
+
+    @classmethod
+    @read_only
+    @budget(statement_ms=2000)
+    def search_students(cls, search_query='', after_id=None, limit=50):
+        """One page of archived students in ID order, optionally filtered, starting after `after_id`"""
+        search_query = (search_query or '').strip()
+        conditions, params = [], []
+        if search_query:
+            conditions.append(cls.SEARCH_CONDITION)
+            params.extend([f"%{search_query}%"] * 5)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        page_conditions = conditions + (["student_archive.id > %s"] if after_id else [])
+        page_where = f"WHERE {' AND '.join(page_conditions)}" if page_conditions else ""
+        try:
+            with DatabaseManager.get_cursor() as (cur, conn):
+                cur.execute(f"""
+                    SELECT student_archive.id, student_archive.firstname, student_archive.lastname,
+                           student_archive.program_code, student_archive.year, student_archive.gender,
+                           student_archive.profile_pic_url, student_archive.archive_reason,
+                           student_archive.archived_at,
+                           program.name AS program_name, program.college_code
+                    FROM student_archive
+                    LEFT JOIN program ON program.code = student_archive.program_code
+                    {page_where}
+                    ORDER BY student_archive.id ASC
+                    LIMIT %s
+                """, params + ([after_id] if after_id else []) + [limit + 1])
+                rows = [dict(row) for row in cur.fetchall()]
+
+                cur.execute(f"""
+                    SELECT COUNT(*) AS count
+                    FROM student_archive
+                    LEFT JOIN program ON program.code = student_archive.program_code
+                    {where}
+                """, params)
+                total_count = cur.fetchone()['count']
+
+            results = rows[:limit]
+            return {
+                'results': results,
+                'total_count': total_count,
+                'next_after': results[-1]['id'] if len(rows) > limit else None,
+            }
+        except Exception as e:
+            print(f"Failed to search archived students: {str(e)}")
+            return None
+
+    @classmethod
+    @read_only
+    def count_students(cls):
+        try:
+            with DatabaseManager.get_cursor() as (cur, conn):
+                cur.execute("SELECT COUNT(*) AS count FROM student_archive")
+                return cur.fetchone()['count']
+        except Exception as e:
+            return None
+
+    @classmethod
+    @read_write
+    @budget(statement_ms=5000, lock_ms=2000)
+    def restore_student(cls, student_id):
+        """Move one archived student back into the live table.
+
+        On failure, 'error' says why: 'invalid' (not a YYYY-NNNN ID), 'not_found',
+        'conflict' (the ID is live again, or its program is gone) or 'failed'.
+        """
+        not_found = {"success": False, "error": "not_found", "message": f"Archived student {student_id} not found"}
+        if not cls.is_valid_id(student_id):
+            return {"success": False, "error": "invalid", "message": f"Invalid student ID {student_id!r}; expected YYYY-NNNN"}
+        try:
+            with DatabaseManager.get_cursor() as (cur, conn):
+                # Lock the archived row first, so a missing ID never creates a partition
+                cur.execute("SELECT 1 FROM student_archive WHERE id = %s FOR UPDATE", (student_id,))
+                if cur.fetchone() is None:
+                    return not_found
+                # The year's partition may have been detached or dropped since
+                cur.execute("SELECT ensure_student_partition(left(%s, 4)::int)", (student_id,))
+                columns = cls.moved_columns()
+                cur.execute(f"""
+                    WITH restored AS (
+                        DELETE FROM student_archive WHERE id = %s
+                        RETURNING {columns}
+                    )
+                    INSERT INTO student ({columns})
+                    SELECT {columns} FROM restored
+                    RETURNING id, firstname, lastname, program_code
+                """, (student_id,))
+                restored = cur.fetchone()
+            if restored is None:
+                return not_found
+            suggest_index.upsert_student(restored['id'], restored['firstname'], restored['lastname'])
+            return {"success": True, "message": f"Student {student_id} restored"}
+        except QueryTimeout:
+            raise
+        except errors.UniqueViolation:
+            return {"success": False, "error": "conflict", "message": f"A live student with ID {student_id} already exists"}
+        except errors.ForeignKeyViolation:
+            return {"success": False, "error": "conflict", "message": f"The program of student {student_id} no longer exists; recreate it first"}
+        except Exception as e:
+            return {"success": False, "error": "failed", "message": f"Failed to restore student: {str(e)}"}
@@ -0,0 +1,59 @@
+from website.async_database import AsyncDatabaseManager
+from website.budgets import QueryTimeout
+
+class AsyncPictureModel:
+    """Async counterparts of the PictureModel queries used by the ASGI upload handler"""
+
+    @classmethod
+    async def get_by_hash(cls, content_hash):
+        try:
+            async with AsyncDatabaseManager.get_connection() as conn:
+                row = await conn.fetchrow(
+                    "SELECT content_hash, public_id, url, bytes, ref_count FROM picture_asset WHERE content_hash = $1",
+                    content_hash
+                )
+                return dict(row) if row else None
+        except QueryTimeout:
+            raise
+        except Exception as e:
+            print(f"⚠️  Picture lookup failed: {e}")
+            return None
+
+    @classmethod
+    async def register(cls, content_hash, public_id, url, size=None):
+        try:
+            async with AsyncDatabaseManager.get_connection() as conn:
+                row = await conn.fetchrow("""
+                    INSERT INTO picture_asset (content_hash, public_id, url, bytes)
+                    VALUES ($1, $2, $3, $4)
+                    ON CONFLICT (content_hash) DO NOTHING
+                    RETURNING content_hash, public_id, url, bytes, ref_count
+                """, content_hash, public_id, url, size)
+                if row is None:
+                    row = await conn.fetchrow(
+                        "SELECT content_hash, public_id, url, bytes, ref_count FROM picture_asset WHERE content_hash = $1",
+                        content_hash
+                    )
+                return dict(row) if row else None
+        except Exception as e:
+            print(f"⚠️  Could not register picture {public_id}: {e}")
+            return None
+
+    @classmethod
+    async def release(cls, url):
+        try:
+            async with AsyncDatabaseManager.get_connection() as conn:
+                row = await conn.fetchrow("""
+                    WITH dropped AS (
+                        DELETE FROM picture_asset WHERE url = $1 AND ref_count = 0
+                        RETURNING public_id
+                    )
+                    SELECT (SELECT public_id FROM dropped) AS public_id,
+                           EXISTS (SELECT 1 FROM picture_asset WHERE url = $1) AS tracked
+                """, url)
+                if row['public_id']:
+                    return 'unreferenced', row['public_id']
+                return ('shared' if row['tracked'] else 'untracked'), None
+        except Exception as e:
+            print(f"⚠️  Could not release picture {url}: {e}")
+            return 'shared', None
@@ -0,0 +1,70 @@
+from website.async_database import AsyncDatabaseManager
+from website.budgets import QueryTimeout
+from config import Config
+
+class AsyncStudentModel:
+    """Async counterparts of the StudentModel queries used by the ASGI hot paths"""
+
+    @classmethod
+    async def get_students(cls, page_size: int, page_number: int):
+        offset = (page_number - 1) * page_size
+        try:
+            async with AsyncDatabaseManager.get_connection() as conn:
+                rows = await conn.fetch("""
+                    SELECT student.id, student.firstname, student.lastname,
+                        student.program_code, student.year, student.gender,
+                        student.profile_pic_url,
+                        program.name AS program_name, program.code AS program_code,
+                        college.name AS college_name, college.code AS college_code
+                    FROM student
+                    INNER JOIN program ON student.program_code = program.code
+                    INNER JOIN college ON program.college_code = college.code
+                    ORDER BY student.id ASC
+                    LIMIT $1 OFFSET $2
+                """, page_size, offset)
+
+                results = [dict(row) for row in rows]
+                total_count = await conn.fetchval("SELECT COUNT(*) FROM student")
+
+                return {
+                    'results': results,
+                    'total_count': total_count,
+                    'has_prev': offset > 0,
+                    'has_next': (offset + page_size) < total_count
+                }
+        except QueryTimeout:
+            raise
+        except Exception as e:
+            return f"Failed to retrieve students: {str(e)}"
+
+    @classmethod
+    async def get_student_profile_pic_url(cls, student_id):
+        try:
+            async with AsyncDatabaseManager.get_connection() as conn:
+                return await conn.fetchval("SELECT profile_pic_url FROM student WHERE id = $1", student_id)
+        except QueryTimeout:
+            raise
+        except Exception as e:
+            return None
+
+    @classmethod
+    async def update_student_profile_pic(cls, student_id, profile_pic_url, content_hash=None):
+        try:
+            async with AsyncDatabaseManager.get_connection() as conn:
+                if Config.PICTURE_DEDUP_ENABLED:
+                    status = await conn.execute(
+                        "UPDATE student SET profile_pic_url = $1, profile_pic_hash = $2 WHERE id = $3",
+                        profile_pic_url, content_hash, student_id
+                    )
+                else:
+                    status = await conn.execute(
+                        "UPDATE student SET profile_pic_url = $1 WHERE id = $2",
+                        profile_pic_url, student_id
+                    )
+            if status == "UPDATE 0":
+                return f"Failed to update profile picture: student {student_id} not found"
+            return "Profile picture updated successfully"
+        except QueryTimeout:
+            raise
+        except Exception as e:
+            return f"Failed to update profile picture: {str(e)}"
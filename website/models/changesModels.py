@@ -0,0 +1,100 @@
+import base64
+import json
+from website.database import DatabaseManager
+from website.budgets import QueryTimeout
+
+class ChangesModel:
+    # Synced tables -> key column (see migrate_row_versions.sql)
+    TABLES = {
+        'college': 'code',
+        'program': 'code',
+        'student': 'id',
+    }
+
+    @classmethod
+    def encode_cursor(cls, row_version, table_name, key):
+        raw = json.dumps([row_version, table_name, key]).encode('utf-8')
+        return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+    @classmethod
+    def decode_since(cls, token):
+        """(row_version, table_name, key) to resume after; a plain version means after all of it (None, None)"""
+        token = (token or '0').strip()
+        if token.isdigit():
+            return int(token), None, None
+        try:
+            padded = token + '=' * (-len(token) % 4)
+            row_version, table_name, key = json.loads(base64.urlsafe_b64decode(padded))
+            return int(row_version), str(table_name), str(key)
+        except Exception:
+            raise ValueError("Invalid 'since' token")
+
+    @classmethod
+    def get_changes(cls, since, limit):
+        """Rows changed (or deleted) after `since`, in row_version order.
+
+        Only versions below the current snapshot's xmin are returned; every
+        transaction below it has finished, so nothing can later appear in a
+        range a client has already consumed. `next` is the token to pass as
+        ?since= on the following call.
+        """
+        row_version, table_name, key = cls.decode_since(since)
+        # Within a version rows are ordered by the database's collation, so a plain version is
+        # skipped with a version bound rather than a sentinel name that must sort last
+        resume = ("(row_version, table_name, key) > (%(version)s, %(table_name)s, %(key)s)"
+                  if table_name is not None else "row_version > %(version)s")
+        branches = [
+            f"""SELECT '{name}' AS table_name, {column} AS key, 'upsert' AS op,
+                       row_version, updated_at AS changed_at, to_jsonb({name}) AS row
+                FROM {name}
+                WHERE row_version >= %(version)s AND row_version < (SELECT upper FROM horizon)"""
+            for name, column in cls.TABLES.items()
+        ]
+        branches.append("""SELECT table_name, key, 'delete' AS op,
+                       row_version, deleted_at AS changed_at, NULL AS row
+                FROM row_tombstone
+                WHERE row_version >= %(version)s AND row_version < (SELECT upper FROM horizon)""")
+
+        try:
+            with DatabaseManager.get_cursor() as (cur, conn):
+                cur.execute(f"""
+                    WITH horizon AS (
+                        SELECT pg_snapshot_xmin(pg_current_snapshot())::text::bigint AS upper
+                    )
+                    SELECT changes.*, (SELECT upper FROM horizon) AS upper
+                    FROM ({' UNION ALL '.join(branches)}) AS changes
+                    WHERE {resume}
+                    ORDER BY row_version, table_name, key
+                    LIMIT %(limit)s
+                """, {'version': row_version, 'table_name': table_name, 'key': key, 'limit': limit + 1})
+                rows = cur.fetchall()
+
+                if not rows:
+                    cur.execute("SELECT pg_snapshot_xmin(pg_current_snapshot())::text::bigint AS upper")
+                    upper = cur.fetchone()['upper']
+                else:
+                    upper = rows[0]['upper']
+        except QueryTimeout:
+            raise
+        except Exception as e:
+            print(f"Failed to fetch changes: {str(e)}")
+            return None
+
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        changes = [{
+            'table': row['table_name'],
+            'op': row['op'],
+            'key': row['key'],
+            'row_version': row['row_version'],
+            'changed_at': row['changed_at'].isoformat(),
+            'row': row['row'],
+        } for row in rows]
+
+        if has_more:
+            last = rows[-1]
+            next_token = cls.encode_cursor(last['row_version'], last['table_name'], last['key'])
+        else:
+            # Caught up: everything below the horizon has been returned
+            next_token = str(max(upper - 1, row_version))
+        return {'changes': changes, 'next': next_token, 'has_more': has_more}
@@ -1,44 +1,63 @@
-from website.database import DatabaseManager
+from website.database import DatabaseManager, read_only, read_write
+from website.budgets import budget
+from website.cache import ReferenceCache
+from website.suggest import suggest_index
 
 class CollegeModel:
     @classmethod
+    @read_write
     def create_college(cls, name, code):
         try:
             with DatabaseManager.get_cursor() as (cur, conn):
                 cur.execute("INSERT INTO college (code, name) VALUES (%s, %s)", (code, name))
+            ReferenceCache.invalidate('colleges', 'programs')
+            suggest_index.upsert_college(code, name)
             return "College created successfully"
         except Exception as e:
             return f"Failed to create college: {str(e)}"
 
     @classmethod
+    @read_only
     def get_colleges(cls):
         try:
-            with DatabaseManager.get_cursor() as (cur, conn):
-                cur.execute("SELECT code, name FROM college ORDER BY code")
-                colleges = cur.fetchall()
-                return [dict(row) for row in colleges]
+            return ReferenceCache.get('colleges', cls._fetch_colleges)
         except Exception as e:
             return []
 
     @classmethod
+    def _fetch_colleges(cls):
+        with DatabaseManager.get_cursor() as (cur, conn):
+            cur.execute("SELECT code, name FROM college ORDER BY code")
+            colleges = cur.fetchall()
+            return [dict(row) for row in colleges]
+
+    @classmethod
+    @read_write
+    @budget(statement_ms=10000, lock_ms=5000)
     def delete_college(cls, code):
         try:
             with DatabaseManager.get_cursor() as (cur, conn):
                 cur.execute("DELETE FROM college WHERE code = %s", (code,))
+            ReferenceCache.invalidate('colleges', 'programs')
+            suggest_index.invalidate()
             return "College and its courses deleted successfully"
         except Exception as e:
             return f"Failed to delete college: {str(e)}"
 
     @classmethod
+    @read_write
     def update_college(cls, code, new_name):
         try:
             with DatabaseManager.get_cursor() as (cur, conn):
                 cur.execute("UPDATE college SET name = %s WHERE code = %s", (new_name, code))
+            ReferenceCache.invalidate('colleges', 'programs')
+            suggest_index.upsert_college(code, new_name)
             return "College updated successfully"
         except Exception as e:
             return f"Failed to update college: {str(e)}"
         
     @classmethod
+    @read_only
     def search_colleges(cls, search_query):
         try:
             with DatabaseManager.get_cursor() as (cur, conn):
@@ -52,6 +71,7 @@ class CollegeModel:
             return []
 
     @classmethod
+    @read_only
     def get_college_with_details(cls, college_code):
         """Get a single college by code"""
         try:
@@ -64,6 +84,7 @@ class CollegeModel:
             return None
 
     @classmethod
+    @read_only
     def get_college_programs(cls, college_code):
         """Get all programs under a specific college"""
         try:
@@ -78,4 +99,27 @@ class CollegeModel:
                 return [dict(row) for row in results]
         except Exception as e:
             print(f"Failed to retrieve college programs: {str(e)}")
-            return []
\ No newline at end of file
+            return []
+
+    @classmethod
+    @read_only
+    def get_college_rows(cls, college_codes, program_codes=()):
+        """The given colleges and those owning the given programs, with program and student counts"""
+        try:
+            with DatabaseManager.get_cursor() as (cur, conn):
+                cur.execute("""
+                    SELECT college.code, college.name,
+                           COUNT(DISTINCT program.code) AS program_count,
+                           COUNT(student.id) AS student_count
+                    FROM college
+                    LEFT JOIN program ON program.college_code = college.code
+                    LEFT JOIN student ON student.program_code = program.code
+                    WHERE college.code = ANY(%s)
+                       OR college.code IN (SELECT college_code FROM program WHERE code = ANY(%s))
+                    GROUP BY college.code, college.name
+                    ORDER BY college.code
+                """, (list(college_codes), list(program_codes)))
+                return [dict(row) for row in cur.fetchall()]
+        except Exception as e:
+            print(f"Failed to retrieve college rows: {str(e)}")
+            return []
@@ -0,0 +1,131 @@
+import threading
+import time
+from psycopg2 import errors
+from config import Config
+from website.database import DatabaseManager, read_write
+from website.budgets import QueryTimeout
+
+class PictureModel:
+    """Content hash -> Cloudinary asset index (see migrate_picture_dedup.sql)"""
+
+    # Claims recorded in this process while direct_upload_claim doesn't exist yet
+    _local_claims = {}
+    _local_claims_lock = threading.Lock()
+
+    # Untagged (primary): a replica could miss an asset that was just registered
+    @classmethod
+    def get_by_hash(cls, content_hash):
+        try:
+            with DatabaseManager.get_cursor() as (cur, conn):
+                cur.execute(
+                    "SELECT content_hash, public_id, url, bytes, ref_count FROM picture_asset WHERE content_hash = %s",
+                    (content_hash,)
+                )
+                result = cur.fetchone()
+                return dict(result) if result else None
+        except QueryTimeout:
+            raise
+        except Exception as e:
+            print(f"⚠️  Picture lookup failed: {e}")
+            return None
+
+    @classmethod
+    @read_write
+    def register(cls, content_hash, public_id, url, size=None):
+        """Record a freshly uploaded asset; returns the asset row for this hash.
+
+        If another request registered the same content first, its row is
+        returned instead and the caller's upload is redundant.
+        """
+        try:
+            with DatabaseManager.get_cursor() as (cur, conn):
+                cur.execute("""
+                    INSERT INTO picture_asset (content_hash, public_id, url, bytes)
+                    VALUES (%s, %s, %s, %s)
+                    ON CONFLICT (content_hash) DO NOTHING
+                    RETURNING content_hash, public_id, url, bytes, ref_count
+                """, (content_hash, public_id, url, size))
+                result = cur.fetchone()
+                if result is None:
+                    cur.execute(
+                        "SELECT content_hash, public_id, url, bytes, ref_count FROM picture_asset WHERE content_hash = %s",
+                        (content_hash,)
+                    )
+                    result = cur.fetchone()
+                return dict(result) if result else None
+        except Exception as e:
+            print(f"⚠️  Could not register picture {public_id}: {e}")
+            return None
+
+    @classmethod
+    @read_write
+    def release(cls, url):
+        """Forget the asset behind `url` if no student uses it any more.
+
+        Returns ('unreferenced', public_id) when the asset was dropped from the
+        index and should be deleted, ('shared', None) while other students
+        still use it, and ('untracked', None) for pictures that were never
+        indexed (uploaded before dedup, or straight from the browser).
+        """
+        try:
+            with DatabaseManager.get_cursor() as (cur, conn):
+                cur.execute("""
+                    WITH dropped AS (
+                        DELETE FROM picture_asset WHERE url = %s AND ref_count = 0
+                        RETURNING public_id
+                    )
+                    SELECT (SELECT public_id FROM dropped) AS public_id,
+                           EXISTS (SELECT 1 FROM picture_asset WHERE url = %s) AS tracked
+                """, (url, url))
+                result = cur.fetchone()
+                if result['public_id']:
+                    return 'unreferenced', result['public_id']
+                return ('shared' if result['tracked'] else 'untracked'), None
+        except Exception as e:
+            # Still referenced (FK) or the index is unavailable: keep the asset
+            print(f"⚠️  Could not release picture {url}: {e}")
+            return 'shared', None
+
+    @classmethod
+    @read_write
+    def prune_unreferenced(cls, older_than_seconds):
+        """Drop assets no student has used for a while (e.g. after cascaded deletes); their public IDs"""
+        try:
+            with DatabaseManager.get_cursor() as (cur, conn):
+                cur.execute("""
+                    DELETE FROM picture_asset
+                    WHERE ref_count = 0 AND created_at < now() - make_interval(secs => %s)
+                    RETURNING public_id
+                """, (older_than_seconds,))
+                return [row['public_id'] for row in cur.fetchall()]
+        except Exception as e:
+            print(f"⚠️  Could not prune pictures: {e}")
+            return []
+
+    @classmethod
+    @read_write
+    def claim_direct_upload(cls, public_id):
+        """Record that a direct upload is being attached: False if it already was (see migrate_direct_upload_claims.sql)"""
+        try:
+            with DatabaseManager.get_cursor() as (cur, conn):
+                # Older results have expired anyway, so their claims needn't be kept
+                cur.execute(
+                    "DELETE FROM direct_upload_claim WHERE claimed_at < now() - make_interval(secs => %s)",
+                    (Config.DIRECT_UPLOAD_TTL_SECONDS,)
+                )
+                cur.execute(
+                    "INSERT INTO direct_upload_claim (public_id) VALUES (%s) ON CONFLICT (public_id) DO NOTHING RETURNING public_id",
+                    (public_id,)
+                )
+                return cur.fetchone() is not None
+        except errors.UndefinedTable:
+            print("⚠️  direct_upload_claim is missing (run migrate_direct_upload_claims.sql); claims are per process")
+            now = time.time()
+            with cls._local_claims_lock:
+                for claimed, claimed_at in list(cls._local_claims.items()):
+                    if now - claimed_at > Config.DIRECT_UPLOAD_TTL_SECONDS:
+                        del cls._local_claims[claimed]
+                if public_id in cls._local_claims:
+                    return False
+                cls._local_claims[public_id] = now
+                return True
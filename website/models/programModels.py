@@ -1,50 +1,69 @@
-from website.database import DatabaseManager
+from website.database import DatabaseManager, read_only, read_write
+from website.budgets import budget
+from website.cache import ReferenceCache
+from website.suggest import suggest_index
 
 class ProgramModel:
     @classmethod
+    @read_write
     def create_program(cls, name, code, college_code):
         try:
             with DatabaseManager.get_cursor() as (cur, conn):
                 cur.execute("INSERT INTO program (code, name, college_code) VALUES (%s, %s, %s)", (code, name, college_code))
+            ReferenceCache.invalidate('programs')
+            suggest_index.upsert_program(code, name)
             return "Program created successfully"
         except Exception as e:
             return f"Failed to create program: {str(e)}"
     
     @classmethod
+    @read_only
     def get_programs(cls):
         try:
-            with DatabaseManager.get_cursor() as (cur, conn):
-                cur.execute("""
-                    SELECT program.code AS program_code, program.name AS program_name, 
-                           college.code AS college_code, college.name AS college_name 
-                    FROM program 
-                    INNER JOIN college ON program.college_code = college.code 
-                    ORDER BY program.code
-                """)
-                programs = cur.fetchall()
-                return [dict(row) for row in programs]
+            return ReferenceCache.get('programs', cls._fetch_programs)
         except Exception as e:
             return []
 
     @classmethod
+    def _fetch_programs(cls):
+        with DatabaseManager.get_cursor() as (cur, conn):
+            cur.execute("""
+                SELECT program.code AS program_code, program.name AS program_name, 
+                       college.code AS college_code, college.name AS college_name 
+                FROM program 
+                INNER JOIN college ON program.college_code = college.code 
+                ORDER BY program.code
+            """)
+            programs = cur.fetchall()
+            return [dict(row) for row in programs]
+
+    @classmethod
+    @read_write
     def update_program(cls, code, new_name, college_code):
         try:
             with DatabaseManager.get_cursor() as (cur, conn):
                 cur.execute("UPDATE program SET name = %s, college_code = %s WHERE code = %s", (new_name, college_code, code))
+            ReferenceCache.invalidate('programs')
+            suggest_index.upsert_program(code, new_name)
             return "Program updated successfully"
         except Exception as e:
             return f"Failed to update program: {str(e)}"
 
     @classmethod
+    @read_write
+    @budget(statement_ms=10000, lock_ms=5000)
     def delete_program(cls, code):
         try:
             with DatabaseManager.get_cursor() as (cur, conn):
                 cur.execute("DELETE FROM program WHERE code = %s", (code,))
+            ReferenceCache.invalidate('programs')
+            suggest_index.invalidate()
             return "Program and its students deleted successfully"
         except Exception as e:
             return f"Failed to delete program: {str(e)}"
 
     @classmethod
+    @read_only
     def search_programs(cls, search_query):
         try:
             with DatabaseManager.get_cursor() as (cur, conn):
@@ -65,6 +84,7 @@ class ProgramModel:
             return []
 
     @classmethod
+    @read_only
     def get_program_with_details(cls, program_code):
         """Get a single program with college details"""
         try:
@@ -81,3 +101,41 @@ class ProgramModel:
         except Exception as e:
             print(f"Failed to retrieve program: {str(e)}")
             return None
+
+    @classmethod
+    @read_only
+    def get_program_rows(cls, program_codes):
+        """The given programs with college details and student counts"""
+        try:
+            with DatabaseManager.get_cursor() as (cur, conn):
+                cur.execute("""
+                    SELECT program.code AS program_code, program.name AS program_name,
+                           college.code AS college_code, college.name AS college_name,
+                           COUNT(student.id) AS student_count
+                    FROM program
+                    INNER JOIN college ON program.college_code = college.code
+                    LEFT JOIN student ON student.program_code = program.code
+                    WHERE program.code = ANY(%s)
+                    GROUP BY program.code, program.name, college.code, college.name
+                    ORDER BY program.code
+                """, (list(program_codes),))
+                return [dict(row) for row in cur.fetchall()]
+        except Exception as e:
+            print(f"Failed to retrieve program rows: {str(e)}")
+            return []
+
+    @classmethod
+    @read_only
+    def get_student_counts(cls, program_codes):
+        """Number of students in each of the given programs"""
+        try:
+            with DatabaseManager.get_cursor() as (cur, conn):
+                cur.execute("""
+                    SELECT program_code, COUNT(*) AS student_count FROM student
+                    WHERE program_code = ANY(%s)
+                    GROUP BY program_code
+                """, (list(program_codes),))
+                return {row['program_code']: row['student_count'] for row in cur.fetchall()}
+        except Exception as e:
+            print(f"Failed to count students by program: {str(e)}")
+            return {}
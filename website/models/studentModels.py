@@ -1,7 +1,95 @@
-from website.database import DatabaseManager
+from website.database import DatabaseManager, read_only, read_write
+from website.budgets import budget, QueryTimeout
+from website.suggest import suggest_index
+from website.roster import roster
+from website.statements import statements
 from datetime import datetime
+from config import Config
 
 class StudentModel:
+    # Labels of the year_level / gender_type enums (see migrate_student_enums.py).
+    # Forms and templates use these strings; Postgres stores them as 4-byte enums.
+    YEAR_LEVELS = ('1st Year', '2nd Year', '3rd Year', '4th Year', '5th Year')
+    GENDERS = ('Male', 'Female')
+
+    # Hot read queries, PREPAREd once per pooled connection (see website/statements.py)
+    DETAILS_QUERY = """
+        SELECT student.id, student.firstname, student.lastname,
+            student.program_code, student.year, student.gender,
+            student.profile_pic_url,
+            program.name AS program_name, program.code AS program_code,
+            college.name AS college_name, college.code AS college_code
+        FROM student
+        INNER JOIN program ON student.program_code = program.code
+        INNER JOIN college ON program.college_code = college.code
+    """
+    statements.register('student_all', DETAILS_QUERY + "ORDER BY student.id ASC")
+    statements.register('student_by_program', DETAILS_QUERY + "WHERE student.program_code = %s ORDER BY student.id ASC")
+    statements.register('student_by_college', DETAILS_QUERY + "WHERE college.code = %s ORDER BY program.code ASC, student.id ASC")
+    statements.register('student_program_page', DETAILS_QUERY + "WHERE student.program_code = %s AND student.id > %s ORDER BY student.id ASC LIMIT %s")
+    statements.register('student_details_by_id', DETAILS_QUERY + "WHERE student.id = %s")
+    SEARCH_CONDITION = """
+        (student.id ILIKE %s
+        OR student.firstname ILIKE %s
+        OR student.lastname ILIKE %s
+        OR program.name ILIKE %s
+        OR program.code ILIKE %s
+        OR college.name ILIKE %s
+        OR college.code ILIKE %s
+        OR student.year = ANY(%s::text[]::year_level[])
+        OR student.gender = ANY(%s::text[]::gender_type[]))
+    """
+    statements.register('student_search', """
+        SELECT student.id, student.profile_pic_url, student.firstname, student.lastname,
+               program.code AS program_code, program.name AS program_name, student.year, student.gender,
+               college.code AS college_code, college.name AS college_name
+        FROM student
+        INNER JOIN program ON student.program_code = program.code
+        INNER JOIN college ON program.college_code = college.code
+        WHERE """ + SEARCH_CONDITION)
+
+    # Sort keys accepted by get_students_window(); student.id breaks ties
+    WINDOW_ORDER = {
+        'id': ('student.id',),
+        'name': ('student.lastname', 'student.firstname'),
+        'program': ('program.code',),
+        'college': ('college.name',),
+        'year': ('student.year',),
+        'gender': ('student.gender',),
+    }
+
+    @classmethod
+    def normalize_label(cls, labels, value):
+        """Map user input onto its canonical enum label (case-insensitive), or None"""
+        if value is None:
+            return None
+        value = value.strip().lower()
+        return next((label for label in labels if label.lower() == value), None)
+
+    @classmethod
+    def matching_labels(cls, labels, search_query):
+        """Labels containing the search text, replacing ILIKE on the enum columns"""
+        search_query = search_query.strip().lower()
+        return [label for label in labels if search_query in label.lower()]
+
+    @classmethod
+    def enrollment_year_bounds(cls, enrollment_year):
+        """[lower, upper) student IDs of one enrollment year: the range of its partition.
+        Filtering on these (rather than id LIKE 'YYYY-%') lets Postgres prune the other years."""
+        enrollment_year = int(enrollment_year)
+        return f"{enrollment_year}-0000", f"{enrollment_year + 1}-0000"
+
+    @classmethod
+    def _validate_year_and_gender(cls, year, gender):
+        year_label = cls.normalize_label(cls.YEAR_LEVELS, year)
+        if year_label is None:
+            raise ValueError(f"Invalid year level '{year}'")
+        gender_label = cls.normalize_label(cls.GENDERS, gender)
+        if gender_label is None:
+            raise ValueError(f"Invalid gender '{gender}'")
+        return year_label, gender_label
+
+    # Untagged (primary): the next ID must account for students a replica may not have yet
     @classmethod
     def generate_next_student_id(cls, year=None):
         """Generate next student ID in YYYY-XXXX format using database function"""
@@ -14,6 +102,9 @@ class StudentModel:
                 cur.execute("SELECT generate_student_id(%s) as next_id", (year,))
                 result = cur.fetchone()
                 return result['next_id']
+        except QueryTimeout:
+            # Not a reason to fall back: the route's budget is spent
+            raise
         except Exception as e:
             print(f"Error generating student ID: {e}")
             # Fallback: generate manually
@@ -29,9 +120,9 @@ class StudentModel:
             with DatabaseManager.get_cursor() as (cur, conn):
                 cur.execute("""
                     SELECT id FROM student 
-                    WHERE id LIKE %s 
+                    WHERE id >= %s AND id < %s
                     ORDER BY id DESC LIMIT 1
-                """, (f"{year}-%",))
+                """, cls.enrollment_year_bounds(year))
                 
                 result = cur.fetchone()
                 if result:
@@ -42,14 +133,19 @@ class StudentModel:
                     next_num = 1
                 
                 return f"{year}-{next_num:04d}"
+        except QueryTimeout:
+            raise
         except Exception as e:
             print(f"Error in fallback ID generation: {e}")
             return f"{year}-0001"
     
     @classmethod
+    @read_write
     def create_student(cls, firstname, lastname, program_code, year, gender, profile_pic_url=None):
         """Create student with auto-generated ID"""
         try:
+            year, gender = cls._validate_year_and_gender(year, gender)
+
             # Generate next ID
             student_id = cls.generate_next_student_id()
             print(f"Generated student ID: {student_id}")
@@ -59,26 +155,20 @@ class StudentModel:
                     "INSERT INTO student (id, firstname, lastname, program_code, year, gender, profile_pic_url) VALUES (%s, %s, %s, %s, %s, %s, %s)",
                     (student_id, firstname, lastname, program_code, year, gender, profile_pic_url)
                 )
+            suggest_index.upsert_student(student_id, firstname, lastname)
             return {"success": True, "message": "Student created successfully", "student_id": student_id}
         except Exception as e:
             return {"success": False, "message": f"Failed to create student: {str(e)}"}
 
     @classmethod
+    @read_only
     def get_all_students(cls):
         """Fetch all students without pagination - for DataTables to handle pagination"""
+        if roster.is_fresh():
+            return roster.get_all_students()
         try:
             with DatabaseManager.get_cursor() as (cur, conn):
-                cur.execute("""
-                    SELECT student.id, student.firstname, student.lastname,
-                        student.program_code, student.year, student.gender,
-                        student.profile_pic_url,
-                        program.name AS program_name, program.code AS program_code,
-                        college.name AS college_name, college.code AS college_code
-                    FROM student
-                    INNER JOIN program ON student.program_code = program.code
-                    INNER JOIN college ON program.college_code = college.code 
-                    ORDER BY student.id ASC
-                """)
+                statements.execute(cur, 'student_all')
 
                 results = cur.fetchall()
                 # Convert RealDictRow to regular dict
@@ -89,6 +179,7 @@ class StudentModel:
             return []
 
     @classmethod
+    @read_only
     def get_students(cls, page_size: int, page_number: int):
         print(f"Page size: {page_size}, Page number: {page_number}")
         offset = (page_number - 1) * page_size
@@ -128,6 +219,64 @@ class StudentModel:
             return f"Failed to retrieve students: {str(e)}"
 
     @classmethod
+    @read_only
+    @budget(statement_ms=2000)
+    def get_students_window(cls, offset, limit, search_query='', order_by='id', descending=False):
+        """One window of the (optionally filtered) student list, for the virtual-scrolling table"""
+        order = cls.WINDOW_ORDER.get(order_by, cls.WINDOW_ORDER['id'])
+        direction = 'DESC' if descending else 'ASC'
+        order_sql = ", ".join(f"{column} {direction}" for column in order)
+        search_query = (search_query or '').strip()
+        where, params = "", []
+        if search_query:
+            where = "WHERE " + cls.SEARCH_CONDITION
+            params = [f"%{search_query}%"] * 7 + [
+                cls.matching_labels(cls.YEAR_LEVELS, search_query),
+                cls.matching_labels(cls.GENDERS, search_query),
+            ]
+        try:
+            with DatabaseManager.get_cursor() as (cur, conn):
+                cur.execute(f"""
+                    {cls.DETAILS_QUERY} {where}
+                    ORDER BY {order_sql}, student.id {direction}
+                    LIMIT %s OFFSET %s
+                """, params + [limit, offset])
+                results = [dict(row) for row in cur.fetchall()]
+
+                cur.execute("SELECT COUNT(*) AS student_count FROM student")
+                total_count = cur.fetchone()['student_count']
+                filtered_count = total_count
+                if where:
+                    cur.execute(f"""
+                        SELECT COUNT(*) AS student_count
+                        FROM student
+                        INNER JOIN program ON student.program_code = program.code
+                        INNER JOIN college ON program.college_code = college.code
+                        {where}
+                    """, params)
+                    filtered_count = cur.fetchone()['student_count']
+
+                return {
+                    'results': results,
+                    'total_count': total_count,
+                    'filtered_count': filtered_count,
+                }
+        except Exception as e:
+            return f"Failed to retrieve students: {str(e)}"
+
+    @classmethod
+    @read_only
+    def count_students(cls):
+        try:
+            with DatabaseManager.get_cursor() as (cur, conn):
+                cur.execute("SELECT COUNT(*) AS student_count FROM student")
+                return cur.fetchone()['student_count']
+        except Exception as e:
+            print(f"Failed to count students: {str(e)}")
+            return 0
+
+    @classmethod
+    @read_only
     def get_student_by_id(cls, id):
         """Get a single student by ID"""
         try:
@@ -146,6 +295,8 @@ class StudentModel:
             return None
 
     @classmethod
+    @read_write
+    @budget(statement_ms=5000, lock_ms=2000)
     def delete_student(cls, id):
         print(f"\n=== DELETE_STUDENT MODEL METHOD ===")
         print(f"Attempting to delete student ID: {id}")
@@ -168,6 +319,7 @@ class StudentModel:
                 print(f"Rows deleted: {deleted_count}")
                 
                 if deleted_count > 0:
+                    suggest_index.remove_student(id)
                     print(f"SUCCESS: Student {id} deleted from database")
                     return "Student deleted successfully"
                 else:
@@ -182,57 +334,69 @@ class StudentModel:
             return error_msg
 
     @classmethod
-    def update_student(cls, id, firstname, lastname, program_code, year, gender):
+    @read_write
+    def update_student(cls, id, firstname, lastname, program_code, year, gender, picture=None):
+        """Update a student's fields; picture = (url, content_hash) replaces its picture in the same UPDATE"""
         try:
+            year, gender = cls._validate_year_and_gender(year, gender)
+            assignments = "firstname = %s, lastname = %s, program_code = %s, year = %s, gender = %s"
+            params = [firstname, lastname, program_code, year, gender]
+            if picture is not None:
+                assignments += ", profile_pic_url = %s"
+                params.append(picture[0])
+                if Config.PICTURE_DEDUP_ENABLED:
+                    # Moving the hash adjusts picture_asset.ref_count (migrate_picture_dedup.sql)
+                    assignments += ", profile_pic_hash = %s"
+                    params.append(picture[1])
             with DatabaseManager.get_cursor() as (cur, conn):
-                cur.execute(
-                    "UPDATE student SET firstname = %s, lastname = %s, program_code = %s, year = %s, gender = %s WHERE id = %s", 
-                    (firstname, lastname, program_code, year, gender, id)
-                )
+                cur.execute(f"UPDATE student SET {assignments} WHERE id = %s", params + [id])
+                if cur.rowcount == 0:
+                    return f"Failed to update student: student {id} not found"
+            suggest_index.upsert_student(id, firstname, lastname)
             return "Student updated successfully"
         except Exception as e:
             return f"Failed to update student: {str(e)}"
 
     @classmethod
+    @read_only
+    @budget(statement_ms=2000)
     def search_students(cls, search_query):
         try:
             with DatabaseManager.get_cursor() as (cur, conn):
-                query = """
-                SELECT student.id, student.profile_pic_url, student.firstname, student.lastname, 
-                       program.code AS program_code, program.name AS program_name, student.year, student.gender, 
-                       college.code AS college_code, college.name AS college_name
-                FROM student
-                INNER JOIN program ON student.program_code = program.code
-                INNER JOIN college ON program.college_code = college.code
-                WHERE (student.id ILIKE %s
-                OR student.firstname ILIKE %s
-                OR student.lastname ILIKE %s
-                OR program.name ILIKE %s
-                OR program.code ILIKE %s
-                OR college.name ILIKE %s
-                OR college.code ILIKE %s
-                OR student.year ILIKE %s
-                OR student.gender ILIKE %s)
-                """
                 search_query_param = f"%{search_query}%"
-                cur.execute(query, (search_query_param,) * 9)
+                statements.execute(cur, 'student_search', (search_query_param,) * 7 + (
+                    cls.matching_labels(cls.YEAR_LEVELS, search_query),
+                    cls.matching_labels(cls.GENDERS, search_query),
+                ))
                 results = cur.fetchall()
                 return [dict(row) for row in results]
         except Exception as e:
             return []
 
     @classmethod
-    def update_student_profile_pic(cls, student_id, profile_pic_url):
+    @read_write
+    def update_student_profile_pic(cls, student_id, profile_pic_url, content_hash=None):
+        """Set (or clear) a student's picture; content_hash is its picture_asset key, if indexed"""
         try:
             with DatabaseManager.get_cursor() as (cur, conn):
-                cur.execute(
-                    "UPDATE student SET profile_pic_url = %s WHERE id = %s",
-                    (profile_pic_url, student_id)
-                )
+                if Config.PICTURE_DEDUP_ENABLED:
+                    # Moving the hash adjusts picture_asset.ref_count (migrate_picture_dedup.sql)
+                    cur.execute(
+                        "UPDATE student SET profile_pic_url = %s, profile_pic_hash = %s WHERE id = %s",
+                        (profile_pic_url, content_hash, student_id)
+                    )
+                else:
+                    cur.execute(
+                        "UPDATE student SET profile_pic_url = %s WHERE id = %s",
+                        (profile_pic_url, student_id)
+                    )
+                if cur.rowcount == 0:
+                    return f"Failed to update profile picture: student {student_id} not found"
             return "Profile picture updated successfully"
         except Exception as e:
             return f"Failed to update profile picture: {str(e)}"
         
+    # Untagged (primary): read right before replacing the picture, so it must not be stale
     @classmethod
     def get_student_profile_pic_url(cls, student_id):
         try:
@@ -240,26 +404,20 @@ class StudentModel:
                 cur.execute("SELECT profile_pic_url FROM student WHERE id = %s", (student_id,))
                 result = cur.fetchone()
                 return result['profile_pic_url'] if result else None
+        except QueryTimeout:
+            raise
         except Exception as e:
             return None
 
     @classmethod
+    @read_only
     def get_students_by_program(cls, program_code):
         """Get all students enrolled in a specific program"""
+        if roster.is_fresh():
+            return roster.get_students_by_program(program_code)
         try:
             with DatabaseManager.get_cursor() as (cur, conn):
-                cur.execute("""
-                    SELECT student.id, student.firstname, student.lastname,
-                        student.program_code, student.year, student.gender,
-                        student.profile_pic_url,
-                        program.name AS program_name, program.code AS program_code,
-                        college.name AS college_name, college.code AS college_code
-                    FROM student
-                    INNER JOIN program ON student.program_code = program.code
-                    INNER JOIN college ON program.college_code = college.code
-                    WHERE student.program_code = %s
-                    ORDER BY student.id ASC
-                """, (program_code,))
+                statements.execute(cur, 'student_by_program', (program_code,))
                 results = cur.fetchall()
                 return [dict(row) for row in results]
         except Exception as e:
@@ -267,22 +425,14 @@ class StudentModel:
             return []
 
     @classmethod
+    @read_only
     def get_students_by_college(cls, college_code):
         """Get all students in programs under a specific college"""
+        if roster.is_fresh():
+            return roster.get_students_by_college(college_code)
         try:
             with DatabaseManager.get_cursor() as (cur, conn):
-                cur.execute("""
-                    SELECT student.id, student.firstname, student.lastname,
-                        student.program_code, student.year, student.gender,
-                        student.profile_pic_url,
-                        program.name AS program_name, program.code AS program_code,
-                        college.name AS college_name, college.code AS college_code
-                    FROM student
-                    INNER JOIN program ON student.program_code = program.code
-                    INNER JOIN college ON program.college_code = college.code
-                    WHERE college.code = %s
-                    ORDER BY program.code ASC, student.id ASC
-                """, (college_code,))
+                statements.execute(cur, 'student_by_college', (college_code,))
                 results = cur.fetchall()
                 return [dict(row) for row in results]
         except Exception as e:
@@ -290,8 +440,33 @@ class StudentModel:
             return []
 
     @classmethod
-    def get_student_with_details(cls, student_id):
-        """Get a single student with full program and college details"""
+    @read_only
+    @budget(statement_ms=2000)
+    def get_program_students_page(cls, program_code, after_id=None, limit=25):
+        """One page of a program's students in ID order, starting after `after_id` (keyset); None on error"""
+        # One extra row tells whether another page follows
+        if roster.is_fresh():
+            rows = roster.get_program_page(program_code, after_id, limit + 1)
+        else:
+            try:
+                with DatabaseManager.get_cursor() as (cur, conn):
+                    statements.execute(cur, 'student_program_page', (program_code, after_id or '', limit + 1))
+                    rows = [dict(row) for row in cur.fetchall()]
+            except Exception as e:
+                print(f"Failed to retrieve program students page: {str(e)}")
+                return None
+        results = rows[:limit]
+        return {
+            'results': results,
+            'next_after': results[-1]['id'] if len(rows) > limit else None,
+        }
+
+    @classmethod
+    @read_only
+    def get_students_with_details(cls, student_ids):
+        """Get several students with full program and college details"""
+        if roster.is_fresh():
+            return [student for student in map(roster.get_student_with_details, sorted(set(student_ids))) if student]
         try:
             with DatabaseManager.get_cursor() as (cur, conn):
                 cur.execute("""
@@ -303,8 +478,23 @@ class StudentModel:
                     FROM student
                     INNER JOIN program ON student.program_code = program.code
                     INNER JOIN college ON program.college_code = college.code
-                    WHERE student.id = %s
-                """, (student_id,))
+                    WHERE student.id = ANY(%s)
+                    ORDER BY student.id ASC
+                """, (list(student_ids),))
+                return [dict(row) for row in cur.fetchall()]
+        except Exception as e:
+            print(f"Failed to retrieve students with details: {str(e)}")
+            return []
+
+    @classmethod
+    @read_only
+    def get_student_with_details(cls, student_id):
+        """Get a single student with full program and college details"""
+        if roster.is_fresh():
+            return roster.get_student_with_details(student_id)
+        try:
+            with DatabaseManager.get_cursor() as (cur, conn):
+                statements.execute(cur, 'student_details_by_id', (student_id,))
                 result = cur.fetchone()
                 return dict(result) if result else None
         except Exception as e:
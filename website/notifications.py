@@ -0,0 +1,107 @@
+"""
+Per-process LISTEN/NOTIFY fan-out.
+
+One daemon thread per worker process holds a dedicated Postgres connection
+LISTENing on the 'ssis_changes' channel (see migrate_change_notifications.sql)
+and hands each decoded event to every subscriber callback.
+
+Subscribers also receive a {'op': 'RESYNC'} event whenever the listener
+(re)connects, because notifications sent while it was disconnected are lost;
+they should rebuild any derived state from the database when they see it.
+"""
+import json
+import os
+import select
+import threading
+import time
+from config import Config
+from website.database import DatabaseManager
+
+class ChangeListener:
+    CHANNEL = 'ssis_changes'
+    RECONNECT_DELAY = 2.0
+
+    def __init__(self):
+        self._subscribers = []
+        self._lock = threading.Lock()
+        self._pid = None
+        self.connected = False
+        self.last_ok = 0.0
+
+    def subscribe(self, callback, start=True):
+        """Register callback(event) and (unless start is False) make sure the listener thread is running"""
+        with self._lock:
+            if callback not in self._subscribers:
+                self._subscribers.append(callback)
+        if start:
+            self.start()
+
+    def unsubscribe(self, callback):
+        with self._lock:
+            if callback in self._subscribers:
+                self._subscribers.remove(callback)
+
+    def start(self):
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            # First start in this process (or the thread was lost across a fork)
+            self._pid = os.getpid()
+            self.connected = False
+        threading.Thread(target=self._run, name='change-listener', daemon=True).start()
+
+    def staleness(self):
+        """Seconds since the listener last confirmed it is caught up"""
+        if not self.connected or self._pid != os.getpid():
+            return float('inf')
+        return time.monotonic() - self.last_ok
+
+    def _dispatch(self, event):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for callback in subscribers:
+            try:
+                callback(event)
+            except Exception as e:
+                print(f"Change subscriber failed on {event.get('op')}: {e}")
+
+    def _run(self):
+        heartbeat = Config.LISTENER_HEARTBEAT_SECONDS
+        while True:
+            conn = None
+            try:
+                conn = DatabaseManager.get_connection()
+                conn.autocommit = True
+                cur = conn.cursor()
+                cur.execute(f"LISTEN {self.CHANNEL}")
+
+                # Subscribers rebuild before the listener reports itself caught up
+                self._dispatch({'op': 'RESYNC'})
+                self.connected = True
+                self.last_ok = time.monotonic()
+
+                while True:
+                    if select.select([conn], [], [], heartbeat) == ([], [], []):
+                        # Quiet period: a round trip proves nothing is queued behind a dead socket
+                        cur.execute("SELECT 1")
+                    conn.poll()
+                    while conn.notifies:
+                        notify = conn.notifies.pop(0)
+                        try:
+                            event = json.loads(notify.payload)
+                        except ValueError:
+                            continue
+                        self._dispatch(event)
+                    self.last_ok = time.monotonic()
+            except Exception as e:
+                print(f"Change listener disconnected: {e}")
+            finally:
+                self.connected = False
+                if conn is not None:
+                    try:
+                        conn.close()
+                    except Exception:
+                        pass
+            time.sleep(self.RECONNECT_DELAY)
+
+change_listener = ChangeListener()
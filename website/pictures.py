@@ -0,0 +1,123 @@
+"""
+Content-addressed profile pictures.
+
+store() turns an uploaded file into the Cloudinary URL to save on the student.
+With PICTURE_DEDUP_ENABLED (after migrate_picture_dedup.sql) the file's BLAKE2b
+hash, computed while it streamed in (website/uploads.py), is looked up in
+picture_asset first: the same bytes uploaded again - a retry, an edit that
+re-submits the picture, a bulk import - reuse the existing asset instead of
+being uploaded twice. The hash is saved on the student next to the URL, and a
+trigger keeps each asset's ref_count in step with the students using it.
+
+release() is called with a student's previous picture once the student row no
+longer shows it. A shared asset is kept; it is deleted from Cloudinary only
+when its count has dropped to zero. Pictures that were never indexed (uploaded
+before the migration, or straight from the browser) are deleted as before.
+"""
+from config import Config
+from website import media
+from website.models.pictureModels import PictureModel
+from website.uploads import content_hash as hash_upload, upload_metrics
+
+def _untracked_public_id(url):
+    """Public ID of a picture that isn't in picture_asset (None if the URL isn't one of our Cloudinary images)"""
+    parsed = media.parse_delivery_url(url)
+    if parsed is None:
+        print(f"⚠️  Not a Cloudinary picture, nothing to delete: {url}")
+        return None
+    return parsed[1]
+
+def _destroy(public_id):
+    try:
+        media.destroy(public_id)
+        print(f"✅ Picture {public_id} deleted from Cloudinary")
+    except Exception as e:
+        print(f"⚠️  Warning: Could not delete picture {public_id}: {e}")
+
+def store(file):
+    """Upload `file` unless its content is already on Cloudinary: (url, content_hash)"""
+    if not Config.PICTURE_DEDUP_ENABLED:
+        return media.upload(file)['url'], None
+
+    content_hash = hash_upload(file)
+    asset = PictureModel.get_by_hash(content_hash)
+    if asset:
+        upload_metrics.record('deduplicated')
+        print(f"♻️  Reusing picture {asset['public_id']} ({content_hash[:12]})")
+        return asset['url'], content_hash
+
+    result = media.upload(file)
+    asset = PictureModel.register(content_hash, result['public_id'], result['url'], result.get('bytes'))
+    if asset is None:
+        # Index unavailable: keep the upload, unshared
+        return result['url'], None
+    if asset['public_id'] != result['public_id']:
+        # The same picture was registered by a concurrent upload; use that one
+        _destroy(result['public_id'])
+    return asset['url'], content_hash
+
+def release(url):
+    """Delete a picture no student shows any more (call after the student row changed)"""
+    if not url:
+        return
+    status, public_id = PictureModel.release(url) if Config.PICTURE_DEDUP_ENABLED else ('untracked', None)
+    if status == 'shared':
+        print(f"🔗 Picture still in use by other students, kept: {url}")
+        return
+    public_id = public_id if status == 'unreferenced' else _untracked_public_id(url)
+    if public_id:
+        _destroy(public_id)
+
+async def store_async(file_bytes, filename):
+    """store() for the ASGI upload handler"""
+    from website.async_cloudinary import AsyncCloudinaryClient
+    from website.models.asyncPictureModels import AsyncPictureModel
+
+    if not Config.PICTURE_DEDUP_ENABLED:
+        return (await AsyncCloudinaryClient.upload(file_bytes, filename))['url'], None
+
+    content_hash = hash_upload(file_bytes)
+    asset = await AsyncPictureModel.get_by_hash(content_hash)
+    if asset:
+        upload_metrics.record('deduplicated')
+        print(f"♻️  Reusing picture {asset['public_id']} ({content_hash[:12]})")
+        return asset['url'], content_hash
+
+    result = await AsyncCloudinaryClient.upload(file_bytes, filename)
+    asset = await AsyncPictureModel.register(content_hash, result['public_id'], result['url'], result.get('bytes'))
+    if asset is None:
+        return result['url'], None
+    if asset['public_id'] != result['public_id']:
+        try:
+            await AsyncCloudinaryClient.destroy(result['public_id'])
+        except Exception as e:
+            print(f"⚠️  Warning: Could not delete duplicate picture: {e}")
+    return asset['url'], content_hash
+
+async def release_async(url):
+    """release() for the ASGI upload handler"""
+    from website.async_cloudinary import AsyncCloudinaryClient
+    from website.models.asyncPictureModels import AsyncPictureModel
+
+    if not url:
+        return
+    status, public_id = await AsyncPictureModel.release(url) if Config.PICTURE_DEDUP_ENABLED else ('untracked', None)
+    if status == 'shared':
+        print(f"🔗 Picture still in use by other students, kept: {url}")
+        return
+    public_id = public_id if status == 'unreferenced' else _untracked_public_id(url)
+    if not public_id:
+        return
+    try:
+        await AsyncCloudinaryClient.destroy(public_id)
+    except Exception as e:
+        print(f"⚠️  Warning: Could not delete old picture: {e}")
+
+def prune(older_than_seconds=None):
+    """Delete indexed assets no student has used for a while (e.g. after cascaded deletes)"""
+    if older_than_seconds is None:
+        older_than_seconds = Config.PICTURE_PRUNE_GRACE_SECONDS
+    public_ids = PictureModel.prune_unreferenced(older_than_seconds)
+    for public_id in public_ids:
+        _destroy(public_id)
+    return public_ids
@@ -0,0 +1,203 @@
+"""
+Optional in-process read replica of the student roster.
+
+When ROSTER_SNAPSHOT_ENABLED is set, each worker keeps every student as a
+compact __slots__ record with hash indexes by id, program and college, and
+applies row-level NOTIFY events (website.notifications) as they arrive. The
+read-only StudentModel lookups use it while the listener has confirmed it is
+caught up within ROSTER_MAX_STALENESS seconds and fall through to SQL otherwise.
+"""
+import threading
+import time
+from config import Config
+from website.database import DatabaseManager
+from website.notifications import change_listener
+
+class StudentRecord:
+    __slots__ = ('id', 'firstname', 'lastname', 'program_code', 'year', 'gender', 'profile_pic_url')
+
+    def __init__(self, id, firstname, lastname, program_code, year, gender, profile_pic_url=None):
+        self.id = id
+        self.firstname = firstname
+        self.lastname = lastname
+        self.program_code = program_code
+        self.year = year
+        self.gender = gender
+        self.profile_pic_url = profile_pic_url
+
+    @classmethod
+    def from_row(cls, row):
+        return cls(row['id'], row['firstname'], row['lastname'], row['program_code'],
+                   row['year'], row['gender'], row.get('profile_pic_url'))
+
+class RosterSnapshot:
+    RETRY_SECONDS = 5
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._students = {}
+        self._by_program = {}
+        self._programs = {}
+        self._colleges = {}
+        self._loaded = False
+        self._subscribed = False
+        self._retrying = False
+        self._attempted_at = 0.0
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+    def start(self):
+        """Subscribe to change events (once, at app creation); the listener's first RESYNC event loads the snapshot"""
+        with self._lock:
+            if self._subscribed:
+                return
+            self._subscribed = True
+        # The listener thread itself is started per process, by is_fresh()
+        change_listener.subscribe(self.handle_event, start=False)
+
+    def is_fresh(self):
+        """True when reads may be served from memory"""
+        if not Config.ROSTER_SNAPSHOT_ENABLED:
+            return False
+        change_listener.start()
+        if not self._loaded:
+            self._retry_load()
+            return False
+        return change_listener.staleness() <= Config.ROSTER_MAX_STALENESS
+
+    def _retry_load(self):
+        """Load again in the background if a RESYNC load failed (at most every RETRY_SECONDS)"""
+        with self._lock:
+            now = time.monotonic()
+            if self._retrying or not change_listener.connected or now - self._attempted_at < self.RETRY_SECONDS:
+                return
+            self._retrying = True
+        threading.Thread(target=self._run_retry, name='roster-loader', daemon=True).start()
+
+    def _run_retry(self):
+        try:
+            # Holding the lock, events queue behind the load instead of landing in the old dicts
+            with self._lock:
+                if not self._loaded:
+                    self.load()
+        except Exception as e:
+            print(f"Failed to load roster snapshot: {str(e)}")
+        finally:
+            with self._lock:
+                self._retrying = False
+
+    def load(self):
+        """Rebuild the whole snapshot from Postgres"""
+        start = time.perf_counter()
+        self._attempted_at = time.monotonic()
+        with DatabaseManager.get_cursor() as (cur, conn):
+            cur.execute("SELECT code, name FROM college")
+            colleges = {row['code']: row['name'] for row in cur.fetchall()}
+            cur.execute("SELECT code, name, college_code FROM program")
+            programs = {row['code']: (row['name'], row['college_code']) for row in cur.fetchall()}
+            cur.execute("SELECT id, firstname, lastname, program_code, year, gender, profile_pic_url FROM student")
+            students = {row['id']: StudentRecord.from_row(row) for row in cur.fetchall()}
+
+        by_program = {}
+        for record in students.values():
+            by_program.setdefault(record.program_code, set()).add(record.id)
+
+        with self._lock:
+            self._colleges, self._programs = colleges, programs
+            self._students, self._by_program = students, by_program
+            self._loaded = True
+        print(f"📚 Roster snapshot loaded: {len(students)} students in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    # ------------------------------------------------------------------
+    # Incremental updates
+    # ------------------------------------------------------------------
+    def handle_event(self, event):
+        op = event.get('op')
+        if op == 'RESYNC':
+            with self._lock:
+                self._loaded = False
+            self.load()
+            return
+
+        table = event.get('table')
+        row = event.get('row')
+        with self._lock:
+            if table == 'student':
+                self._remove_student(event.get('old_key'))
+                if row is not None:
+                    self._add_student(StudentRecord.from_row(row))
+            elif table == 'program':
+                if event.get('old_key') and event.get('old_key') != event.get('key'):
+                    self._programs.pop(event['old_key'], None)
+                if row is None:
+                    self._programs.pop(event.get('key'), None)
+                else:
+                    self._programs[row['code']] = (row['name'], row['college_code'])
+            elif table == 'college':
+                if row is None:
+                    self._colleges.pop(event.get('key'), None)
+                else:
+                    self._colleges[row['code']] = row['name']
+
+    def _add_student(self, record):
+        self._students[record.id] = record
+        self._by_program.setdefault(record.program_code, set()).add(record.id)
+
+    def _remove_student(self, student_id):
+        record = self._students.pop(student_id, None) if student_id else None
+        if record is not None:
+            ids = self._by_program.get(record.program_code)
+            if ids is not None:
+                ids.discard(student_id)
+                if not ids:
+                    del self._by_program[record.program_code]
+
+    # ------------------------------------------------------------------
+    # Reads (same dict shape as the StudentModel SQL joins)
+    # ------------------------------------------------------------------
+    def _details(self, record):
+        program_name, college_code = self._programs.get(record.program_code, (None, None))
+        return {
+            'id': record.id,
+            'firstname': record.firstname,
+            'lastname': record.lastname,
+            'program_code': record.program_code,
+            'year': record.year,
+            'gender': record.gender,
+            'profile_pic_url': record.profile_pic_url,
+            'program_name': program_name,
+            'college_name': self._colleges.get(college_code),
+            'college_code': college_code,
+        }
+
+    def get_student_with_details(self, student_id):
+        with self._lock:
+            record = self._students.get(student_id)
+            return self._details(record) if record else None
+
+    def get_students_by_program(self, program_code):
+        with self._lock:
+            ids = sorted(self._by_program.get(program_code, ()))
+            return [self._details(self._students[student_id]) for student_id in ids]
+
+    def get_program_page(self, program_code, after_id, limit):
+        with self._lock:
+            ids = sorted(student_id for student_id in self._by_program.get(program_code, ())
+                         if after_id is None or student_id > after_id)[:limit]
+            return [self._details(self._students[student_id]) for student_id in ids]
+
+    def get_students_by_college(self, college_code):
+        with self._lock:
+            program_codes = sorted(code for code, (name, owner) in self._programs.items() if owner == college_code)
+            return [
+                self._details(self._students[student_id])
+                for program_code in program_codes
+                for student_id in sorted(self._by_program.get(program_code, ()))
+            ]
+
+    def get_all_students(self):
+        with self._lock:
+            return [self._details(self._students[student_id]) for student_id in sorted(self._students)]
+
+roster = RosterSnapshot()
@@ -0,0 +1,33 @@
+from flask import Blueprint, request, jsonify
+from website.models.analyticsModels import AnalyticsModel
+
+analyticsRoute = Blueprint('analytics', __name__)
+analytics_model = AnalyticsModel()
+
+def parse_list(value):
+    return [item.strip() for item in value.split(",") if item.strip()] if value else []
+
+@analyticsRoute.route("/api/analytics/enrollment", methods=["GET"])
+def enrollment():
+    """Enrollment counts, e.g. ?group_by=college,year&gender=Female&totals=rollup"""
+    group_by = parse_list(request.args.get("group_by", "college"))
+    totals = request.args.get("totals", "rollup")
+
+    unknown = [name for name in group_by if name not in analytics_model.DIMENSIONS]
+    if unknown or len(set(group_by)) != len(group_by):
+        return jsonify({'error': f"Invalid group_by; choose from {', '.join(analytics_model.DIMENSIONS)}"}), 400
+    if totals not in analytics_model.TOTALS:
+        return jsonify({'error': f"Invalid totals; choose from {', '.join(analytics_model.TOTALS)}"}), 400
+
+    # Any dimension can also be used as a filter: ?college=CCS,COE&year=1st Year
+    filters = {name: parse_list(request.args.get(name)) for name in analytics_model.DIMENSIONS if request.args.get(name)}
+    if not all(value.isdigit() and len(value) == 4 for value in filters.get('cohort', [])):
+        return jsonify({'error': 'Invalid cohort; use enrollment years such as 2024'}), 400
+
+    result = analytics_model.get_enrollment_breakdown(group_by, filters, totals)
+    if result is None:
+        return jsonify({'error': 'Failed to compute enrollment breakdown'}), 500
+
+    response = jsonify(result)
+    response.headers['Cache-Control'] = 'private, max-age=30'
+    return response
@@ -0,0 +1,46 @@
+from flask import Blueprint, request, jsonify
+from website.models.archiveModels import ArchiveModel
+import os
+from datetime import datetime
+
+# Ensure logs directory exists
+os.makedirs('logs', exist_ok=True)
+
+def log_activity(action, details):
+    """Log archive restores"""
+    log_entry = f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] {action}: {details}\n"
+    try:
+        with open('logs/activity.log', 'a', encoding='utf-8') as f:
+            f.write(log_entry)
+    except Exception as e:
+        print(f"Error writing to log: {e}")
+
+archiveRoute = Blueprint('archive', __name__)
+archive_model = ArchiveModel()
+
+MAX_ARCHIVE_PAGE_SIZE = 200
+
+# ArchiveModel.restore_student() error -> HTTP status (anything else is a 500)
+RESTORE_ERROR_STATUS = {'invalid': 400, 'not_found': 404, 'conflict': 409}
+
+@archiveRoute.route("/api/archive/students", methods=["GET"])
+def archived_students():
+    """Archived students (opt-in; never part of the live lists): ?search=&after=<last id>&limit="""
+    limit = max(1, min(request.args.get("limit", default=50, type=int), MAX_ARCHIVE_PAGE_SIZE))
+    result = archive_model.search_students(request.args.get("search", ""), request.args.get("after") or None, limit)
+    if result is None:
+        return jsonify({'error': 'Failed to search the archive'}), 500
+    return jsonify(result)
+
+@archiveRoute.route("/api/archive/students/<string:student_id>/restore", methods=["POST"])
+def restore_student(student_id):
+    """Move an archived student back into the live table"""
+    if not archive_model.is_valid_id(student_id):
+        return jsonify({'success': False, 'error': 'invalid', 'message': f"Invalid student ID {student_id!r}; expected YYYY-NNNN"}), 400
+    result = archive_model.restore_student(student_id)
+    if result['success']:
+        log_activity("RESTORE Student", f"ID={student_id}")
+        print(f"✅ Student {student_id} restored from the archive")
+        return jsonify(result)
+    print(f"❌ Restore of {student_id} failed: {result['message']}")
+    return jsonify(result), RESTORE_ERROR_STATUS.get(result['error'], 500)
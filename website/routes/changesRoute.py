@@ -0,0 +1,24 @@
+from flask import Blueprint, request, jsonify
+from website.models.changesModels import ChangesModel
+
+changesRoute = Blueprint('changes', __name__)
+changes_model = ChangesModel()
+
+MAX_CHANGES_PAGE = 5000
+
+@changesRoute.route("/api/changes", methods=["GET"])
+def changes():
+    """Delta sync: rows changed since ?since=<version or token>, oldest first"""
+    since = request.args.get("since", default="0")
+    limit = max(1, min(request.args.get("limit", default=500, type=int), MAX_CHANGES_PAGE))
+
+    try:
+        result = changes_model.get_changes(since, limit)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    if result is None:
+        return jsonify({'error': 'Failed to fetch changes'}), 500
+
+    response = jsonify(result)
+    response.headers['Cache-Control'] = 'no-store'
+    return response
@@ -1,4 +1,4 @@
-from flask import Blueprint, render_template, request, jsonify, redirect, url_for,flash
+from flask import Blueprint, render_template, request, jsonify, get_flashed_messages, redirect, url_for,flash
 
 from website.models.collegeModels import CollegeModel
 from website.models.programModels import ProgramModel
@@ -87,6 +87,23 @@ def colleges():
     
     return render_template("colleges.html", colleges=colleges, programs=programs, students=students, search_query=search_query)
 
+MAX_ROW_FRAGMENTS = 200
+
+@collegeRoute.route("/colleges/rows", methods=["GET"])
+def college_rows():
+    """Rendered table rows for the given ?code=... and/or the colleges owning ?program=..."""
+    codes = sorted(set(request.args.getlist("code")))[:MAX_ROW_FRAGMENTS]
+    program_codes = sorted(set(request.args.getlist("program")))[:MAX_ROW_FRAGMENTS]
+
+    # Read straight from the database: the cached lists may lag behind the change being shown
+    colleges = college_model.get_college_rows(codes, program_codes)[:MAX_ROW_FRAGMENTS]
+    return "".join(
+        render_template('partials/college_row.html', college=college,
+                        program_count=college['program_count'],
+                        student_count=college['student_count'])
+        for college in colleges
+    )
+
 @collegeRoute.route("/colleges/delete/<string:college_code>", methods=["GET", "POST", "DELETE"])
 def delete_college(college_code):
     print(f"\n{'='*80}")
@@ -131,6 +148,7 @@ def delete_college(college_code):
         
         if request.method == "DELETE" or request.headers.get('X-Requested-With') == 'XMLHttpRequest':
             print(f"📤 Returning JSON response")
+            get_flashed_messages()  # reported in the JSON body instead of on the next page load
             return jsonify({'success': 'successfully' in result.lower(), 'message': result})
         else:
             print(f"🔄 Redirecting to /colleges")
@@ -210,19 +228,13 @@ def view_college(college_code):
     # Get all programs under this college
     programs = college_model.get_college_programs(college_code)
     
-    # Get all students in this college (across all programs)
-    students = student_model.get_students_by_college(college_code)
-    
-    # Group students by program for display
-    students_by_program = {}
-    for student in students:
-        prog_code = student['program_code']
-        if prog_code not in students_by_program:
-            students_by_program[prog_code] = []
-        students_by_program[prog_code].append(student)
-    
+    # Counts only: each program's students load a page at a time once its section is in view
+    student_counts = program_model.get_student_counts([program['program_code'] for program in programs])
+    total_students = sum(student_counts.values())
+
     # Log the view
-    log_activity("VIEW College", f"Code={college_code}, Name={college['name']}, Programs={len(programs)}, Students={len(students)}")
+    log_activity("VIEW College", f"Code={college_code}, Name={college['name']}, Programs={len(programs)}, Students={total_students}")
     
-    return render_template('college_view.html', college=college, programs=programs, students_by_program=students_by_program)
+    return render_template('college_view.html', college=college, programs=programs,
+                           student_counts=student_counts, total_students=total_students)
 
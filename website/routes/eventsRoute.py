@@ -0,0 +1,23 @@
+from flask import Blueprint, request, jsonify, Response
+from config import Config
+from website.events import event_broker
+from website.compression import no_compression
+
+eventsRoute = Blueprint('events', __name__)
+
+@eventsRoute.route("/events", methods=["GET"])
+@no_compression
+def events():
+    """Server-Sent Events stream of student/program/college row changes"""
+    if event_broker.client_count() >= Config.SSE_MAX_CLIENTS:
+        response = jsonify({'error': 'Too many live update connections'})
+        response.status_code = 503
+        response.headers['Retry-After'] = '30'
+        return response
+
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+    response = Response(event_broker.stream(last_event_id), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    # Stop nginx-style proxies from buffering the stream
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
@@ -0,0 +1,19 @@
+from flask import Blueprint, jsonify
+from website import admission
+from website.budgets import budget_metrics
+from website.compression import compression_metrics
+from website.uploads import upload_metrics
+
+metricsRoute = Blueprint('metrics', __name__)
+
+@metricsRoute.route("/api/metrics", methods=["GET"])
+def metrics():
+    """Per-process request metrics (this worker only)"""
+    response = jsonify({
+        'budgets': budget_metrics.snapshot(),
+        'compression': compression_metrics.snapshot(),
+        'uploads': upload_metrics.snapshot(),
+        'admission': admission.snapshot(),
+    })
+    response.headers['Cache-Control'] = 'no-store'
+    return response
@@ -1,4 +1,4 @@
-from flask import Blueprint, render_template, request, jsonify, flash
+from flask import Blueprint, render_template, request, jsonify, get_flashed_messages, flash
 from website.models.programModels import ProgramModel
 from website.models.collegeModels import CollegeModel
 from website.models.studentModels import StudentModel
@@ -86,6 +86,21 @@ def programs():
     return render_template("programs.html", programs=programs, colleges=colleges, students=students, search_query=search_query)
 
 
+MAX_ROW_FRAGMENTS = 200
+
+@programRoute.route("/programs/rows", methods=["GET"])
+def program_rows():
+    """Rendered table rows for the given ?code=... (used to patch the table after a live update)"""
+    codes = sorted(set(request.args.getlist("code")))[:MAX_ROW_FRAGMENTS]
+    # Read straight from the database: the cached list may lag behind the change being shown
+    programs = program_model.get_program_rows(codes) if codes else []
+    return "".join(
+        render_template('partials/program_row.html', program=program,
+                        student_count=program['student_count'])
+        for program in programs
+    )
+
+
 @programRoute.route("/programs/edit/<string:program_code>", methods=["POST"])
 def edit_program(program_code):
     print(f"\n{'='*80}")
@@ -187,6 +202,7 @@ def delete_program(program_code):
         
         if request.method == "DELETE" or request.headers.get('X-Requested-With') == 'XMLHttpRequest':
             print(f"📤 Returning JSON response")
+            get_flashed_messages()  # reported in the JSON body instead of on the next page load
             return jsonify({'success': 'successfully' in result.lower(), 'message': result})
         else:
             print(f"🔄 Redirecting to /programs")
@@ -216,10 +232,28 @@ def view_program(program_code):
         flash(f'Program with code "{program_code}" not found', 'danger')
         return redirect(url_for('programs.programs'))
     
-    # Get all students enrolled in this program
-    students = student_model.get_students_by_program(program_code)
+    # Only the count up front; the students load a page at a time (program_students)
+    total_students = program_model.get_student_counts([program_code]).get(program_code, 0)
     
     # Log the view
-    log_activity("VIEW Program", f"Code={program_code}, Name={program['program_name']}, Students={len(students)}")
+    log_activity("VIEW Program", f"Code={program_code}, Name={program['program_name']}, Students={total_students}")
     
-    return render_template('program_view.html', program=program, students=students)
+    return render_template('program_view.html', program=program, total_students=total_students)
+
+PROGRAM_STUDENTS_PAGE_SIZE = 25
+MAX_PROGRAM_STUDENTS_PAGE_SIZE = 100
+
+@programRoute.route("/programs/<string:program_code>/students", methods=["GET"])
+def program_students(program_code):
+    """Rendered rows for one page of a program's students (?after=<last student ID>&limit=)"""
+    limit = min(max(request.args.get('limit', PROGRAM_STUDENTS_PAGE_SIZE, type=int), 1), MAX_PROGRAM_STUDENTS_PAGE_SIZE)
+    after = request.args.get('after') or None
+    page = student_model.get_program_students_page(program_code, after_id=after, limit=limit)
+    if page is None:
+        return jsonify({'error': 'Failed to load program students'}), 500
+    return jsonify({
+        'html': "".join(render_template('partials/program_student_row.html', student=student)
+                        for student in page['results']),
+        'count': len(page['results']),
+        'next_after': page['next_after'],
+    })
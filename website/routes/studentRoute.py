@@ -1,11 +1,12 @@
-from flask import Blueprint, render_template, request, jsonify, flash, redirect, url_for
+from flask import Blueprint, render_template, request, jsonify, get_flashed_messages, flash, redirect, url_for
 from website.models.studentModels import StudentModel
 from website.models.programModels import ProgramModel
 from website.models.collegeModels import CollegeModel
-from cloudinary.uploader import upload
-from cloudinary.utils import cloudinary_url
-from cloudinary.uploader import destroy as cloudinary_destroy
-import cloudinary
+from website.models.pictureModels import PictureModel
+from website import media, pictures
+from website.uploads import accepts_uploads
+from config import Config
+import json
 import os
 from datetime import datetime
 
@@ -26,62 +27,100 @@ student_model = StudentModel()
 program_model = ProgramModel()
 college_model = CollegeModel()
 
-ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'webp'}
-MAX_FILE_SIZE_MB = 5  # Maximum allowed file size in megabytes
-
-def allowed_file(filename):
-    return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
-
-def get_public_id_from_url(cloudinary_url):
-    """Extract Cloudinary public_id from URL"""
+def direct_uploads_enabled():
+    return Config.DIRECT_UPLOADS_ENABLED and media.upload_signer() is not None
+
+def claim_direct_upload(result, current_url=None):
+    """Verify a picture the browser uploaded to Cloudinary itself: (url, None) or (None, error).
+
+    Each upload result is claimed once; re-posting the one a student already
+    shows (`current_url`) is accepted without a new claim.
+    """
+    if isinstance(result, str):
+        try:
+            result = json.loads(result)
+        except ValueError:
+            return None, 'Invalid upload result'
+    if not direct_uploads_enabled():
+        return None, 'Direct uploads are disabled'
     try:
-        # Extract the part after /upload/ and before the file extension
-        # Example: https://res.cloudinary.com/demo/image/upload/v1234567890/sample.jpg
-        # Result: v1234567890/sample
-        parts = cloudinary_url.split('/upload/')
-        if len(parts) > 1:
-            # Get everything after /upload/ and remove file extension
-            return parts[1].rsplit('.', 1)[0]
-        else:
-            # Fallback: just get the filename without extension
-            return cloudinary_url.split('/')[-1].split('.')[0]
+        url = media.verify_direct_upload(result)
+    except ValueError as e:
+        print(f"❌ Rejected direct upload: {e}")
+        signer = media.upload_signer()
+        if isinstance(result, dict) and signer.verify_response(result.get('public_id'), result.get('version'), result.get('signature')):
+            # Ours but not acceptable (too large, expired): don't leave it on Cloudinary
+            try:
+                media.destroy(result['public_id'])
+            except Exception as destroy_error:
+                print(f"⚠️  Warning: Could not delete rejected upload: {destroy_error}")
+        return None, str(e)
+    if url == current_url:
+        return url, None
+    try:
+        claimed = PictureModel.claim_direct_upload(result['public_id'])
     except Exception as e:
-        print(f"Error extracting public_id: {e}")
-        # Fallback method
-        return cloudinary_url.split('/')[-1].split('.')[0]
+        print(f"❌ Could not claim direct upload: {e}")
+        return None, 'Could not record the upload; please retry'
+    if not claimed:
+        print(f"❌ Rejected direct upload: {result['public_id']} was already used")
+        return None, 'This upload has already been used'
+    return url, None
+
+def settle_picture(updated, current_url, new_url):
+    """After the student row was (or wasn't) moved from current_url to new_url, release the one nobody shows"""
+    if new_url != current_url:
+        pictures.release(current_url if updated else new_url)
+
+def attach_picture(student_id, current_url, new_url, content_hash=None):
+    """Point a student at new_url, then release the picture it replaced; True if the student was updated"""
+    if new_url == current_url:
+        return True
+    updated = False
+    try:
+        result = student_model.update_student_profile_pic(student_id, new_url, content_hash)
+        updated = 'successfully' in result
+        if not updated:
+            print(f"❌ {result}")
+    finally:
+        settle_picture(updated, current_url, new_url)
+    return updated
 
 @studentRoute.route("/students", methods=["GET", "POST"])
+@accepts_uploads
 def students():
     has_prev = False
     has_next = False
 
-    max_size_bytes = MAX_FILE_SIZE_MB * 1024 * 1024
-
     if request.method == "POST":
         profile_file = request.files.get("file")
+        direct_upload = request.form.get("directUpload")
 
-        if not profile_file:
-            student_id = add_student()
-            print(student_id)
-        elif allowed_file(profile_file.filename):
-            # Check file size before saving
-            profile_file.seek(0, os.SEEK_END)  # Move to the end of the file
-            file_size = profile_file.tell()  # Get the file size
-            profile_file.seek(0)  # Move back to the beginning of the file
-
-            print("length", file_size)
-            if file_size > max_size_bytes:
-                flash('File size exceeds the maximum allowed (5MB). Please upload a smaller file.', 'danger')
+        if direct_upload:
+            # Picture already uploaded to Cloudinary by the browser
+            secure_url, error = claim_direct_upload(direct_upload)
+            if error:
+                flash(f'Profile picture rejected: {error}', 'danger')
             else:
-                print('prof', profile_file.filename)  # Adjusted to match FormData key
                 student_id = add_student()
-                print(student_id)
-                upload_result = cloudinary.uploader.upload(profile_file)
-                secure_url = upload_result['url']
-                print(secure_url)
-                student_model.update_student_profile_pic(student_id, secure_url)
+                if student_id:
+                    attach_picture(student_id, None, secure_url)
+                else:
+                    pictures.release(secure_url)
+        elif not profile_file:
+            student_id = add_student()
+            print(student_id)
         else:
-            flash('Invalid file type. Please upload a valid file.', 'danger')
+            # Size, type and dimensions were checked on the way in (website/uploads.py)
+            print('prof', profile_file.filename)  # Adjusted to match FormData key
+            student_id = add_student()
+            print(student_id)
+            if student_id:
+                # Reuses the Cloudinary asset if these bytes were uploaded before (website/pictures.py)
+                secure_url, content_hash = pictures.store(profile_file)
+                print(secure_url)
+                if not attach_picture(student_id, None, secure_url, content_hash):
+                    flash(f'Student {student_id} was created, but its profile picture could not be saved', 'danger')
 
 
 
@@ -91,22 +130,15 @@ def students():
     search_query = request.args.get("search")
 
     programs = program_model.get_programs()
-    students = []
 
     search_query = "" if search_query is None else search_query
 
-    if search_query:
-        students = student_model.search_students(search_query)
-    else:
-        # Fetch ALL students - let DataTables handle pagination on client side
-        students = student_model.get_all_students()
-    
-    total_count = len(students)
+    # Rows are not rendered here: the table scrolls through /students/data a window at a time
+    total_count = student_model.count_students()
 
     return render_template(
         "students.html",
         programs=programs,
-        students=students,
         total_count=total_count,
         search_query=search_query,
     )
@@ -221,6 +253,8 @@ def delete_student(student_id):
         
         # Log the deletion with details
         if 'successfully' in result:
+            # The picture goes too, unless other students share it
+            pictures.release(student.get('profile_pic_url'))
             log_activity("DELETE Student", f"ID={student_id}, Name={student_name}")
             print(f"✅ SUCCESS: Student deleted and activity logged")
             flash(result, 'success')
@@ -230,6 +264,7 @@ def delete_student(student_id):
         
         if request.method == "DELETE" or request.headers.get('X-Requested-With') == 'XMLHttpRequest':
             print(f"📤 Returning JSON response")
+            get_flashed_messages()  # reported in the JSON body instead of on the next page load
             return jsonify({'success': result == 'Student deleted successfully', 'message': result})
         else:
             print(f"🔄 Redirecting to /students")
@@ -250,6 +285,7 @@ def delete_student(student_id):
         return redirect(url_for('students.students'))
 
 @studentRoute.route("/students/edit/<string:student_id>", methods=["POST"])
+@accepts_uploads
 def edit_student(student_id):
     print(f"\n{'='*80}")
     print(f"✏️  EDIT STUDENT REQUEST")
@@ -278,71 +314,56 @@ def edit_student(student_id):
         
         # Handle profile picture update
         profile_file = request.files.get("file")
+        direct_upload = request.form.get("directUpload")
         remove_profile_pic = request.form.get("removeProfilePic") == "true"
         
         # Get current profile picture URL for cleanup
         current_pic_url = student_model.get_student_profile_pic_url(student_id)
-        
+
+        # The new picture, (url, content_hash), is saved in the same UPDATE as the fields;
+        # whichever picture the student no longer shows afterwards is released
+        new_picture = None
         if remove_profile_pic and current_pic_url:
             # User wants to remove the profile picture
-            print(f"🗑️  Removing profile picture from Cloudinary...")
-            try:
-                public_id = get_public_id_from_url(current_pic_url)
-                cloudinary_destroy(public_id)
-                print(f"✅ Profile picture removed from Cloudinary")
-            except Exception as e:
-                print(f"⚠️  Warning: Could not delete from Cloudinary: {e}")
-            
-            # Remove from database
-            student_model.update_student_profile_pic(student_id, None)
-            print(f"✅ Profile picture removed from database")
-            
-        elif profile_file and allowed_file(profile_file.filename):
-            # User is uploading a new profile picture
+            new_picture = (None, None)
+
+        elif direct_upload:
+            # Browser uploaded the new picture straight to Cloudinary
+            new_pic_url, error = claim_direct_upload(direct_upload, current_pic_url)
+            if error:
+                return jsonify({'success': False, 'message': f'Profile picture rejected: {error}'})
+            new_picture = (new_pic_url, None)
+
+        elif profile_file:
+            # User is uploading a new profile picture (already size/type checked on ingest)
             print(f"📷 Processing new profile picture: {profile_file.filename}")
-            
-            # Check file size
-            profile_file.seek(0, os.SEEK_END)
-            file_size = profile_file.tell()
-            profile_file.seek(0)
-            
-            max_size_bytes = MAX_FILE_SIZE_MB * 1024 * 1024
-            
-            if file_size > max_size_bytes:
-                print(f"❌ File too large: {file_size} bytes")
-                return jsonify({'success': False, 'message': f'File size exceeds {MAX_FILE_SIZE_MB}MB limit'})
-            
-            # Delete old picture from Cloudinary if exists
-            if current_pic_url:
-                print(f"🗑️  Deleting old profile picture from Cloudinary...")
-                try:
-                    public_id = get_public_id_from_url(current_pic_url)
-                    cloudinary_destroy(public_id)
-                    print(f"✅ Old profile picture deleted from Cloudinary")
-                except Exception as e:
-                    print(f"⚠️  Warning: Could not delete old picture: {e}")
-            
-            # Upload new picture to Cloudinary
+
+            # Upload new picture to Cloudinary (or reuse the asset holding the same bytes)
             print(f"☁️  Uploading new profile picture to Cloudinary...")
-            upload_result = cloudinary.uploader.upload(profile_file)
-            new_pic_url = upload_result['url']
-            print(f"✅ New profile picture uploaded: {new_pic_url}")
-            
-            # Update database with new URL
-            student_model.update_student_profile_pic(student_id, new_pic_url)
-            print(f"✅ Database updated with new profile picture URL")
-        
-        # Log the edit
-        log_activity("EDIT Student", f"ID={student_id}, Name={new_first_name} {new_last_name}, Program={new_program_code}, Year={new_year}, Gender={new_gender}")
-        print(f"📝 Activity logged")
-        
+            new_picture = pictures.store(profile_file)
+            print(f"✅ New profile picture uploaded: {new_picture[0]}")
+
+        if new_picture is not None and new_picture[0] == current_pic_url:
+            # Same picture re-submitted: leave the student's URL and hash alone
+            new_picture = None
+
         print(f"\n✏️  Updating student in database...")
-        result = student_model.update_student(
-            student_id, new_first_name, new_last_name, new_program_code, new_year, new_gender
-        )
+        updated = False
+        try:
+            result = student_model.update_student(
+                student_id, new_first_name, new_last_name, new_program_code, new_year, new_gender,
+                picture=new_picture
+            )
+            updated = 'successfully' in result.lower()
+        finally:
+            if new_picture is not None:
+                settle_picture(updated, current_pic_url, new_picture[0])
         print(f"📊 Update result: {result}")
-        
-        if 'successfully' in result.lower():
+
+        if updated:
+            # Log the edit
+            log_activity("EDIT Student", f"ID={student_id}, Name={new_first_name} {new_last_name}, Program={new_program_code}, Year={new_year}, Gender={new_gender}")
+            print(f"📝 Activity logged")
             print(f"✅ SUCCESS: Student {student_id} updated")
             print(f"{'='*80}\n")
             return jsonify({'success': True, 'message': result})
@@ -367,34 +388,146 @@ def edit_student(student_id):
 
 def update_profile_pic():
     try:
-        data = request.get_json()
+        # A multipart post carries the fields in the form; a JSON body can't carry the file
+        data = request.get_json(silent=True) or request.form
         student_id = data.get('studentId')
         secure_url = data.get('secureUrl')
 
-        # Check if the file size is greater than 5MB
-        max_size_bytes = MAX_FILE_SIZE_MB * 1024 * 1024  # Convert MB to bytes
-        if 'file' in request.files:
-            file = request.files['file']
-            if file and file.content_length and file.content_length > max_size_bytes:
-                return jsonify({'error': f'File size exceeds the maximum allowed ({MAX_FILE_SIZE_MB}MB)'}), 400
+        # Size, type and dimensions were checked on the way in (website/uploads.py)
+        file = request.files.get('file')
+        if not file:
+            return jsonify({'error': 'No file uploaded'}), 400
 
-        # Delete existing profile picture from Cloudinary
         existing_profile_pic_url = student_model.get_student_profile_pic_url(student_id)
-        if existing_profile_pic_url:
-            public_id = get_public_id_from_url(existing_profile_pic_url)
-            deletion_response = cloudinary_destroy(public_id)
-            print(deletion_response)
 
-        upload_result = cloudinary.uploader.upload(file)
-        secure_url = upload_result['url']
-        student_model.update_student_profile_pic(student_id, secure_url)
+        secure_url, content_hash = pictures.store(file)
+        # Deletes the previous picture from Cloudinary unless other students share it
+        if not attach_picture(student_id, existing_profile_pic_url, secure_url, content_hash):
+            return jsonify({'error': 'Failed to update profile picture'}), 500
 
         return jsonify({'secureUrl': secure_url, 'message': 'Profile picture updated successfully'})
 
     except Exception as e:
-        return jsonify({'error': 'Failed to update profile picture'})
+        return jsonify({'error': 'Failed to update profile picture'}), 500
 
 # Add this route to your Flask application
 @studentRoute.route('/update_profile_pic', methods=['POST'])
+@accepts_uploads
 def route_update_profile_pic():
-    return update_profile_pic()
\ No newline at end of file
+    return update_profile_pic()
+
+MAX_ROW_FRAGMENTS = 200
+
+@studentRoute.route("/students/rows", methods=["GET"])
+def student_rows():
+    """Rendered table rows for the given ?id=... (used to patch the table after a live update)"""
+    student_ids = request.args.getlist("id")[:MAX_ROW_FRAGMENTS]
+    students = student_model.get_students_with_details(student_ids) if student_ids else []
+    return "".join(render_template('partials/student_row.html', student=student) for student in students)
+
+MAX_API_PAGE_SIZE = 500
+
+@studentRoute.route("/students/data", methods=["GET"])
+def student_data():
+    """DataTables server-side endpoint: one window of rows for the virtual-scrolling students table"""
+    start = max(request.args.get("start", default=0, type=int), 0)
+    length = request.args.get("length", default=100, type=int)
+    length = MAX_API_PAGE_SIZE if length < 1 else min(length, MAX_API_PAGE_SIZE)
+    order_column = request.args.get("order[0][column]", default=1, type=int)
+
+    data = student_model.get_students_window(
+        offset=start,
+        limit=length,
+        search_query=request.args.get("search[value]", ""),
+        order_by=request.args.get(f"columns[{order_column}][name]", "id"),
+        descending=request.args.get("order[0][dir]") == "desc",
+    )
+    if not isinstance(data, dict):
+        return jsonify({'error': data}), 500
+
+    rows = [{
+        'id': student['id'],
+        'firstname': student['firstname'],
+        'lastname': student['lastname'],
+        'program_code': student['program_code'],
+        'program_name': student['program_name'],
+        'college_code': student['college_code'],
+        'college_name': student['college_name'],
+        'year': student['year'],
+        'gender': student['gender'],
+        'avatar': str(media.avatar_img(student['profile_pic_url'], 40, css_class='profile-pic')) if student['profile_pic_url'] else None,
+    } for student in data['results']]
+    return jsonify({
+        'draw': request.args.get("draw", default=0, type=int),
+        'recordsTotal': data['total_count'],
+        'recordsFiltered': data['filtered_count'],
+        'data': rows,
+    })
+
+@studentRoute.route("/api/students/<string:student_id>", methods=["GET"])
+def api_student(student_id):
+    """One student's editable fields, fetched when the edit modal opens"""
+    student = student_model.get_student_with_details(student_id)
+    if not student:
+        return jsonify({'error': 'Student not found'}), 404
+    profile_pic_url = student.get('profile_pic_url')
+    return jsonify({
+        'id': student['id'],
+        'firstname': student['firstname'],
+        'lastname': student['lastname'],
+        'program_code': student['program_code'],
+        'year': student['year'],
+        'gender': student['gender'],
+        'profile_pic': media.avatar_url(profile_pic_url, 160) if profile_pic_url else None,
+    })
+
+@studentRoute.route("/api/students", methods=["GET"])
+def api_students():
+    """JSON page of students (the ASGI entry point serves this path natively)"""
+    page_number = max(request.args.get("page", default=1, type=int), 1)
+    page_size = request.args.get("page_size", default=25, type=int)
+    page_size = max(1, min(page_size, MAX_API_PAGE_SIZE))
+
+    data = student_model.get_students(page_size=page_size, page_number=page_number)
+    if not isinstance(data, dict):
+        return jsonify({'error': data}), 500
+    return jsonify(data)
+
+@studentRoute.route("/api/uploads/signature", methods=["POST"])
+def upload_signature():
+    """Signed parameters for one direct browser-to-Cloudinary profile picture upload"""
+    if not direct_uploads_enabled():
+        return jsonify({'error': 'Direct uploads are disabled'}), 503
+    response = jsonify(media.direct_upload_params())
+    response.headers['Cache-Control'] = 'no-store'
+    return response
+
+@studentRoute.route("/api/students/<string:student_id>/profile_pic/direct", methods=["POST"])
+def api_direct_profile_pic(student_id):
+    """Attach a picture the browser uploaded to Cloudinary (the JSON upload result) to a student"""
+    current_pic_url = student_model.get_student_profile_pic_url(student_id)
+    secure_url, error = claim_direct_upload(request.get_json(silent=True), current_pic_url)
+    if error:
+        return jsonify({'success': False, 'message': error}), 400
+    if not attach_picture(student_id, current_pic_url, secure_url):
+        return jsonify({'success': False, 'message': 'Failed to update profile picture'}), 500
+    log_activity("UPLOAD Profile Picture (direct)", f"ID={student_id}, URL={secure_url}")
+    return jsonify({'success': True, 'message': 'Profile picture updated successfully', 'secureUrl': secure_url})
+
+@studentRoute.route("/api/students/<string:student_id>/profile_pic", methods=["POST"])
+@accepts_uploads
+def api_upload_profile_pic(student_id):
+    """Replace a student's profile picture (the ASGI entry point serves this path natively)"""
+    profile_file = request.files.get("file")
+    if not profile_file:
+        return jsonify({'success': False, 'message': 'No file uploaded'}), 400
+
+    try:
+        current_pic_url = student_model.get_student_profile_pic_url(student_id)
+        secure_url, content_hash = pictures.store(profile_file)
+        if not attach_picture(student_id, current_pic_url, secure_url, content_hash):
+            return jsonify({'success': False, 'message': 'Failed to update profile picture'}), 500
+        log_activity("UPLOAD Profile Picture", f"ID={student_id}, URL={secure_url}")
+        return jsonify({'success': True, 'message': 'Profile picture updated successfully', 'secureUrl': secure_url})
+    except Exception as e:
+        return jsonify({'success': False, 'message': f'Failed to update profile picture: {str(e)}'}), 502
@@ -0,0 +1,19 @@
+from flask import Blueprint, request, jsonify
+from website.suggest import suggest_index
+
+suggestRoute = Blueprint('suggest', __name__)
+
+MAX_SUGGESTIONS = 50
+
+@suggestRoute.route("/api/suggest", methods=["GET"])
+def suggest():
+    """Typeahead matches for student IDs/names and program/college codes, served from memory"""
+    query = request.args.get("q", default="")
+    limit = max(1, min(request.args.get("limit", default=10, type=int), MAX_SUGGESTIONS))
+
+    suggest_index.ensure_loaded()
+    return jsonify({
+        'query': query,
+        'ready': suggest_index.ready,
+        'results': suggest_index.search(query, limit),
+    })
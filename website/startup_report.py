@@ -0,0 +1,67 @@
+"""
+Cold-start profiling for `flask --app app startup-report`.
+
+Runs `create_app()` in a fresh interpreter under `python -X importtime` and
+summarises where start-up time goes, so regressions in worker boot time are
+easy to spot.
+"""
+import subprocess
+import sys
+
+PROBE = (
+    "import time\n"
+    "start = time.perf_counter()\n"
+    "from website import create_app\n"
+    "create_app()\n"
+    "print(f'{(time.perf_counter() - start) * 1000:.1f}')\n"
+)
+
+def parse_importtime(stderr):
+    """Parse `-X importtime` output into (module, self_us, cumulative_us, depth) tuples"""
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        try:
+            self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+            depth = (len(name) - len(name.lstrip()) - 1) // 2
+            entries.append((name.strip(), int(self_us), int(cumulative_us), depth))
+        except ValueError:
+            continue
+    return entries
+
+def run_profile(cwd=None):
+    """Start the app in a subprocess and return (create_app_ms, import entries)"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", PROBE],
+        capture_output=True, text=True, cwd=cwd
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "probe failed")
+    return float(result.stdout.strip().splitlines()[-1]), parse_importtime(result.stderr)
+
+def print_report(total_ms, entries, top=15):
+    top_level = [entry for entry in entries if entry[3] == 0]
+    import_ms = sum(entry[2] for entry in top_level) / 1000
+
+    print(f"\n{'='*80}")
+    print(f"🚀 STARTUP REPORT")
+    print(f"{'='*80}")
+    print(f"create_app() wall time : {total_ms:8.1f} ms")
+    print(f"modules imported       : {len(entries):8d}")
+    print(f"top-level import time  : {import_ms:8.1f} ms")
+
+    print(f"\nSlowest top-level imports (cumulative):")
+    for name, self_us, cumulative_us, depth in sorted(top_level, key=lambda e: e[2], reverse=True)[:top]:
+        print(f"  {cumulative_us / 1000:8.1f} ms  {name}")
+
+    print(f"\nSlowest individual modules (self):")
+    for name, self_us, cumulative_us, depth in sorted(entries, key=lambda e: e[1], reverse=True)[:top]:
+        print(f"  {self_us / 1000:8.1f} ms  {name}")
+
+    loaded = {entry[0] for entry in entries}
+    optional = ["cloudinary", "flask_sqlalchemy", "sqlalchemy"]
+    print(f"\nOptional subsystems loaded at start-up:")
+    for name in optional:
+        print(f"  {'yes' if name in loaded else 'no ':>3}  {name}")
+    print(f"{'='*80}\n")
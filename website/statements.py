@@ -0,0 +1,73 @@
+"""
+Server-side prepared statements for hot queries.
+
+Each named query is PREPAREd the first time it runs on a pooled connection
+and EXECUTEd by name after that, so Postgres skips parsing and planning on
+every later call. Prepared statements live as long as the session (they
+survive commit and rollback), so the registry remembers per connection which
+names it has prepared; a connection it has not seen yet (new, or a replica)
+simply prepares on first use.
+
+Set PREPARED_STATEMENTS_ENABLED=false when running behind a transaction-
+pooling proxy (e.g. PgBouncer in transaction mode), where the session that
+prepared a statement is not guaranteed to run the next EXECUTE.
+"""
+import re
+import threading
+import weakref
+from psycopg2 import errors
+from config import Config
+
+_PLACEHOLDER = re.compile(r"%(%|s)")
+
+class StatementRegistry:
+    def __init__(self):
+        self._statements = {}
+        self._prepared = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _to_positional(sql):
+        """Convert psycopg2 %s placeholders to $1, $2, ... for PREPARE"""
+        count = 0
+        def replace(match):
+            nonlocal count
+            if match.group(1) == '%':
+                return '%'
+            count += 1
+            return f"${count}"
+        return _PLACEHOLDER.sub(replace, sql), count
+
+    def register(self, name, sql):
+        """Register a query under `name` (SQL written with the usual %s placeholders)"""
+        prepared_sql, param_count = self._to_positional(sql)
+        self._statements[name] = (sql, prepared_sql, param_count)
+        return name
+
+    def _prepared_names(self, conn):
+        with self._lock:
+            names = self._prepared.get(conn)
+            if names is None:
+                names = self._prepared[conn] = set()
+            return names
+
+    def execute(self, cur, name, params=()):
+        """Run a registered query on `cur`, preparing it on this connection first if needed"""
+        sql, prepared_sql, param_count = self._statements[name]
+        if not Config.PREPARED_STATEMENTS_ENABLED:
+            cur.execute(sql, params)
+            return
+
+        names = self._prepared_names(cur.connection)
+        if name not in names:
+            cur.execute(f"PREPARE {name} AS {prepared_sql}")
+            names.add(name)
+        arguments = f" ({', '.join(['%s'] * param_count)})" if param_count else ""
+        try:
+            cur.execute(f"EXECUTE {name}{arguments}", params)
+        except errors.InvalidSqlStatementName:
+            # Dropped behind our back (DISCARD ALL, proxy); prepare again next time
+            names.discard(name)
+            raise
+
+statements = StatementRegistry()
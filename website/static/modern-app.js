@@ -34,24 +34,42 @@ const SSISApp = {
     console.log('SSISApp initializing...');
     // Dark mode is now handled in head script
     this.initDataTables();
+    this.initTypeahead();
+    this.initLiveUpdates();
     this.bindEventHandlers();
     this.initFormValidation();
+    this.initDirectUploads();
+    this.initLazyStudents();
     this.showWelcomeMessage();
     console.log('SSISApp initialized successfully');
   },
 
   // Initialize DataTables for all pages
   initDataTables() {
-    // Students table
-    if (document.getElementById('studentsTable')) {
-      $('#studentsTable').DataTable({
+    // Students table: virtual scrolling over server-side windows (/students/data),
+    // so only the rows in view (plus a small buffer) are ever in the DOM
+    const $students = $('#studentsTable');
+    if ($students.length) {
+      $students.DataTable({
         ...this.config.dataTableConfig,
-        order: [[0, 'asc']], // Sort by Student ID
-        columnDefs: [
-          { orderable: false, targets: -1 }, // Actions column
-          { className: "text-center", targets: -1 }, // Center align Actions
-          { width: "150px", targets: -1 } // Fixed width for actions
-        ]
+        responsive: false, // Scroller needs rows of one fixed height
+        dom: '<"d-flex justify-content-between align-items-center mb-3"<"d-flex align-items-center"f>>rti',
+        serverSide: true,
+        processing: true,
+        ajax: { url: $students.data('source') },
+        search: { search: String($students.data('search') || '') },
+        searchDelay: 300,
+        deferRender: true,
+        scrollY: '65vh',
+        scrollCollapse: true,
+        scroller: { loadingIndicator: true, displayBuffer: 4 },
+        columns: this.studentColumns(),
+        order: [[1, 'asc']], // Sort by Student ID
+        createdRow: function(row, student) {
+          row.dataset.key = student.id;
+          row.dataset.programCode = student.program_code;
+          row.dataset.collegeCode = student.college_code;
+        }
       });
     }
 
@@ -82,6 +100,223 @@ const SSISApp = {
     }
   },
 
+  // Cells of a students table row (mirrors partials/student_row.html, minus the edit payload:
+  // the edit modal loads its data from /api/students/<id> when opened)
+  studentColumns() {
+    const esc = SSISApp.escapeHtml;
+    return [
+      { data: 'avatar', orderable: false, width: '60px', render: avatar =>
+          `<div class="profile-pic-container">${avatar || '<i class="bi bi-person profile-placeholder"></i>'}</div>` },
+      { data: 'id', name: 'id', width: '120px', render: id =>
+          `<span class="fw-bold font-monospace">${esc(id)}</span>` },
+      { data: 'lastname', name: 'name', render: (_, __, s) =>
+          `<div><div class="fw-semibold">${esc(s.firstname)} ${esc(s.lastname)}</div></div>` },
+      { data: 'program_code', name: 'program', render: (_, __, s) =>
+          `<div><div class="fw-medium">${esc(s.program_name)}</div><small class="text-muted">(${esc(s.program_code)})</small></div>` },
+      { data: 'college_name', name: 'college', render: name =>
+          `<small class="text-muted">${esc(name)}</small>` },
+      { data: 'year', name: 'year', width: '100px', render: year =>
+          `<span class="badge year-badge">${esc(year)}</span>` },
+      { data: 'gender', name: 'gender', width: '80px', render: gender =>
+          `<span class="badge gender-badge-${esc(gender.toLowerCase())}">
+             <i class="bi bi-${gender === 'Male' ? 'person-standing' : 'person-standing-dress'} me-1"></i>${esc(gender)}
+           </span>` },
+      { data: null, orderable: false, className: 'text-center', width: '150px', render: (_, __, s) =>
+          `<div class="btn-group" role="group">
+             <a href="/students/view/${encodeURIComponent(s.id)}" class="btn btn-outline-info btn-sm" title="View Details"><i class="bi bi-eye"></i></a>
+             <button type="button" class="btn btn-outline-primary btn-sm edit-student" title="Edit Student"
+                     data-bs-toggle="modal" data-bs-target="#editStudentModal" data-student-id="${esc(s.id)}"><i class="bi bi-pencil"></i></button>
+             <a href="javascript:void(0)" class="btn btn-outline-danger btn-sm delete-student" title="Delete Student"
+                data-student-id="${esc(s.id)}" data-student-name="${esc(s.firstname)} ${esc(s.lastname)}"><i class="bi bi-trash"></i></a>
+           </div>` }
+    ];
+  },
+
+  escapeHtml(value) {
+    return String(value == null ? '' : value).replace(/[&<>"']/g, ch => (
+      { '&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;' }[ch]
+    ));
+  },
+
+  // Typeahead for the students search box, answered from the server's in-memory index
+  initTypeahead() {
+    const $input = $('#studentsTable_filter input');
+    if (!$input.length) return;
+
+    const $list = $('<datalist id="studentSuggestions"></datalist>').appendTo('body');
+    $input.attr({ list: 'studentSuggestions', autocomplete: 'off' });
+
+    let timer = null;
+    $input.on('input', function() {
+      clearTimeout(timer);
+      const query = this.value.trim();
+      if (!query) {
+        $list.empty();
+        return;
+      }
+      timer = setTimeout(() => {
+        $.getJSON('/api/suggest', { q: query, limit: 8 }, function(data) {
+          $list.empty();
+          data.results.forEach(function(item) {
+            $('<option>').val(item.value).text(`${item.label} (${item.type})`).appendTo($list);
+          });
+        });
+      }, 100);
+    });
+  },
+
+  // Live updates: row-level change events over SSE, patched into the tables in place
+  live: {
+    source: null,
+    connected: false,
+    reloadTimers: {}
+  },
+
+  initLiveUpdates() {
+    const tables = ['studentsTable', 'programsTable', 'collegesTable'].filter(id => document.getElementById(id));
+    if (!tables.length || !window.EventSource) return;
+
+    const source = new EventSource('/events');
+    this.live.source = source;
+    source.onopen = () => { this.live.connected = true; };
+    source.onerror = () => { this.live.connected = false; };
+    source.onmessage = (e) => {
+      const event = JSON.parse(e.data);
+      tables.forEach(tableId => this.applyChange(tableId, event));
+    };
+  },
+
+  // Decide which rows of a table an event touches: remove them, or re-fetch them
+  applyChange(tableId, event) {
+    if (event.op === 'RESYNC') {
+      this.refreshTable(tableId);
+      return;
+    }
+
+    if (this.isServerSide(tableId)) {
+      // Rows may move between windows; re-fetch the window in view (coalescing bursts)
+      const touched = event.table === 'student' ||
+        this.tableRowNodes(tableId).some(node => [event.key, event.old_key].includes(node.dataset[event.table === 'program' ? 'programCode' : 'collegeCode']));
+      if (touched) this.scheduleReload(tableId);
+      return;
+    }
+
+    const refs = event.refs || [];
+    const keysWhere = (attr, values) => this.tableRowNodes(tableId)
+      .filter(node => values.includes(node.dataset[attr]))
+      .map(node => node.dataset.key);
+
+    if (tableId === 'studentsTable') {
+      if (event.table === 'student') {
+        this.patchRows(tableId, '/students/rows', 'id', [event.key], [event.old_key], event.op === 'DELETE');
+      } else if (event.table === 'program') {
+        this.patchRows(tableId, '/students/rows', 'id', keysWhere('programCode', [event.key, event.old_key]));
+      } else if (event.table === 'college') {
+        this.patchRows(tableId, '/students/rows', 'id', keysWhere('collegeCode', [event.key]));
+      }
+    } else if (tableId === 'programsTable') {
+      if (event.table === 'program') {
+        this.patchRows(tableId, '/programs/rows', 'code', [event.key], [event.old_key], event.op === 'DELETE');
+      } else if (event.table === 'student') {
+        this.patchRows(tableId, '/programs/rows', 'code', refs);
+      } else if (event.table === 'college') {
+        this.patchRows(tableId, '/programs/rows', 'code', keysWhere('collegeCode', [event.key]));
+      }
+    } else if (tableId === 'collegesTable') {
+      if (event.table === 'college') {
+        this.patchRows(tableId, '/colleges/rows', 'code', [event.key], [event.old_key], event.op === 'DELETE');
+      } else if (event.table === 'program') {
+        this.patchRows(tableId, '/colleges/rows', 'code', refs);
+      } else if (event.table === 'student' && refs.length) {
+        this.fetchRows('/colleges/rows', 'program', refs).then(rows => this.replaceRows(tableId, rows));
+      }
+    }
+  },
+
+  isServerSide(tableId) {
+    const $table = $(`#${tableId}`);
+    return $.fn.DataTable.isDataTable($table) && $table.DataTable().page.info().serverSide;
+  },
+
+  scheduleReload(tableId) {
+    clearTimeout(this.live.reloadTimers[tableId]);
+    this.live.reloadTimers[tableId] = setTimeout(() => this.refreshTable(tableId), 250);
+  },
+
+  tableRowNodes(tableId) {
+    const $table = $(`#${tableId}`);
+    const nodes = $.fn.DataTable.isDataTable($table) ? $table.DataTable().rows().nodes().toArray() : $table.find('tbody tr').toArray();
+    return nodes.filter(node => node.dataset && node.dataset.key);
+  },
+
+  fetchRows(url, param, keys) {
+    const query = $.param(keys.map(key => ({ name: param, value: key })));
+    return $.get(`${url}?${query}`).then(html => $('<tbody>').html(html).children('tr').toArray());
+  },
+
+  // Drop the stale rows for `keys` (and `staleKeys`), then add whatever the server still renders
+  patchRows(tableId, url, param, keys, staleKeys = [], deleted = false) {
+    keys = [...new Set(keys.filter(Boolean))];
+    const remove = [...new Set(keys.concat(staleKeys.filter(Boolean)))];
+    if (!remove.length) return;
+    if (deleted) {
+      this.replaceRows(tableId, [], remove);
+      return;
+    }
+    // A server-filtered list (?search=) only patches rows it is already showing
+    const filtered = new URLSearchParams(window.location.search).has('search');
+    const shown = new Set(this.tableRowNodes(tableId).map(node => node.dataset.key));
+    this.fetchRows(url, param, keys).then(rows => {
+      if (filtered) rows = rows.filter(row => shown.has(row.dataset.key));
+      this.replaceRows(tableId, rows, remove);
+    });
+  },
+
+  replaceRows(tableId, rows, removeKeys) {
+    const keys = new Set(removeKeys || rows.map(row => row.dataset.key));
+    const $table = $(`#${tableId}`);
+    const stale = this.tableRowNodes(tableId).filter(node => keys.has(node.dataset.key));
+    if ($.fn.DataTable.isDataTable($table)) {
+      const table = $table.DataTable();
+      stale.forEach(node => table.row(node).remove());
+      rows.forEach(row => table.row.add(row));
+      table.draw(false);
+    } else {
+      $(stale).remove();
+      $table.find('tbody').append(rows);
+    }
+  },
+
+  // After a successful edit: let the live stream patch the table, or fall back to a reload
+  afterWrite(message, reloadPath) {
+    const serverTable = ['studentsTable'].find(id => this.isServerSide(id));
+    if (this.live.connected) {
+      this.showToast(message, 'success');
+    } else if (serverTable) {
+      this.showToast(message, 'success');
+      this.refreshTable(serverTable);
+      this.showToast(message, 'success');
+    } else {
+      setTimeout(function() {
+        window.location.href = reloadPath + '?success=' + encodeURIComponent(message);
+      }, 300);
+    }
+  },
+
+  deleteRecord(deleteUrl) {
+    const serverTable = ['studentsTable'].find(id => this.isServerSide(id));
+    if (!this.live.connected && !serverTable) {
+      window.location.href = deleteUrl;
+      return;
+    }
+    $.ajax({ url: deleteUrl, type: 'DELETE' })
+      .done(response => {
+        this.showToast(response.message, response.success ? 'success' : 'error');
+        if (serverTable && !this.live.connected) this.refreshTable(serverTable);
+      })
+      .fail((xhr, status, error) => this.showToast('Error deleting record: ' + error, 'error'));
+  },
+
   // Bind event handlers
   bindEventHandlers() {
     // Student form handlers
@@ -105,35 +340,53 @@ const SSISApp = {
     $(document).off('click', '.edit-student').on('click', '.edit-student', function() {
       const data = $(this).data();
       console.log('Edit student clicked, data:', data);
-      
-      $('#editStudentId').val(data.studentId);
-      $('#editStudentIdHidden').val(data.studentId);
-      $('#editFirstName').val(data.firstName);
-      $('#editLastName').val(data.lastName);
-      $('#editProgramCode').val(data.programCode);
-      $('#editYear').val(data.year);
-      $('#editGender').val(data.gender);
-      
-      // Handle profile picture
-      if (data.profilePic) {
-        $('#editCurrentProfile').show();
-        $('#editCurrentProfileImg').attr('src', data.profilePic);
-      } else {
-        $('#editCurrentProfile').hide();
-      }
+
+      const fill = function(student) {
+        $('#editStudentId').val(student.id);
+        $('#editStudentIdHidden').val(student.id);
+        $('#editFirstName').val(student.firstname);
+        $('#editLastName').val(student.lastname);
+        $('#editProgramCode').val(student.program_code);
+        $('#editYear').val(student.year);
+        $('#editGender').val(student.gender);
+
+        // Handle profile picture
+        if (student.profile_pic) {
+          $('#editCurrentProfile').show();
+          $('#editCurrentProfileImg').attr('src', student.profile_pic);
+        } else {
+          $('#editCurrentProfile').hide();
+        }
+
+        console.log('Set program code to:', student.program_code);
+        console.log('Program dropdown value after setting:', $('#editProgramCode').val());
+      };
+
       // Clear file input and remove checkbox
       $('#editProfilePic').val('');
       $('#editRemoveProfilePic').prop('checked', false);
-      
-      console.log('Set program code to:', data.programCode);
-      console.log('Program dropdown value after setting:', $('#editProgramCode').val());
-      
+
       // Set form action
       $('#editStudentForm').attr('action', `/students/edit/${data.studentId}`);
+
+      if (data.firstName !== undefined) {
+        // Button carries the payload (student detail page)
+        fill({
+          id: data.studentId, firstname: data.firstName, lastname: data.lastName,
+          program_code: data.programCode, year: data.year, gender: data.gender, profile_pic: data.profilePic
+        });
+      } else {
+        // Virtualized table rows don't: load it on demand
+        $('#editStudentForm')[0].reset();
+        $('#editCurrentProfile').hide();
+        $.getJSON(`/api/students/${encodeURIComponent(data.studentId)}`)
+          .done(fill)
+          .fail(() => SSISApp.showToast('Could not load student ' + data.studentId, 'error'));
+      }
     });
     
     // Handle student edit form submission with AJAX
-    $('#editStudentForm').off('submit').on('submit', function(e) {
+    $('#editStudentForm').off('submit').on('submit', async function(e) {
       e.preventDefault();
       
       const form = $(this);
@@ -143,6 +396,22 @@ const SSISApp = {
       
       // Disable button and show loading
       submitBtn.prop('disabled', true).html('<i class="bi bi-arrow-clockwise me-2 spin"></i>Updating...');
+
+      // A new picture goes straight to Cloudinary; only its upload result is posted here
+      const file = $('#editProfilePic')[0] && $('#editProfilePic')[0].files[0];
+      if (file && !$('#editRemoveProfilePic').prop('checked')) {
+        try {
+          const result = await SSISApp.directUpload(file);
+          if (result) {
+            formData.delete('file');
+            formData.append('directUpload', JSON.stringify(result));
+          }
+        } catch (error) {
+          alert('Error uploading picture: ' + error.message);
+          submitBtn.prop('disabled', false).html(originalBtnText);
+          return;
+        }
+      }
       
       $.ajax({
         url: form.attr('action'),
@@ -157,10 +426,8 @@ const SSISApp = {
             // Close modal
             $('#editStudentModal').modal('hide');
             
-            // Show success message and reload
-            setTimeout(function() {
-              window.location.href = '/students?success=' + encodeURIComponent(response.message || 'Student updated successfully');
-            }, 300);
+            submitBtn.prop('disabled', false).html(originalBtnText);
+            SSISApp.afterWrite(response.message || 'Student updated successfully', '/students');
           } else {
             alert('Error: ' + (response.message || 'Failed to update student'));
             submitBtn.prop('disabled', false).html(originalBtnText);
@@ -168,7 +435,9 @@ const SSISApp = {
         },
         error: function(xhr, status, error) {
           console.error('Student update error:', error);
-          alert('Error updating student: ' + error);
+          // Rejected uploads (413/415/422) explain themselves in the JSON body
+          const message = (xhr.responseJSON && xhr.responseJSON.message) || error;
+          alert('Error updating student: ' + message);
           submitBtn.prop('disabled', false).html(originalBtnText);
         }
       });
@@ -205,7 +474,7 @@ const SSISApp = {
         console.log('⏳ Redirecting... (server will handle the deletion)');
         
         try {
-          window.location.href = deleteUrl;
+          SSISApp.deleteRecord(deleteUrl);
         } catch (error) {
           console.error('❌ Error during redirect:', error);
           alert('Error: Could not redirect to delete page');
@@ -292,10 +561,8 @@ const SSISApp = {
             // Close modal
             $('#editProgramModal').modal('hide');
             
-            // Show success message and reload
-            setTimeout(function() {
-              window.location.href = '/programs?success=' + encodeURIComponent(response.message || 'Program updated successfully');
-            }, 300);
+            submitBtn.prop('disabled', false).html(originalBtnText);
+            SSISApp.afterWrite(response.message || 'Program updated successfully', '/programs');
           } else {
             alert('Error: ' + (response.message || 'Failed to update program'));
             submitBtn.prop('disabled', false).html(originalBtnText);
@@ -357,7 +624,7 @@ const SSISApp = {
         console.log('='.repeat(80));
         
         try {
-          window.location.href = deleteUrl;
+          SSISApp.deleteRecord(deleteUrl);
         } catch (error) {
           console.error('❌ Error during redirect:', error);
           alert('Error: Could not redirect to delete page');
@@ -419,10 +686,8 @@ const SSISApp = {
             // Close modal
             $('#editCollegeModal').modal('hide');
             
-            // Show success message and reload
-            setTimeout(function() {
-              window.location.href = '/colleges?success=' + encodeURIComponent(response.message || 'College updated successfully');
-            }, 300);
+            submitBtn.prop('disabled', false).html(originalBtnText);
+            SSISApp.afterWrite(response.message || 'College updated successfully', '/colleges');
           } else {
             alert('Error: ' + (response.message || 'Failed to update college'));
             submitBtn.prop('disabled', false).html(originalBtnText);
@@ -470,7 +735,7 @@ const SSISApp = {
         console.log('='.repeat(80));
         
         try {
-          window.location.href = deleteUrl;
+          SSISApp.deleteRecord(deleteUrl);
         } catch (error) {
           console.error('❌ Error during redirect:', error);
           alert('Error: Could not redirect to delete page');
@@ -506,6 +771,100 @@ const SSISApp = {
     }, 5000);
   },
 
+  // Upload an image straight to Cloudinary with parameters signed by /api/uploads/signature.
+  // Resolves to the upload result to post back, or null when direct uploads are off (the
+  // file is then posted through Flask as before)
+  async directUpload(file) {
+    const ticketResponse = await fetch('/api/uploads/signature', { method: 'POST' });
+    if (ticketResponse.status === 503 || ticketResponse.status === 404) return null;
+    if (!ticketResponse.ok) throw new Error('Could not start the upload');
+    const ticket = await ticketResponse.json();
+
+    const extension = file.name.split('.').pop().toLowerCase();
+    if (!ticket.formats.includes(extension)) throw new Error('Invalid file type. Please upload a valid file.');
+    if (file.size > ticket.max_bytes) {
+      throw new Error(`File size exceeds the maximum allowed (${Math.round(ticket.max_bytes / 1048576)}MB)`);
+    }
+
+    const body = new FormData();
+    Object.entries(ticket.params).forEach(([key, value]) => body.append(key, value));
+    body.append('file', file);
+    const response = await fetch(ticket.upload_url, { method: 'POST', body });
+    const result = await response.json();
+    if (!response.ok) throw new Error((result.error && result.error.message) || 'Upload failed');
+    return {
+      public_id: result.public_id,
+      version: result.version,
+      signature: result.signature,
+      format: result.format,
+      bytes: result.bytes
+    };
+  },
+
+  // Program/college detail pages: each program's students load a page at a time,
+  // starting when its section scrolls into view
+  initLazyStudents() {
+    const sections = document.querySelectorAll('.lazy-students');
+    if (!sections.length) return;
+
+    const observer = window.IntersectionObserver ? new IntersectionObserver(entries => {
+      entries.filter(entry => entry.isIntersecting).forEach(entry => {
+        observer.unobserve(entry.target);
+        this.loadStudentPage(entry.target);
+      });
+    }, { rootMargin: '200px' }) : null;
+
+    sections.forEach(section => {
+      $(section).find('.load-more-students').on('click', () => this.loadStudentPage(section));
+      if (observer) observer.observe(section);
+      else this.loadStudentPage(section);
+    });
+  },
+
+  loadStudentPage(section) {
+    if (section.dataset.loading === 'true' || section.dataset.done === 'true') return;
+    section.dataset.loading = 'true';
+    const $section = $(section);
+    const $button = $section.find('.load-more-students').prop('disabled', true);
+    const params = section.dataset.after ? { after: section.dataset.after } : {};
+
+    $.getJSON(section.dataset.source, params).done(page => {
+      const $tbody = $section.find('tbody').append(page.html);
+      const shown = $tbody.children('tr').length;
+      section.dataset.after = page.next_after || '';
+      section.dataset.done = page.next_after ? 'false' : 'true';
+      $section.find('.lazy-status').text(`Showing ${shown} of ${section.dataset.total} students`);
+      $button.toggleClass('d-none', !page.next_after);
+    }).fail(() => {
+      $section.find('.lazy-status').text('Could not load students');
+      $button.removeClass('d-none');
+    }).always(() => {
+      section.dataset.loading = 'false';
+      $button.prop('disabled', false);
+    });
+  },
+
+  // Add-student form: upload the picture first, then submit the form without the file
+  initDirectUploads() {
+    $('#addStudentModal form').off('submit.direct').on('submit.direct', function(e) {
+      const form = this;
+      const input = form.querySelector('input[type="file"][name="file"]');
+      if (e.isDefaultPrevented() || !input || !input.files.length) return;
+      e.preventDefault();
+
+      SSISApp.directUpload(input.files[0]).then(result => {
+        if (result) {
+          $('<input type="hidden" name="directUpload">').val(JSON.stringify(result)).appendTo(form);
+          input.value = '';
+        }
+        form.submit();
+      }).catch(error => {
+        alert('Error uploading picture: ' + error.message);
+        $(form).find('button[type="submit"]').prop('disabled', false).html('<i class="bi bi-plus-circle me-2"></i>Add Student');
+      });
+    });
+  },
+
   // Form validation
   initFormValidation() {
     // Add real-time validation feedback
@@ -592,7 +951,7 @@ const SSISApp = {
 
   // Utility functions
   refreshTable(tableId) {
-    if ($.fn.DataTable.isDataTable(`#${tableId}`)) {
+    if ($.fn.DataTable.isDataTable(`#${tableId}`) && $(`#${tableId}`).DataTable().ajax.url()) {
       $(`#${tableId}`).DataTable().ajax.reload(null, false);
     } else {
       location.reload();
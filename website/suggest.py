@@ -0,0 +1,186 @@
+"""
+In-process prefix index for typeahead suggestions.
+
+Terms (student IDs and names, program codes, college codes) are kept in one
+sorted list of (term, kind, key) tuples, so a lookup is a bisect to the first
+term >= prefix followed by a short forward scan. Nothing here touches Postgres
+on the request path.
+
+The index is filled from the database in keyset-ordered batches by a
+background thread (or synchronously by the pre-fork warm-up), kept current by
+the model write methods, and rebuilt every SUGGEST_REFRESH_SECONDS to pick up
+writes made by other worker processes.
+"""
+import bisect
+import os
+import threading
+import time
+from config import Config
+from website.database import DatabaseManager
+
+class PrefixIndex:
+    BATCH_SIZE = 1000
+    RETRY_SECONDS = 5
+
+    def __init__(self):
+        self._terms = []
+        self._entries = {}
+        self._lock = threading.RLock()
+        self._ready = False
+        self._loading_pid = None
+        self._loaded_at = 0.0
+        self._attempted_at = 0.0
+        # One list per rebuild in progress: changes made meanwhile, replayed onto the new index
+        self._journals = []
+
+    # ------------------------------------------------------------------
+    # Mutation
+    # ------------------------------------------------------------------
+    def _add(self, kind, key, label, terms, keep_sorted=True):
+        entry_terms = []
+        for term in dict.fromkeys(t.strip().lower() for t in terms if t and t.strip()):
+            item = (term, kind, key)
+            if keep_sorted:
+                bisect.insort(self._terms, item)
+            else:
+                self._terms.append(item)
+            entry_terms.append(item)
+        self._entries[(kind, key)] = (label, entry_terms)
+
+    def _remove(self, kind, key):
+        entry = self._entries.pop((kind, key), None)
+        if entry is None:
+            return
+        for item in entry[1]:
+            position = bisect.bisect_left(self._terms, item)
+            if position < len(self._terms) and self._terms[position] == item:
+                del self._terms[position]
+
+    def _apply(self, change):
+        kind, key, entry = change
+        self._remove(kind, key)
+        if entry is not None:
+            self._add(kind, key, *entry)
+
+    def _change(self, kind, key, entry=None):
+        """Upsert (entry = (label, terms)) or remove (entry None) one entry"""
+        with self._lock:
+            self._apply((kind, key, entry))
+            for journal in self._journals:
+                journal.append((kind, key, entry))
+
+    @staticmethod
+    def _student_entry(student_id, firstname, lastname):
+        return f"{firstname} {lastname}", [student_id, firstname, lastname, f"{firstname} {lastname}"]
+
+    def upsert_student(self, student_id, firstname, lastname):
+        self._change('student', student_id, self._student_entry(student_id, firstname, lastname))
+
+    def remove_student(self, student_id):
+        self._change('student', student_id)
+
+    def upsert_program(self, code, name):
+        self._change('program', code, (name, [code]))
+
+    def upsert_college(self, code, name):
+        self._change('college', code, (name, [code]))
+
+    def invalidate(self):
+        """Force a rebuild on next use (e.g. after a cascading delete)"""
+        with self._lock:
+            self._loaded_at = 0.0
+            self._attempted_at = 0.0
+
+    # ------------------------------------------------------------------
+    # Loading
+    # ------------------------------------------------------------------
+    def load(self):
+        """(Re)build the index from Postgres in keyset-ordered batches"""
+        # Terms are appended unsorted and sorted once at the end (insort per term is quadratic)
+        fresh = PrefixIndex()
+        journal = []
+        with self._lock:
+            self._journals.append(journal)
+        try:
+            with DatabaseManager.get_cursor() as (cur, conn):
+                cur.execute("SELECT code, name FROM college")
+                for row in cur.fetchall():
+                    fresh._add('college', row['code'], row['name'], [row['code']], keep_sorted=False)
+                cur.execute("SELECT code, name FROM program")
+                for row in cur.fetchall():
+                    fresh._add('program', row['code'], row['name'], [row['code']], keep_sorted=False)
+
+            last_id = ''
+            while True:
+                with DatabaseManager.get_cursor() as (cur, conn):
+                    cur.execute("""
+                        SELECT id, firstname, lastname FROM student
+                        WHERE id > %s ORDER BY id LIMIT %s
+                    """, (last_id, self.BATCH_SIZE))
+                    rows = cur.fetchall()
+                if not rows:
+                    break
+                for row in rows:
+                    fresh._add('student', row['id'], *self._student_entry(row['id'], row['firstname'], row['lastname']),
+                               keep_sorted=False)
+                last_id = rows[-1]['id']
+            fresh._terms.sort()
+        except Exception as e:
+            print(f"Failed to build suggestion index: {str(e)}")
+            return False
+        finally:
+            with self._lock:
+                self._journals.remove(journal)
+                self._loading_pid = None
+
+        with self._lock:
+            # Writes made in this process while the rebuild was reading may be missing from it
+            for change in journal:
+                fresh._apply(change)
+            self._terms, self._entries = fresh._terms, fresh._entries
+            self._ready = True
+            self._loaded_at = time.monotonic()
+        return True
+
+    def ensure_loaded(self):
+        """Start a background (re)build if the index is missing or stale in this process"""
+        with self._lock:
+            now = time.monotonic()
+            if self._loading_pid == os.getpid():
+                return
+            if self._ready and now - self._loaded_at < Config.SUGGEST_REFRESH_SECONDS:
+                return
+            if now - self._attempted_at < self.RETRY_SECONDS:
+                return
+            self._attempted_at = now
+            self._loading_pid = os.getpid()
+        threading.Thread(target=self.load, name='suggest-index-loader', daemon=True).start()
+
+    # ------------------------------------------------------------------
+    # Query
+    # ------------------------------------------------------------------
+    def search(self, prefix, limit=10):
+        """Top `limit` entries with a term starting with prefix"""
+        prefix = prefix.strip().lower()
+        if not prefix:
+            return []
+
+        results = []
+        seen = set()
+        with self._lock:
+            position = bisect.bisect_left(self._terms, (prefix,))
+            while position < len(self._terms) and len(results) < limit:
+                term, kind, key = self._terms[position]
+                if not term.startswith(prefix):
+                    break
+                if (kind, key) not in seen:
+                    seen.add((kind, key))
+                    results.append({'type': kind, 'value': key, 'label': self._entries[(kind, key)][0]})
+                position += 1
+        return results
+
+    @property
+    def ready(self):
+        return self._ready
+
+suggest_index = PrefixIndex()
@@ -0,0 +1,267 @@
+"""
+Upload ingest: reject bad profile pictures before they cost memory, disk or bandwidth.
+
+Views that take a picture are marked with @accepts_uploads. For a POST to one
+of them, a before_request hook
+
+  1. answers 413 straight from the Content-Length header, before the body is
+     read, when it exceeds MAX_CONTENT_LENGTH (the picture plus form fields);
+  2. parses the form through UploadRequest, whose per-file spool counts bytes
+     as they arrive and aborts the parse with 413 as soon as a file passes
+     UPLOAD_MAX_BYTES (this also covers chunked bodies without a length);
+  3. sniffs each file's magic bytes (PNG, JPEG, GIF, WebP; the filename and
+     the browser's Content-Type are not trusted), answering 415 otherwise;
+  4. reads the image dimensions from the file header only - no decoding - and
+     answers 422 above UPLOAD_MAX_DIMENSION / UPLOAD_MAX_PIXELS.
+
+The view only runs for uploads that passed; inspect_image() is also used by the
+native ASGI upload handler (website/asgi.py). Each file is also hashed as it
+streams in; content_hash() is the key website/pictures.py deduplicates on.
+"""
+import collections
+import hashlib
+import struct
+import tempfile
+import threading
+from flask import Request
+from werkzeug.exceptions import RequestEntityTooLarge
+from config import Config
+
+# Enough for every signature below and the PNG/GIF/WebP dimension fields
+SNIFF_BYTES = 4096
+
+# BLAKE2b-256, hex: the picture_asset key (migrate_picture_dedup.sql)
+HASH_DIGEST_SIZE = 32
+
+# Multipart file parts are kept in memory up to this size, then spooled to disk
+SPOOL_MEMORY_BYTES = 500 * 1024
+
+# JPEG stores its dimensions in the first SOF segment, after any EXIF/ICC data;
+# only the segment headers are read on the way there
+JPEG_MAX_SEGMENTS = 256
+JPEG_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+ImageInfo = collections.namedtuple('ImageInfo', 'format width height')
+
+class UploadRejected(Exception):
+    """An upload failed ingest checks; status_code is the HTTP status to answer with"""
+
+    def __init__(self, message, status_code=400, reason='invalid'):
+        self.status_code = status_code
+        self.reason = reason
+        super().__init__(message)
+
+def max_upload_mb():
+    return Config.UPLOAD_MAX_BYTES / (1024 * 1024)
+
+def too_large():
+    return UploadRejected(f'File size exceeds {max_upload_mb():g}MB limit', 413, 'too_large')
+
+def new_hash():
+    return hashlib.blake2b(digest_size=HASH_DIGEST_SIZE)
+
+class _CountingSpool(tempfile.SpooledTemporaryFile):
+    """Spool for one multipart file that hashes it and aborts the parse once it grows past `limit` bytes"""
+
+    def __init__(self, limit):
+        super().__init__(max_size=SPOOL_MEMORY_BYTES, mode='rb+')
+        self._limit = limit
+        self.received = 0
+        self.digest = new_hash()
+
+    def write(self, data):
+        self.received += len(data)
+        if self.received > self._limit:
+            raise RequestEntityTooLarge()
+        self.digest.update(data)
+        return super().write(data)
+
+def content_hash(file):
+    """Hex BLAKE2b of an upload: computed while it streamed in, else read from `file` (bytes or a stream)"""
+    if isinstance(file, (bytes, bytearray)):
+        digest = new_hash()
+        digest.update(file)
+        return digest.hexdigest()
+    stream = getattr(file, 'stream', file)
+    if isinstance(stream, _CountingSpool):
+        return stream.digest.hexdigest()
+    digest = new_hash()
+    stream.seek(0)
+    for chunk in iter(lambda: stream.read(64 * 1024), b''):
+        digest.update(chunk)
+    stream.seek(0)
+    return digest.hexdigest()
+
+class UploadRequest(Request):
+    """Flask request whose uploaded files are size-checked while they stream in"""
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        return _CountingSpool(Config.UPLOAD_MAX_BYTES)
+
+def _png_size(head):
+    if head[12:16] != b'IHDR' or len(head) < 24:
+        raise UploadRejected('Corrupt PNG header', 422, 'corrupt')
+    return struct.unpack('>II', head[16:24])
+
+def _gif_size(head):
+    if len(head) < 10:
+        raise UploadRejected('Corrupt GIF header', 422, 'corrupt')
+    return struct.unpack('<HH', head[6:10])
+
+def _webp_size(head):
+    chunk = head[12:16]
+    if chunk == b'VP8 ' and len(head) >= 30 and head[23:26] == b'\x9d\x01\x2a':
+        width, height = struct.unpack('<HH', head[26:30])
+        return width & 0x3FFF, height & 0x3FFF
+    if chunk == b'VP8L' and len(head) >= 25 and head[20] == 0x2F:
+        bits = int.from_bytes(head[21:25], 'little')
+        return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+    if chunk == b'VP8X' and len(head) >= 30:
+        return int.from_bytes(head[24:27], 'little') + 1, int.from_bytes(head[27:30], 'little') + 1
+    raise UploadRejected('Corrupt WebP header', 422, 'corrupt')
+
+def _jpeg_size(stream):
+    """Walk the JPEG segment headers (seeking past their bodies) to the first SOF"""
+    stream.seek(2)
+    for _ in range(JPEG_MAX_SEGMENTS):
+        byte = stream.read(1)
+        while byte == b'\xff':
+            byte = stream.read(1)       # fill bytes before the marker
+        if not byte:
+            break
+        marker = byte[0]
+        if marker in (0x01, 0xD8) or 0xD0 <= marker <= 0xD7:
+            continue                    # standalone markers carry no length
+        if marker in (0xD9, 0xDA):
+            break                       # end of image / scan data before any SOF
+        header = stream.read(2)
+        if len(header) < 2:
+            break
+        length = struct.unpack('>H', header)[0]
+        if length < 2:
+            break
+        if marker in JPEG_SOF_MARKERS:
+            frame = stream.read(5)
+            if len(frame) < 5:
+                break
+            height, width = struct.unpack('>HH', frame[1:5])
+            return width, height
+        stream.seek(length - 2, 1)
+        if stream.read(1) != b'\xff':
+            break
+        stream.seek(-1, 1)
+    raise UploadRejected('Corrupt JPEG header', 422, 'corrupt')
+
+def sniff_format(head):
+    """Image format from magic bytes, or None"""
+    if head.startswith(b'\x89PNG\r\n\x1a\n'):
+        return 'png'
+    if head.startswith(b'\xff\xd8\xff'):
+        return 'jpeg'
+    if head[:6] in (b'GIF87a', b'GIF89a'):
+        return 'gif'
+    if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+        return 'webp'
+    return None
+
+def inspect_image(stream):
+    """Sniff and measure an uploaded picture from its header; ImageInfo or UploadRejected.
+
+    `stream` must be seekable; it is left at position 0 for the Cloudinary upload.
+    """
+    try:
+        stream.seek(0)
+        head = stream.read(SNIFF_BYTES)
+        image_format = sniff_format(head)
+        if image_format is None:
+            raise UploadRejected('Invalid file type. Please upload a PNG, JPEG, GIF or WebP image.', 415, 'bad_type')
+        if image_format == 'png':
+            width, height = _png_size(head)
+        elif image_format == 'gif':
+            width, height = _gif_size(head)
+        elif image_format == 'webp':
+            width, height = _webp_size(head)
+        else:
+            width, height = _jpeg_size(stream)
+    finally:
+        stream.seek(0)
+
+    if not width or not height:
+        raise UploadRejected('Corrupt image header', 422, 'corrupt')
+    if max(width, height) > Config.UPLOAD_MAX_DIMENSION or width * height > Config.UPLOAD_MAX_PIXELS:
+        raise UploadRejected(
+            f'Image is {width}x{height}; the limit is {Config.UPLOAD_MAX_DIMENSION}px per side', 422, 'too_big_dimensions'
+        )
+    return ImageInfo(image_format, width, height)
+
+def accepts_uploads(view):
+    """Run the ingest checks on this view's uploaded files before it is called"""
+    view._accepts_uploads = True
+    return view
+
+class UploadMetrics:
+    """Accepted uploads and rejections by reason (per process)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = collections.Counter()
+
+    def record(self, outcome):
+        with self._lock:
+            self._counts[outcome] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self._counts)
+
+upload_metrics = UploadMetrics()
+
+def init_app(app):
+    """Use UploadRequest and check uploads to @accepts_uploads views before they run"""
+    from flask import g, request, jsonify, flash, redirect, url_for
+
+    app.request_class = UploadRequest
+
+    def rejection_response(error):
+        upload_metrics.record(error.reason)
+        print(f"🚫 Upload rejected ({request.method} {request.path}): {error}")
+        message = str(error)
+        if request.path.startswith('/api/') or request.headers.get('X-Requested-With') == 'XMLHttpRequest':
+            response = jsonify({'success': False, 'message': message})
+            response.status_code = error.status_code
+            return response
+        # Plain form post: back to the page it came from with the reason, like the routes' own
+        # errors (not request.url: upload endpoints are POST-only, so following it would be a 405)
+        flash(message, 'danger')
+        referrer = request.referrer
+        if referrer and referrer.startswith(request.host_url):
+            return redirect(referrer)
+        return redirect(url_for('students.students'))
+
+    @app.before_request
+    def _ingest_uploads():
+        if request.method != 'POST':
+            return None
+        view = app.view_functions.get(request.endpoint)
+        if not getattr(view, '_accepts_uploads', False):
+            return None
+
+        limit = app.config.get('MAX_CONTENT_LENGTH')
+        if limit is not None and request.content_length is not None and request.content_length > limit:
+            # Nothing has been read yet
+            return rejection_response(too_large())
+        try:
+            files = request.files
+        except RequestEntityTooLarge:
+            return rejection_response(too_large())
+
+        g.upload_images = {}
+        for name, storage in files.items(multi=True):
+            if not storage.filename:
+                continue    # empty file input
+            try:
+                g.upload_images[name] = inspect_image(storage.stream)
+            except UploadRejected as error:
+                return rejection_response(error)
+            upload_metrics.record('accepted')
+        return None
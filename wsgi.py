@@ -0,0 +1,21 @@
+"""
+WSGI entry point for production servers (gunicorn / uWSGI).
+
+gunicorn:  python server.py            (or: gunicorn -c server.py wsgi:app)
+uWSGI:     uwsgi --module wsgi:app --master --processes 4 --threads 4 --max-requests 1000
+"""
+from website import create_app
+from website.lifecycle import reinit_after_fork
+
+app = create_app()
+
+try:
+    # Under uWSGI with a master, re-create per-process clients in each worker
+    from uwsgidecorators import postfork
+except ImportError:
+    pass
+else:
+    from website.lifecycle import warm_up
+
+    warm_up(app)
+    postfork(reinit_after_fork)